@@ -1,8 +1,13 @@
-from sqlalchemy import create_engine
+import threading
+import time
+import unicodedata
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool, StaticPool
 from app.config import settings
-from app.models.base import Base
 # Import model modules so they register with Base.metadata
 import app.models.user  # noqa: F401
 import app.models.farm  # noqa: F401
@@ -12,28 +17,179 @@ import app.models.activity  # noqa: F401
 import app.models.harvest  # noqa: F401
 import app.models.sale  # noqa: F401
 import app.models.photo  # noqa: F401
-from sqlalchemy import text
+
+
+class PoolStats:
+    """Pool checkout counters (wait time, timeouts) used to size the pool per worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            if wait > self.max_wait:
+                self.max_wait = wait
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_seconds": round(self.total_wait, 6),
+                "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures how long callers wait for a free connection.
+
+    Keeps its configured ``max_overflow`` as a public attribute for get_pool_status().
+    """
+
+    def __init__(self, *args, max_overflow: int = 10, **kw):
+        super().__init__(*args, max_overflow=max_overflow, **kw)
+        self.max_overflow = max_overflow
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - start)
+        return conn
+
+
+def _sqlite_unaccent(value):
+    """SQLite stand-in for Postgres' f_unaccent() (migration 0006): "Thiès" -> "Thies"."""
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function("f_unaccent", 1, _sqlite_unaccent, deterministic=True)
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def build_engine(database_url: str = None):
+    """Create the SQLAlchemy engine with a pool configured from Settings.
+
+    StaticPool is only used for in-memory SQLite (tests), where every session
+    must share the single connection holding the database.
+    """
+    url = make_url(database_url or settings.DATABASE_URL)
+    if _is_memory_sqlite(url):
+        new_engine = create_engine(
+            url,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+            echo=settings.DEBUG,
+        )
+    else:
+        connect_args = {"check_same_thread": False} if url.get_backend_name() == "sqlite" else {}
+        new_engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            connect_args=connect_args,
+            echo=settings.DEBUG,
+        )
+    if url.get_backend_name() == "sqlite":
+        event.listen(new_engine, "connect", _register_sqlite_functions)
+    return new_engine
+
 
 # Create engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=StaticPool,
-    echo=settings.DEBUG
-)
+engine = build_engine()
+
+
+def get_pool_status() -> dict:
+    """Current pool state: connections in use, saturation and checkout wait times."""
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {"pool": type(pool).__name__}
+    capacity = pool.size() + max(pool.max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "max_overflow": pool.max_overflow,
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": pool.overflow(),
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        **pool_stats.snapshot(),
+    }
+
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
 
-# Create all tables
+def build_async_engine(database_url: str = None):
+    """Create the AsyncEngine used by the read-heavy async endpoints.
+
+    The sync URL is rewritten to its async driver (asyncpg / aiosqlite).
+    It has its own pool (DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW), counted
+    on top of the sync engine's in the per-worker connection budget.
+    asyncpg does not understand libpq's ``sslmode`` query parameter, so it
+    is translated into the ``ssl`` connect argument.
+    """
+    url = make_url(database_url or settings.DATABASE_URL)
+    backend = url.get_backend_name()
+    url = url.set(drivername=_ASYNC_DRIVERS.get(backend, url.drivername))
+    connect_args = {}
+    if backend == "postgresql" and "sslmode" in url.query:
+        sslmode = url.query["sslmode"]
+        url = url.difference_update_query(["sslmode", "channel_binding"])
+        if sslmode not in ("disable", "allow"):
+            connect_args["ssl"] = "require" if sslmode in ("prefer", "require") else sslmode
+    if _is_memory_sqlite(url):
+        new_engine = create_async_engine(url, poolclass=StaticPool, echo=settings.DEBUG)
+    else:
+        new_engine = create_async_engine(
+            url,
+            pool_size=settings.DB_ASYNC_POOL_SIZE,
+            max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            connect_args=connect_args,
+            echo=settings.DEBUG,
+        )
+    if backend == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", _register_sqlite_functions)
+    return new_engine
+
+
+async_engine = build_async_engine()
+
+# Bring the schema up to date (scripts and local dev; workers do not call this at boot)
 def init_db():
-    # Create all tables registered on the shared Base
-    Base.metadata.create_all(bind=engine)
-    # Ensure new columns exist (safe for development). PostgreSQL supports IF NOT EXISTS.
-    try:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE farms ADD COLUMN IF NOT EXISTS image_url VARCHAR(500);"))
-            conn.execute(text("ALTER TABLE farms ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;"))
-            conn.execute(text("ALTER TABLE farms ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;"))
-            # You can add more ALTER statements here for future model changes
-    except Exception as e:
-        print(f"Warning: could not run ALTER TABLE statements: {e}")
+    from app.migrations import run_migrations
+    return run_migrations(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -43,3 +199,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    """Async counterpart of get_db: does not hold a threadpool slot while waiting on Postgres."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,11 +1,21 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from app.config import settings
+from app.database import engine, async_engine
+from app.services import metrics_service, logging_service
+import hmac
 import os
 import traceback
 
+# Anyone knowing a placeholder key could sign tokens for any user
+if settings.SECRET_KEY in settings.PLACEHOLDER_SECRET_KEYS and not settings.DEBUG:
+    raise RuntimeError("SECRET_KEY is not set: generate one (openssl rand -hex 32) or set DEBUG=True for local development")
+
+# app.* loggers write through a queue and a background thread (see logging_service)
+logging_service.setup_logging()
+
 # Initialize app
 app = FastAPI(title=settings.APP_NAME, version="0.1.0")
 
@@ -31,11 +41,16 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH", "HEAD"],
-    allow_headers=["Content-Type", "Authorization", "Accept", "Origin"],
-    expose_headers=["Content-Type", "X-Total-Count"],
+    allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "If-None-Match"],
+    expose_headers=["Content-Type", "X-Total-Count", "ETag", "X-Next-Cursor"],
     max_age=86400,  # 24 hours
 )
 
+# Per-route latency and SQL statements per request, exposed at /metrics
+metrics_service.instrument_engine(engine, "sync")
+metrics_service.instrument_engine(async_engine.sync_engine, "async")
+app.add_middleware(metrics_service.MetricsMiddleware)
+
 print("✅ CORS configured with regex (production-ready)")
 print("   Allows: *.vercel.app, *.koyeb.app, localhost:*, mbaymi.com")
 
@@ -60,23 +75,49 @@ def include_routes():
     app.include_router(crops.router)
     
     # 🌾 Agricultural features
-    from app.routes import crop_problems, farm_network, user_profile
+    from app.routes import crop_problems, farm_network, user_profile, exports
     app.include_router(crop_problems.router)
     app.include_router(farm_network.router)
     app.include_router(user_profile.router)
+    app.include_router(exports.router)
 
 @app.on_event("startup")
 def startup():
     include_routes()
     print("✅ Routes loaded")
     print("📚 API Docs at http://localhost:8000/docs")
-    # Initialize DB (creates tables if missing)
-    try:
-        from app.database import init_db
-        init_db()
-        print("🗄️ Database initialized")
-    except Exception as e:
-        print(f"⚠️ Database init failed: {e}")
+    # Schema changes are applied once per deploy by `python migrate.py`, not by each worker.
+    # Set RUN_MIGRATIONS_ON_STARTUP=True for local development.
+    if os.getenv("RUN_MIGRATIONS_ON_STARTUP", "False") == "True":
+        try:
+            from app.database import init_db
+            init_db()
+            print("🗄️ Database migrated")
+        except Exception as e:
+            print(f"⚠️ Database migration failed: {e}")
+
+@app.on_event("startup")
+async def start_background_jobs():
+    import asyncio
+    from app.services.follow_service import reconciliation_loop
+    from app.services.news_service import refresher_loop
+    from app.services.auth_service import revocation_sync_loop
+    from app.services import table_stats_service
+    loop = asyncio.get_running_loop()
+    if settings.FOLLOW_COUNTS_RECONCILE_INTERVAL > 0:
+        loop.create_task(reconciliation_loop())
+    loop.create_task(refresher_loop())
+    loop.create_task(revocation_sync_loop())
+    loop.create_task(table_stats_service.refresher_loop())
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    from app.services import password_service
+    password_service.shutdown()
+
+@app.on_event("shutdown")
+def stop_log_writer():
+    logging_service.shutdown()
 
 @app.options("/{full_path:path}")
 def options_handler():
@@ -97,15 +138,37 @@ def read_root():
 def health_check():
     return {"status": "healthy", "message": "Mbaymi API is running"}
 
+@app.get("/health/db-pool")
+def db_pool_status():
+    """Connection pool usage for this worker (saturation, checkout wait times)"""
+    from app.database import get_pool_status
+    return get_pool_status()
+
+@app.get("/health/cache")
+def cache_status():
+    """In-memory response caches for this worker (hits, misses, evictions)"""
+    from app.services.cache_service import farm_details_cache
+    from app.services import auth_service
+    return {"farm_details": farm_details_cache.stats(), "auth_tokens": auth_service.stats()}
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics for this worker (latency per route, SQL per request, pools, caches)"""
+    return Response(metrics_service.render(), media_type=metrics_service.CONTENT_TYPE)
+
+@app.get("/health/password-pool")
+def password_pool_status():
+    """Argon2 process pool for this worker (size, calls waiting, cost parameters)"""
+    from app.services import password_service
+    return password_service.stats()
+
 @app.post("/admin/migrate")
 def run_migration(key: str = None):
     """
-    🔧 Apply database migrations (admin only)
+    🔧 Apply pending versioned migrations (admin only)
     Requires: key=migration_key from environment
     """
-    from app.config import settings
-    from app.database import get_db
-    from sqlalchemy import text
+    from app.migrations import run_migrations
     
     # Check admin key
     admin_key = os.getenv("MIGRATION_KEY", "dev-key-change-in-prod")
@@ -113,19 +176,11 @@ def run_migration(key: str = None):
         return {"status": "error", "message": "Unauthorized"}
     
     try:
-        # Execute migration for crops image_url
-        migration_sql = """
-        ALTER TABLE crops ADD COLUMN IF NOT EXISTS image_url VARCHAR(500);
-        """
-        
-        # Get a db session
-        db = next(get_db())
-        db.execute(text(migration_sql))
-        db.commit()
-        
+        applied = run_migrations()
         return {
             "status": "success",
-            "message": "Migration applied: Added image_url column to crops table"
+            "applied": applied,
+            "message": f"{len(applied)} migration(s) applied"
         }
     except Exception as e:
         return {
@@ -133,6 +188,42 @@ def run_migration(key: str = None):
             "message": f"Migration failed: {str(e)}"
         }
 
+def _slow_query_key_ok(key: str) -> bool:
+    # The log holds bound parameters (emails...): the default key is only accepted in DEBUG
+    admin_key = os.getenv("MIGRATION_KEY")
+    if not admin_key:
+        if not settings.DEBUG:
+            return False
+        admin_key = "dev-key-change-in-prod"
+    return key is not None and hmac.compare_digest(key, admin_key)
+
+@app.get("/admin/slow-queries")
+def slow_queries(key: str = None, limit: int = 50):
+    """
+    🐢 Slow SQL statements recorded by this worker (route, parameters, sampled EXPLAIN plans)
+    Requires: key=migration_key from environment (MIGRATION_KEY must be set unless DEBUG)
+    """
+    from app.services import slow_query_service
+
+    if not _slow_query_key_ok(key):
+        return {"status": "error", "message": "Unauthorized"}
+
+    return {"stats": slow_query_service.stats(), "queries": slow_query_service.entries(limit)}
+
+@app.post("/admin/slow-queries/clear")
+def clear_slow_queries(key: str = None):
+    """
+    🐢 Empty this worker's slow-query log
+    Requires: key=migration_key from environment (MIGRATION_KEY must be set unless DEBUG)
+    """
+    from app.services import slow_query_service
+
+    if not _slow_query_key_ok(key):
+        return {"status": "error", "message": "Unauthorized"}
+
+    slow_query_service.clear()
+    return {"status": "success"}
+
 # ✅ Global exception handler to ensure CORS headers are always present
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -0,0 +1,117 @@
+"""
+Versioned schema migrations.
+
+Migrations are the numbered files in sql/migrations (``NNNN_description.sql``),
+applied in order and recorded in the ``schema_migrations`` table. Version 1 is
+the baseline: it creates any missing table from the SQLAlchemy models.
+
+The runner takes a Postgres advisory lock, so when several processes start at
+once only one of them migrates and the others wait, then find nothing left to do.
+Run it once per deploy (``python migrate.py``), not from each worker's startup.
+"""
+import os
+import re
+from datetime import datetime
+from sqlalchemy import text
+from app.database import engine as default_engine
+from app.models.base import Base
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "migrations")
+
+# Arbitrary constant identifying the migration lock in pg_locks
+ADVISORY_LOCK_KEY = 72_617_361
+
+BASELINE_VERSION = 1
+
+_FILENAME_RE = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> list:
+    """Return [(version, name, path)] sorted by version, baseline included."""
+    migrations = [(BASELINE_VERSION, "baseline_schema", None)]
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version <= BASELINE_VERSION:
+            raise ValueError(f"Migration {filename}: versions start at {BASELINE_VERSION + 1}")
+        migrations.append((version, match.group(2), os.path.join(directory, filename)))
+    versions = [m[0] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version in sql/migrations")
+    return sorted(migrations)
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " name VARCHAR(200) NOT NULL,"
+        " applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def applied_versions(conn) -> set:
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def _apply(conn, version: int, name: str, path: str):
+    if path is None:
+        # Baseline: create tables that do not exist yet (never alters existing ones)
+        Base.metadata.create_all(bind=conn)
+    elif conn.dialect.name == "postgresql":
+        with open(path, "r", encoding="utf-8") as f:
+            sql = f.read()
+        # Plain DBAPI cursor, no parameters: psycopg2 would otherwise read the % of
+        # format() / RAISE in plpgsql bodies as placeholders. Same connection and transaction.
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+    # SQL files target Postgres; on SQLite (local dev/tests) the baseline already
+    # built the current schema from the models, so they are only recorded.
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+        {"v": version, "n": name, "t": datetime.utcnow()},
+    )
+
+
+def run_migrations(engine=None, log=print) -> list:
+    """Apply pending migrations; return the versions applied by this call."""
+    engine = engine or default_engine
+    migrations = discover_migrations()
+    applied_now = []
+    with engine.connect() as lock_conn:
+        is_postgres = lock_conn.dialect.name == "postgresql"
+        if is_postgres:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": ADVISORY_LOCK_KEY})
+            lock_conn.commit()
+        try:
+            with engine.begin() as conn:
+                done = applied_versions(conn)
+            for version, name, path in migrations:
+                if version in done:
+                    continue
+                log(f"📝 Applying migration {version:04d}_{name}")
+                # One transaction per migration: a failure leaves earlier ones recorded
+                with engine.begin() as conn:
+                    _apply(conn, version, name, path)
+                applied_now.append(version)
+        finally:
+            if is_postgres:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": ADVISORY_LOCK_KEY})
+                lock_conn.commit()
+    if not applied_now:
+        log("✅ Schema up to date")
+    return applied_now
+
+
+def migration_status(engine=None) -> list:
+    """Return [(version, name, applied)] for every known migration."""
+    engine = engine or default_engine
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    return [(version, name, version in done) for version, name, _ in discover_migrations()]
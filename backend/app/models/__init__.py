@@ -2,9 +2,17 @@ from .base import Base
 from .user import User
 from .farm import Farm, Crop
 from .livestock import Livestock
-from .market import MarketPrice
+from .activity import Activity
+from .harvest import Harvest
+from .sale import Sale
+from .photo import FarmPhoto, ActivityPhoto
+from .market import MarketPrice, MarketLatestPrice
 from .crop_problem import CropProblem
 from .farm_network import FarmProfile, FarmPost, FarmFollowing
 from .user_following import UserFollowing
+from .timeline import TimelineEntry, CelebrityAuthor
+from .resource_version import ResourceVersion
+from .revoked_token import RevokedToken
+from .farm_deletion import FarmDeletionJob
 
-__all__ = ["Base", "User", "Farm", "Crop", "Livestock", "MarketPrice", "CropProblem", "FarmProfile", "FarmPost", "FarmFollowing", "UserFollowing"]
+__all__ = ["Base", "User", "Farm", "Crop", "Livestock", "Activity", "Harvest", "Sale", "FarmPhoto", "ActivityPhoto", "MarketPrice", "MarketLatestPrice", "CropProblem", "FarmProfile", "FarmPost", "FarmFollowing", "UserFollowing", "TimelineEntry", "CelebrityAuthor", "ResourceVersion", "FarmDeletionJob", "RevokedToken"]
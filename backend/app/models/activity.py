@@ -1,16 +1,23 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from app.models.base import Base
 from datetime import datetime
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        Index("ix_activities_farm_activity_date", "farm_id", "activity_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
-    crop_id = Column(Integer, ForeignKey("crops.id"), nullable=True)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False)
+    crop_id = Column(Integer, ForeignKey("crops.id", ondelete="CASCADE"), nullable=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     activity_type = Column(String(100), nullable=False)  # labour, sowing, watering, treatment, harvest
     activity_date = Column(DateTime, default=datetime.utcnow)
     notes = Column(String(1000))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Photos jointes ; à charger avec selectinload() dans les listes pour éviter le N+1
+    photos = relationship("ActivityPhoto", order_by="ActivityPhoto.id", passive_deletes=True)
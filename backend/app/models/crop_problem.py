@@ -15,8 +15,8 @@ class CropProblem(Base):
     __tablename__ = "crop_problems"
     
     id = Column(Integer, primary_key=True, index=True)
-    crop_id = Column(Integer, ForeignKey("crops.id"), nullable=False)
-    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
+    crop_id = Column(Integer, ForeignKey("crops.id", ondelete="CASCADE"), nullable=False, index=True)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Type de problème
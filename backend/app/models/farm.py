@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, FetchedValue
+from sqlalchemy.orm import relationship
 from app.models.base import Base
 from datetime import datetime
 
@@ -14,15 +15,20 @@ class Farm(Base):
     image_url = Column(String(500))
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
+    # Cellule de grille (services/geo_service.py), calculée par trigger depuis latitude / longitude
+    geo_cell = Column(BigInteger, nullable=True, index=True, server_default=FetchedValue(), server_onupdate=FetchedValue())
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Photos de la ferme ; à charger avec selectinload() dans les listes pour éviter le N+1
+    photos = relationship("FarmPhoto", order_by="FarmPhoto.id", passive_deletes=True)
+
 
 class Crop(Base):
     __tablename__ = "crops"
     
     id = Column(Integer, primary_key=True, index=True)
-    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False, index=True)
     crop_name = Column(String(100), nullable=False)  # maïs, riz, arachide, millet, etc.
     planted_date = Column(DateTime)
     expected_harvest_date = Column(DateTime)
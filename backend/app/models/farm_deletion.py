@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from app.models.base import Base
+from datetime import datetime
+
+
+class FarmDeletionJob(Base):
+    """
+    Suppression d'une ferme et de toutes ses données, exécutée en tâche de fond.
+    Pas de clé étrangère vers farms : le job survit à la ferme qu'il supprime.
+    """
+    __tablename__ = "farm_deletion_jobs"
+    __table_args__ = (
+        Index("ix_farm_deletion_jobs_farm_status", "farm_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    farm_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=True)  # Propriétaire au moment de la demande
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    deleted = Column(JSON)  # Lignes supprimées par table, ex. {"activities": 1200, "crops": 8}
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
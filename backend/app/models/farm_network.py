@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from app.models.base import Base
 from datetime import datetime
 
@@ -8,9 +10,13 @@ class FarmProfile(Base):
     Permet aux agriculteurs de partager et apprendre des autres.
     """
     __tablename__ = "farm_profiles"
+    __table_args__ = (
+        # Pagination par curseur de /public-farms
+        Index("ix_farm_profiles_public_created_id", "is_public", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False, unique=True)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False, unique=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Visibilité
@@ -25,6 +31,9 @@ class FarmProfile(Base):
     # Statistiques
     total_followers = Column(Integer, default=0)
     
+    # Document plein texte (nom, spécialités, lieu, description), maintenu par trigger Postgres
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite")))
+    
     # Métadonnées
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -35,11 +44,16 @@ class FarmPost(Base):
     Posts d'une ferme : partage de photos de cultures, résultats, expériences.
     """
     __tablename__ = "farm_posts"
+    __table_args__ = (
+        # Pagination par curseur des posts d'une ferme, du fil et des posts d'un utilisateur
+        Index("ix_farm_posts_farm_created_id", "farm_id", "created_at", "id"),
+        Index("ix_farm_posts_user_created_id", "user_id", text("created_at DESC"), text("id DESC")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    crop_id = Column(Integer, ForeignKey("crops.id"), nullable=True)  # Post lié à une culture
+    crop_id = Column(Integer, ForeignKey("crops.id", ondelete="CASCADE"), nullable=True, index=True)  # Post lié à une culture
     
     # Contenu
     title = Column(String(200), nullable=False)  # "Récolte réussie de tomates"
@@ -64,7 +78,7 @@ class FarmFollowing(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     follower_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Qui suit
-    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)  # Quelle ferme
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False, index=True)  # Quelle ferme
     
     # Métadonnées
     created_at = Column(DateTime, default=datetime.utcnow)
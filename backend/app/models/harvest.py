@@ -6,8 +6,8 @@ class Harvest(Base):
     __tablename__ = "harvests"
 
     id = Column(Integer, primary_key=True, index=True)
-    farm_id = Column(Integer, ForeignKey("farms.id"), nullable=False)
-    crop_id = Column(Integer, ForeignKey("crops.id"), nullable=True)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False, index=True)
+    crop_id = Column(Integer, ForeignKey("crops.id", ondelete="CASCADE"), nullable=True, index=True)
     estimated_quantity = Column(Float)
     actual_quantity = Column(Float)
     harvest_date = Column(DateTime, default=datetime.utcnow)
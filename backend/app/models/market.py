@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from app.models.base import Base
 from datetime import datetime
 
 class MarketPrice(Base):
     __tablename__ = "market_prices"
+    __table_args__ = (
+        Index("ix_market_prices_product_region_date", "product_name", "region", "price_date"),
+        Index("ix_market_prices_region_date", "region", "price_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     product_name = Column(String(100), nullable=False)  # maïs, riz, arachide, etc.
@@ -16,3 +20,21 @@ class MarketPrice(Base):
     
     def __repr__(self):
         return f"<MarketPrice {self.product_name} - {self.region}>"
+
+
+class MarketLatestPrice(Base):
+    """
+    Dernier prix connu par (produit, région) : écran marché par défaut.
+    Maintenu par trigger Postgres à chaque écriture dans market_prices
+    (voir sql/migrations/0008 et 0014) ; pas lu hors Postgres (market_service).
+    """
+    __tablename__ = "market_latest_prices"
+
+    product_name = Column(String(100), primary_key=True)
+    region = Column(String(100), primary_key=True)
+    price_id = Column(Integer, nullable=False)  # market_prices.id du dernier relevé
+    price_per_kg = Column(Float)
+    currency = Column(String(10), default="CFA")
+    price_date = Column(DateTime, nullable=False)
+    source = Column(String(100))
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -7,7 +7,7 @@ class FarmPhoto(Base):
     __tablename__ = 'farm_photos'
 
     id = Column(Integer, primary_key=True, index=True)
-    farm_id = Column(Integer, ForeignKey('farms.id', ondelete='CASCADE'), nullable=False)
+    farm_id = Column(Integer, ForeignKey('farms.id', ondelete='CASCADE'), nullable=False, index=True)
     image_url = Column(String(500), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -16,6 +16,6 @@ class ActivityPhoto(Base):
     __tablename__ = 'activity_photos'
 
     id = Column(Integer, primary_key=True, index=True)
-    activity_id = Column(Integer, ForeignKey('activities.id', ondelete='CASCADE'), nullable=False)
+    activity_id = Column(Integer, ForeignKey('activities.id', ondelete='CASCADE'), nullable=False, index=True)
     image_url = Column(String(500), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
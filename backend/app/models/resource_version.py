@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from app.models.base import Base
+from datetime import datetime
+
+
+class ResourceVersion(Base):
+    """
+    Compteur de version par ressource lue en cache par les clients ("farm:12", "market_prices"...).
+    Incrémenté par les endpoints d'écriture ; sert à calculer les ETag sans reconstruire la réponse.
+    Partagé en base pour rester cohérent entre workers.
+    """
+    __tablename__ = "resource_versions"
+
+    key = Column(String(100), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
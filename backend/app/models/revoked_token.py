@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from app.models.base import Base
+from datetime import datetime
+
+
+class RevokedToken(Base):
+    """
+    Jeton JWT révoqué (déconnexion) avant son expiration, identifié par son `jti`.
+    Chaque worker en garde la liste en mémoire (auth_service) ; une ligne n'est
+    plus utile après `expires_at` et est purgée.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    user_id = Column(Integer, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
@@ -6,7 +6,7 @@ class Sale(Base):
     __tablename__ = "sales"
 
     id = Column(Integer, primary_key=True, index=True)
-    harvest_id = Column(Integer, ForeignKey("harvests.id"), nullable=True)
+    harvest_id = Column(Integer, ForeignKey("harvests.id", ondelete="CASCADE"), nullable=True, index=True)
     product_name = Column(String(200), nullable=False)
     quantity = Column(Float, nullable=False)
     price_per_unit = Column(Float, nullable=False)
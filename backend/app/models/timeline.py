@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from app.models.base import Base
+from datetime import datetime
+
+
+class TimelineEntry(Base):
+    """
+    Fil d'actualité matérialisé (fan-out à l'écriture).
+    Une ligne par (abonné, post) : la lecture du fil devient un simple parcours d'index.
+    """
+    __tablename__ = "timeline_entries"
+    __table_args__ = (
+        Index("ix_timeline_entries_user_created_post", "user_id", "created_at", "post_id"),
+        # Suppression en cascade des posts (le post_id n'est pas en tête de la clé primaire)
+        Index("ix_timeline_entries_post_id", "post_id"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)  # Propriétaire du fil
+    post_id = Column(Integer, ForeignKey("farm_posts.id", ondelete="CASCADE"), primary_key=True)
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False)  # Copie de farm_posts.created_at
+
+
+class CelebrityAuthor(Base):
+    """
+    Auteurs dont les posts ne sont pas recopiés dans les fils (trop d'abonnés).
+    Leurs posts sont lus à la demande (fan-out à la lecture).
+    """
+    __tablename__ = "celebrity_authors"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    follower_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
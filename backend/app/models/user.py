@@ -15,6 +15,9 @@ class User(Base):
     village = Column(String(100))
     profile_image = Column(String(500))  # URL de la photo de profil
     is_active = Column(Boolean, default=True)
+    # Compteurs maintenus par follow/unfollow (incrément atomique) et réconciliés périodiquement
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime
@@ -9,6 +9,10 @@ class UserFollowing(Base):
     Un utilisateur peut suivre un autre utilisateur.
     """
     __tablename__ = "user_following"
+    __table_args__ = (
+        Index("uq_user_following_follower_following", "follower_id", "following_id", unique=True),
+        Index("ix_user_following_following_id", "following_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     follower_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Qui suit
@@ -0,0 +1,37 @@
+"""
+JSON responses for bodies built by hand.
+
+Routes with a response_model are serialized straight to JSON bytes by
+pydantic-core; that fast path is only taken while the route keeps FastAPI's
+default response class, so orjson is not installed as the app-wide default.
+Use these classes where the body is a hand-built dict or already-encoded
+bytes (e.g. a cached payload).
+"""
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class JSONBytesResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Body that is already encoded JSON (bytes), e.g. served from a cache."""
+    media_type = "application/json"
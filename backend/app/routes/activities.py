@@ -1,13 +1,31 @@
+from datetime import datetime
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
 from app.database import get_db
 from app.models.activity import Activity
 from app.models.photo import ActivityPhoto
-from app.models.farm import Farm
-from app.schemas.schemas import ActivityCreate, ActivityResponse
+from app.models.farm import Farm, Crop
+from app.models.user import User
+from app.schemas.schemas import ActivityCreate, ActivityResponse, BatchResult
+from app.services import batch_service, farm_deletion_service
 
 router = APIRouter(prefix="/api/activities", tags=["activities"])
 
+def _activity_to_dict(a: Activity) -> dict:
+    return {
+        'id': a.id,
+        'farm_id': a.farm_id,
+        'crop_id': a.crop_id,
+        'user_id': a.user_id,
+        'activity_type': a.activity_type,
+        'activity_date': a.activity_date,
+        'notes': a.notes,
+        'created_at': a.created_at,
+        'image_urls': [p.image_url for p in a.photos],
+    }
+
 @router.post("/", response_model=ActivityResponse)
 def create_activity(activity: ActivityCreate, db: Session = Depends(get_db)):
     try:
@@ -15,6 +33,7 @@ def create_activity(activity: ActivityCreate, db: Session = Depends(get_db)):
         farm = db.query(Farm).filter(Farm.id == activity.farm_id).first()
         if not farm:
             raise HTTPException(status_code=404, detail="Farm not found")
+        farm_deletion_service.ensure_not_being_deleted(db, farm.id)
 
         new_activity = Activity(
             farm_id=activity.farm_id,
@@ -26,8 +45,7 @@ def create_activity(activity: ActivityCreate, db: Session = Depends(get_db)):
         )
 
         db.add(new_activity)
-        db.commit()
-        db.refresh(new_activity)
+        db.flush()  # id needed for the photos; activity and photos share one commit
 
         # If image URLs were provided, create ActivityPhoto rows
         image_urls = getattr(activity, 'image_urls', None)
@@ -37,7 +55,8 @@ def create_activity(activity: ActivityCreate, db: Session = Depends(get_db)):
                 p = ActivityPhoto(activity_id=new_activity.id, image_url=url)
                 db.add(p)
                 saved_urls.append(url)
-            db.commit()
+        db.commit()
+        db.refresh(new_activity)
 
         # Build clean response dict
         resp = {
@@ -58,48 +77,62 @@ def create_activity(activity: ActivityCreate, db: Session = Depends(get_db)):
         # Log and return a clear 500 error
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/farm/{farm_id}")
-def list_activities_for_farm(farm_id: int, db: Session = Depends(get_db)):
+@router.post("/batch", response_model=BatchResult)
+def create_activities_batch(activities: List[ActivityCreate], db: Session = Depends(get_db)):
+    """
+    Create many activities (and their photos) in one request and one transaction.
+    Items referencing an unknown farm, crop or user, or a crop of another farm,
+    are rejected individually.
+    """
+    batch_service.check_batch_size(activities)
     try:
-        activities = db.query(Activity).filter(Activity.farm_id == farm_id).order_by(Activity.activity_date.desc()).all()
-        result = []
-        for a in activities:
-            photos = db.query(ActivityPhoto).filter(ActivityPhoto.activity_id == a.id).all()
-            result.append({
-                'id': a.id,
+        errors = batch_service.find_missing_refs(db, activities, {"farm_id": Farm, "crop_id": Crop, "user_id": User})
+        batch_service.find_foreign_crops(db, activities, errors)
+        batch_service.find_deleting_farms(db, activities, errors)
+        valid = [a for i, a in enumerate(activities) if i not in errors]
+        now = datetime.utcnow()
+        created = batch_service.insert_returning(db, Activity, [
+            {
                 'farm_id': a.farm_id,
                 'crop_id': a.crop_id,
                 'user_id': a.user_id,
                 'activity_type': a.activity_type,
-                'activity_date': a.activity_date,
+                'activity_date': a.activity_date or now,
                 'notes': a.notes,
-                'created_at': a.created_at,
-                'image_urls': [p.image_url for p in photos],
-            })
-        return result
+            }
+            for a in valid
+        ])
+        photos = [
+            {'activity_id': row.id, 'image_url': url}
+            for a, row in zip(valid, created)
+            for url in (a.image_urls or [])
+        ]
+        if photos:
+            db.execute(insert(ActivityPhoto), photos)
+        db.commit()
+        return batch_service.build_results(len(activities), errors, created)
+    except HTTPException:
+        raise
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/crop/{crop_id}")
+@router.get("/farm/{farm_id}", response_model=List[ActivityResponse])
+def list_activities_for_farm(farm_id: int, db: Session = Depends(get_db)):
+    try:
+        # Photos chargées en une seule requête IN (...) : 2 requêtes quel que soit le nombre d'activités
+        activities = db.query(Activity).options(selectinload(Activity.photos))\
+            .filter(Activity.farm_id == farm_id).order_by(Activity.activity_date.desc()).all()
+        return [_activity_to_dict(a) for a in activities]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/crop/{crop_id}", response_model=List[ActivityResponse])
 def list_activities_for_crop(crop_id: int, db: Session = Depends(get_db)):
     try:
-        activities = db.query(Activity).filter(Activity.crop_id == crop_id).order_by(Activity.activity_date.desc()).all()
-        result = []
-        from app.models.photo import ActivityPhoto
-        for a in activities:
-            photos = db.query(ActivityPhoto).filter(ActivityPhoto.activity_id == a.id).all()
-            result.append({
-                'id': a.id,
-                'farm_id': a.farm_id,
-                'crop_id': a.crop_id,
-                'user_id': a.user_id,
-                'activity_type': a.activity_type,
-                'activity_date': a.activity_date,
-                'notes': a.notes,
-                'created_at': a.created_at,
-                'image_urls': [p.image_url for p in photos],
-            })
-        return result
+        activities = db.query(Activity).options(selectinload(Activity.photos))\
+            .filter(Activity.crop_id == crop_id).order_by(Activity.activity_date.desc()).all()
+        return [_activity_to_dict(a) for a in activities]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
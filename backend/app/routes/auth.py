@@ -1,24 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.schemas.schemas import UserCreate, UserResponse, UserLogin, UserLoginResponse
-from passlib.context import CryptContext
-from app.services.jwt_service import create_access_token, create_refresh_token, verify_token
+from app.services import auth_service, password_service
+from app.services.jwt_service import create_access_token, create_refresh_token, decode_token
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Hashing / verification run in password_service's process pool: the handlers are async
+# and only await the result, so logins neither hold a threadpool thread nor the event loop.
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if user exists
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    existing_user = await db.scalar(select(User.id).where(User.email == user.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -27,24 +25,32 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         name=user.name,
         email=user.email,
         phone=user.phone,
-        password_hash=hash_password(user.password),
+        password_hash=await password_service.hash_password(user.password),
         role=user.role,
         region=user.region,
         village=user.village
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 @router.post("/login", response_model=UserLoginResponse)
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    
-    if not db_user or not verify_password(user.password, db_user.password_hash):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(User).where(User.email == user.email))
+    if not db_user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    valid, new_hash = await password_service.verify_password(user.password, db_user.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Argon2 parameters changed since this hash was made: store the upgraded hash
+    if new_hash:
+        db_user.password_hash = new_hash
+        await db.commit()
     
     # Generate JWT tokens
     access_token = create_access_token(data={"user_id": db_user.id, "email": db_user.email})
@@ -67,14 +73,30 @@ def refresh_token(data: dict):
     if not refresh_token_str:
         raise HTTPException(status_code=400, detail="Refresh token required")
     
-    user_id = verify_token(refresh_token_str)
-    if user_id is None:
+    payload = decode_token(refresh_token_str)
+    # Only refresh tokens (never access or untyped ones); revoked (logged out) ones neither
+    if (
+        not payload
+        or "user_id" not in payload
+        or payload.get("type") != "refresh"
+        or auth_service.is_revoked(payload.get("jti"))
+    ):
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
     
     # Create new access token
-    access_token = create_access_token(data={"user_id": user_id})
+    access_token = create_access_token(data={"user_id": payload["user_id"]})
     
     return {
         "access_token": access_token,
         "token_type": "bearer"
     }
+
+@router.post("/logout")
+def logout(data: dict = None, claims: dict = Depends(auth_service.get_current_claims), db: Session = Depends(get_db)):
+    """Revoke the current access token and, if given, the refresh token."""
+    auth_service.revoke(db, claims["jti"], claims["user_id"], claims["exp"])
+    refresh_payload = decode_token((data or {}).get("refresh_token") or "")
+    if refresh_payload and refresh_payload.get("user_id") == claims["user_id"]:
+        auth_service.revoke(db, refresh_payload.get("jti"), claims["user_id"], refresh_payload["exp"])
+    db.commit()
+    return {"message": "Logged out"}
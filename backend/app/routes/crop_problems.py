@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from sqlalchemy.orm import Session
 from datetime import datetime
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 from app.database import get_db
 from app.models import CropProblem, Crop, Farm
+from app.services import farm_deletion_service
 
 router = APIRouter(prefix="/api/crop-problems", tags=["Crop Problems"])
 
@@ -21,6 +22,24 @@ class CropProblemCreate(BaseModel):
     photo_url: Optional[str] = None
     severity: str = "medium"  # low, medium, high
 
+class CropProblemResponse(BaseModel):
+    id: int
+    crop_id: int
+    problem_type: str
+    description: Optional[str] = None
+    photo_url: Optional[str] = None
+    severity: Optional[str] = None
+    status: Optional[str] = None
+    created_at: datetime
+    treatment_notes: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class CropProblemList(BaseModel):
+    count: int
+    problems: List[CropProblemResponse]
+
 # ═══════════════════════════════════════════════════════════════════════════
 # CROP PROBLEMS ENDPOINTS (Maladies & Ravageurs)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -49,6 +68,7 @@ def report_crop_problem(
         crop = db.query(Crop).filter(Crop.id == problem.crop_id, Crop.farm_id == problem.farm_id).first()
         if not crop:
             raise HTTPException(status_code=404, detail="Culture non trouvée")
+        farm_deletion_service.ensure_not_being_deleted(db, problem.farm_id)
         
         # Créer le problème
         crop_problem = CropProblem(
@@ -74,12 +94,14 @@ def report_crop_problem(
             "created_at": crop_problem.created_at.isoformat(),
             "message": "✅ Problème signalé avec succès"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
-@router.get("/crop/{crop_id}")
+@router.get("/crop/{crop_id}", response_model=CropProblemList)
 def get_crop_problems(crop_id: int, db: Session = Depends(get_db)):
     """
     📋 Récupérer tous les problèmes signalés pour une culture.
@@ -87,27 +109,12 @@ def get_crop_problems(crop_id: int, db: Session = Depends(get_db)):
     try:
         problems = db.query(CropProblem).filter(CropProblem.crop_id == crop_id).order_by(CropProblem.created_at.desc()).all()
         
-        return {
-            "count": len(problems),
-            "problems": [
-                {
-                    "id": p.id,
-                    "problem_type": p.problem_type,
-                    "description": p.description,
-                    "photo_url": p.photo_url,
-                    "severity": p.severity,
-                    "status": p.status,
-                    "created_at": p.created_at.isoformat(),
-                    "treatment_notes": p.treatment_notes,
-                }
-                for p in problems
-            ]
-        }
+        return CropProblemList(count=len(problems), problems=problems)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
-@router.get("/farm/{farm_id}")
+@router.get("/farm/{farm_id}", response_model=CropProblemList)
 def get_farm_problems(farm_id: int, db: Session = Depends(get_db)):
     """
     🚨 Récupérer tous les problèmes signalés pour une ferme.
@@ -115,22 +122,7 @@ def get_farm_problems(farm_id: int, db: Session = Depends(get_db)):
     try:
         problems = db.query(CropProblem).filter(CropProblem.farm_id == farm_id).order_by(CropProblem.created_at.desc()).all()
         
-        return {
-            "count": len(problems),
-            "problems": [
-                {
-                    "id": p.id,
-                    "crop_id": p.crop_id,
-                    "problem_type": p.problem_type,
-                    "description": p.description,
-                    "photo_url": p.photo_url,
-                    "severity": p.severity,
-                    "status": p.status,
-                    "created_at": p.created_at.isoformat(),
-                }
-                for p in problems
-            ]
-        }
+        return CropProblemList(count=len(problems), problems=problems)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.farm import Crop
+from app.services import etag_service, farm_deletion_service
 
 router = APIRouter(prefix="/api/crops", tags=["Crops"])
 
@@ -22,12 +23,14 @@ def add_crop_photo(crop_id: int, payload: dict, db: Session = Depends(get_db)):
     crop = db.query(Crop).filter(Crop.id == crop_id).first()
     if not crop:
         raise HTTPException(status_code=404, detail="Crop not found")
+    farm_deletion_service.ensure_not_being_deleted(db, crop.farm_id)
     
     image_url = payload.get("image_url")
     if not image_url:
         raise HTTPException(status_code=400, detail="image_url is required")
     
     crop.image_url = image_url
+    etag_service.touch_farm(db, crop.farm_id)
     db.commit()
     db.refresh(crop)
     
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models import Farm, User
+from app.services import export_service
+from app.services.auth_service import get_current_user_id, ensure_owner, ensure_self
+
+router = APIRouter(prefix="/api/exports", tags=["Exports"])
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EXPORTS COMPLETS (coopératives) — CSV ou NDJSON en streaming
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _check_params(dataset: str, format: str):
+    if dataset not in export_service.DATASETS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Jeu de données inconnu. Choix : {', '.join(export_service.DATASETS)}"
+        )
+    if format not in export_service.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Format : csv ou ndjson")
+
+
+def _streaming_response(query, dataset: str, format: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        export_service.stream_export(query, dataset, format),
+        media_type=export_service.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
+
+
+@router.get("/farm/{farm_id}/{dataset}")
+def export_farm_dataset(
+    farm_id: int,
+    dataset: str,
+    format: str = Query("csv"),
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    📦 Exporter toutes les lignes d'une ferme : activities, harvests, sales ou crop-problems.
+    
+    Exemple : /api/exports/farm/3/activities?format=ndjson
+    Réservé au propriétaire de la ferme (jeton Bearer).
+    Les lignes sont envoyées au fil de la lecture (mémoire constante).
+    """
+    _check_params(dataset, format)
+    owner_id = db.query(Farm.user_id).filter(Farm.id == farm_id).scalar()
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="Ferme non trouvée")
+    ensure_owner(owner_id, current_user_id)
+    query = export_service.farm_query(dataset, farm_id)
+    return _streaming_response(query, dataset, format, f"ferme-{farm_id}-{dataset}")
+
+
+@router.get("/user/{user_id}/{dataset}")
+def export_user_dataset(
+    user_id: int,
+    dataset: str,
+    format: str = Query("csv"),
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    📦 Exporter les lignes de toutes les fermes d'un utilisateur (ventes : celles qu'il a publiées).
+    Réservé à l'utilisateur lui-même (jeton Bearer).
+    """
+    ensure_self(user_id, current_user_id)
+    _check_params(dataset, format)
+    if not db.query(User.id).filter(User.id == user_id).first():
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    query = export_service.user_query(dataset, user_id)
+    return _streaming_response(query, dataset, format, f"utilisateur-{user_id}-{dataset}")
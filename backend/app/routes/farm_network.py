@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional
-from app.database import get_db
-from app.models import Farm, FarmProfile, FarmPost, FarmFollowing, UserFollowing, User, Crop
+from app.database import get_db, get_async_db
+from app.models import Farm, FarmProfile, FarmPost, FarmFollowing, User, Crop
+from app.services.pagination import apply_keyset, split_page
+from app.services import timeline_service, search_service, follow_service, etag_service, geo_service, farm_deletion_service
+from app.services.cache_service import farm_details_cache
+from app.services.auth_service import get_current_user_id
+from app.responses import RawJSONResponse, dumps
+from app.schemas.schemas import (
+    FarmPostResponse, FarmPostPage, FeedPostResponse, FeedPage,
+    PublicFarmResponse, PublicFarmsPage, FarmSearchResult, FarmSearchPage,
+    FollowedFarm, FollowedFarmList, NearbyFarm, NearbyFarmsPage,
+)
 import logging
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
 
 router = APIRouter(prefix="/api/farm-network", tags=["Farm Network"])
 
@@ -18,10 +29,10 @@ router = APIRouter(prefix="/api/farm-network", tags=["Farm Network"])
 @router.post("/profiles/{farm_id}")
 def create_farm_profile(
     farm_id: int,
-    user_id: int,
     description: str = "",
     specialties: str = "",  # "tomate,oignon,carotte"
     is_public: bool = True,
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -34,20 +45,24 @@ def create_farm_profile(
         farm = db.query(Farm).filter(Farm.id == farm_id, Farm.user_id == user_id).first()
         if not farm:
             raise HTTPException(status_code=404, detail="Ferme non trouvée")
+        farm_deletion_service.ensure_not_being_deleted(db, farm_id)
         
         # Vérifier qu'un profil n'existe pas déjà
         existing = db.query(FarmProfile).filter(FarmProfile.farm_id == farm_id).first()
         if existing:
             raise HTTPException(status_code=400, detail="Profil déjà créé pour cette ferme")
         
+        owner = db.query(User).filter(User.id == user_id).first()
         profile = FarmProfile(
             farm_id=farm_id,
             user_id=user_id,
             description=description,
             specialties=specialties,
             is_public=is_public,
+            total_followers=owner.followers_count if owner else 0,
         )
         db.add(profile)
+        etag_service.touch_farm(db, farm_id, user_id)
         db.commit()
         db.refresh(profile)
         
@@ -67,18 +82,69 @@ def create_farm_profile(
             "is_public": profile.is_public,
             "total_followers": profile.total_followers or 0,
         }
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
+@router.get("/profiles/search", response_model=FarmSearchPage)
+async def search_farm_profiles(
+    q: Optional[str] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    🔍 Rechercher des fermes publiques par nom, localisation, spécialités ou description.
+    
+    Insensible aux accents ("thies" trouve "Thiès"), résultats classés par pertinence.
+    Exemple : /profiles/search?q=tomate
+    
+    Déclarée avant /profiles/{farm_id} pour ne pas être capturée par cette route.
+    """
+    try:
+        results = await search_service.search_public_farms(db, q, skip, limit)
+        
+        farms_data = []
+        for profile, farm, user, rank in results:
+            # Safe specialties handling
+            specialties = []
+            if profile.specialties:
+                try:
+                    specialties = [s.strip() for s in profile.specialties.split(",") if s.strip()]
+                except Exception:
+                    specialties = []
+            
+            farms_data.append(FarmSearchResult(
+                farm_id=farm.id,
+                farm_name=farm.name,
+                location=farm.location,
+                owner_name=user.name,
+                description=profile.description or "",
+                specialties=specialties,
+                followers=profile.total_followers or 0,
+                score=round(float(rank or 0), 4),
+            ))
+        
+        return FarmSearchPage(count=len(farms_data), skip=skip, limit=limit, farms=farms_data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
+
+
 @router.get("/profiles/{farm_id}")
 def get_farm_profile(farm_id: int, db: Session = Depends(get_db)):
     """
     📋 Récupérer le profil public d'une ferme.
     """
     try:
-        profile = db.query(FarmProfile).filter(FarmProfile.farm_id == farm_id, FarmProfile.is_public == True).first()
+        profile = db.query(FarmProfile).filter(
+            FarmProfile.farm_id == farm_id,
+            FarmProfile.is_public == True,
+            FarmProfile.farm_id.not_in(farm_deletion_service.active_farm_ids()),
+        ).first()
         if not profile:
             raise HTTPException(status_code=404, detail="Profil non trouvé")
         
@@ -111,54 +177,6 @@ def get_farm_profile(farm_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
-@router.get("/profiles/search")
-def search_farm_profiles(
-    q: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
-):
-    """
-    🔍 Rechercher des fermes publiques par nom ou localisation.
-    
-    Exemple : /profiles/search?q=tomate
-    """
-    try:
-        query = db.query(FarmProfile, Farm).join(Farm, FarmProfile.farm_id == Farm.id).filter(FarmProfile.is_public == True)
-        
-        if q and q.strip():
-            search_term = f"%{q.strip()}%"
-            query = query.filter(
-                (Farm.name.ilike(search_term)) | 
-                (Farm.location.ilike(search_term))
-            )
-        
-        results = query.all()
-        
-        farms_data = []
-        for profile, farm in results:
-            # Safe specialties handling
-            specialties = []
-            if profile.specialties:
-                try:
-                    specialties = [s.strip() for s in profile.specialties.split(",") if s.strip()]
-                except Exception:
-                    specialties = []
-            
-            farms_data.append({
-                "farm_id": farm.id,
-                "farm_name": farm.name,
-                "location": farm.location,
-                "specialties": specialties,
-                "followers": profile.total_followers or 0,
-            })
-        
-        return {
-            "count": len(farms_data),
-            "farms": farms_data
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
-
-
 # ═══════════════════════════════════════════════════════════════════════════
 # FARM POSTS (Publications de cultures)
 # ═══════════════════════════════════════════════════════════════════════════
@@ -166,12 +184,12 @@ def search_farm_profiles(
 @router.post("/posts")
 def create_farm_post(
     farm_id: int,
-    user_id: int,
     title: str,
     description: str = "",
     photo_url: str = None,
     post_type: str = "crop_update",  # crop_update, harvest_result, problem_report, tip
     crop_id: int = None,
+    user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -187,6 +205,7 @@ def create_farm_post(
         farm = db.query(Farm).filter(Farm.id == farm_id, Farm.user_id == user_id).first()
         if not farm:
             raise HTTPException(status_code=404, detail="Ferme non trouvée")
+        farm_deletion_service.ensure_not_being_deleted(db, farm_id)
         
         post = FarmPost(
             farm_id=farm_id,
@@ -198,6 +217,9 @@ def create_farm_post(
             post_type=post_type,
         )
         db.add(post)
+        db.flush()
+        # Recopier le post dans le fil des abonnés, dans la même transaction
+        timeline_service.fan_out_post(db, post, user_id)
         db.commit()
         db.refresh(post)
         
@@ -208,79 +230,80 @@ def create_farm_post(
             "post_type": post.post_type,
             "created_at": post.created_at.isoformat(),
         }
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
-@router.get("/posts/farm/{farm_id}")
-def get_farm_posts(farm_id: int, skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
+@router.get("/posts/farm/{farm_id}", response_model=FarmPostPage)
+def get_farm_posts(
+    farm_id: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
     """
     📺 Récupérer tous les posts d'une ferme.
+    
+    Pagination : passer `next_cursor` de la réponse précédente dans `cursor`.
     """
     try:
-        posts = db.query(FarmPost).filter(FarmPost.farm_id == farm_id)\
-            .order_by(FarmPost.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
-        
-        return {
-            "count": len(posts),
-            "posts": [
-                {
-                    "id": p.id,
-                    "title": p.title,
-                    "description": p.description,
-                    "photo_url": p.photo_url,
-                    "post_type": p.post_type,
-                    "created_at": p.created_at.isoformat(),
-                }
-                for p in posts
-            ]
-        }
+        query = db.query(FarmPost).filter(FarmPost.farm_id == farm_id)
+        posts = apply_keyset(query, FarmPost.created_at, FarmPost.id, cursor, limit, skip).all()
+        posts, next_cursor = split_page(posts, limit, lambda p: (p.created_at, p.id))
+        
+        return FarmPostPage(
+            count=len(posts),
+            next_cursor=next_cursor,
+            posts=[FarmPostResponse.model_validate(p) for p in posts],
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
-@router.get("/feed")
-def get_farm_feed(user_id: int, skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
+@router.get("/feed", response_model=FeedPage)
+async def get_farm_feed(
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     📰 Récupérer le fil d'actualité (posts des utilisateurs suivis).
+    
+    Pagination : passer `next_cursor` de la réponse précédente dans `cursor`.
     """
     try:
-        # Récupérer les utilisateurs que l'utilisateur suit
-        following = db.query(UserFollowing.following_id).filter(UserFollowing.follower_id == user_id).all()
-        following_ids = [f[0] for f in following]
-        
-        if not following_ids:
-            return {"count": 0, "posts": []}
-        
-        # Récupérer les posts de ces utilisateurs (via leurs fermes)
-        posts = db.query(FarmPost, Farm, User).join(Farm, FarmPost.farm_id == Farm.id).join(User, Farm.user_id == User.id)\
-            .filter(Farm.user_id.in_(following_ids))\
-            .order_by(FarmPost.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
-        
-        return {
-            "count": len(posts),
-            "posts": [
-                {
-                    "id": post.id,
-                    "farm_id": post.farm_id,
-                    "farm_name": farm.name,
-                    "owner_name": user.name,
-                    "title": post.title,
-                    "description": post.description,
-                    "photo_url": post.photo_url,
-                    "post_type": post.post_type,
-                    "created_at": post.created_at.isoformat(),
-                }
+        # Fil matérialisé (fan-out à l'écriture) + posts des célébrités suivies
+        posts, next_cursor = await timeline_service.read_timeline(db, user_id, cursor, limit, skip)
+        
+        return FeedPage(
+            count=len(posts),
+            next_cursor=next_cursor,
+            posts=[
+                FeedPostResponse(
+                    id=post.id,
+                    farm_id=post.farm_id,
+                    farm_name=farm.name,
+                    owner_name=user.name,
+                    title=post.title,
+                    description=post.description,
+                    photo_url=post.photo_url,
+                    post_type=post.post_type,
+                    created_at=post.created_at,
+                )
                 for post, farm, user in posts
-            ]
-        }
+            ],
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
@@ -290,7 +313,7 @@ def get_farm_feed(user_id: int, skip: int = 0, limit: int = 20, db: Session = De
 # ═══════════════════════════════════════════════════════════════════════════
 
 @router.post("/follow-user/{user_id_to_follow}")
-def follow_user(user_id_to_follow: int, user_id: int, db: Session = Depends(get_db)):
+def follow_user(user_id_to_follow: int, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     """
     ➕ Suivre un utilisateur (propriétaire de ferme).
     """
@@ -314,18 +337,17 @@ def follow_user(user_id_to_follow: int, user_id: int, db: Session = Depends(get_
             print(f'❌ Follower user {user_id} not found')
             raise HTTPException(status_code=404, detail="Utilisateur courant non trouvé")
         
-        # Vérifier qu'on ne suit pas déjà
-        existing = db.query(UserFollowing).filter(
-            UserFollowing.follower_id == user_id,
-            UserFollowing.following_id == user_id_to_follow
-        ).first()
-        if existing:
+        # Créer la relation ; déjà suivi (ou requête simultanée) : rien à compter
+        if not follow_service.add_follow(db, user_id, user_id_to_follow):
+            db.rollback()
             print(f'⚠️ User {user_id} already follows user {user_id_to_follow}')
             return {"message": "✅ Utilisateur suivi"}
         
-        # Créer la relation
-        following = UserFollowing(follower_id=user_id, following_id=user_id_to_follow)
-        db.add(following)
+        follow_service.apply_follow_delta(db, user_id, user_id_to_follow, +1)
+        # Le nombre d'abonnés est affiché sur les fermes de l'utilisateur suivi
+        etag_service.touch_user(db, user_id_to_follow)
+        # Remplir le fil avec les posts récents de l'utilisateur suivi
+        timeline_service.backfill_timeline(db, user_id, user_id_to_follow)
         db.commit()
         
         print(f'✅ User {user_id_to_follow} followed by user {user_id}')
@@ -342,22 +364,22 @@ def follow_user(user_id_to_follow: int, user_id: int, db: Session = Depends(get_
 
 
 @router.delete("/follow-user/{user_id_to_unfollow}")
-def unfollow_user(user_id_to_unfollow: int, user_id: int, db: Session = Depends(get_db)):
+def unfollow_user(user_id_to_unfollow: int, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     """
     ➖ Arrêter de suivre un utilisateur.
     """
     try:
         print(f'➖ Unfollow user request: following_id={user_id_to_unfollow}, follower_id={user_id}')
         
-        following = db.query(UserFollowing).filter(
-            UserFollowing.follower_id == user_id,
-            UserFollowing.following_id == user_id_to_unfollow
-        ).first()
-        if not following:
+        # Décrémenter seulement si c'est cette requête qui a supprimé la ligne
+        if not follow_service.remove_follow(db, user_id, user_id_to_unfollow):
+            db.rollback()
             print(f'⚠️ User {user_id} is not following user {user_id_to_unfollow}')
             return {"message": "❌ Utilisateur non suivi"}
         
-        db.delete(following)
+        follow_service.apply_follow_delta(db, user_id, user_id_to_unfollow, -1)
+        etag_service.touch_user(db, user_id_to_unfollow)
+        timeline_service.prune_timeline(db, user_id, user_id_to_unfollow)
         db.commit()
         
         print(f'✅ User {user_id_to_unfollow} unfollowed by user {user_id}')
@@ -373,7 +395,7 @@ def unfollow_user(user_id_to_unfollow: int, user_id: int, db: Session = Depends(
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
-@router.get("/following/{user_id}")
+@router.get("/following/{user_id}", response_model=FollowedFarmList)
 def get_user_following(user_id: int, db: Session = Depends(get_db)):
     """
     📋 Récupérer les fermes suivies par un utilisateur.
@@ -383,44 +405,58 @@ def get_user_following(user_id: int, db: Session = Depends(get_db)):
             .filter(FarmFollowing.follower_id == user_id)\
             .all()
         
-        return {
-            "count": len(following),
-            "farms": [
-                {
-                    "farm_id": farm.id,
-                    "farm_name": farm.name,
-                    "location": farm.location,
-                }
-                for _, farm in following
-            ]
-        }
+        return FollowedFarmList(
+            count=len(following),
+            farms=[FollowedFarm(farm_id=farm.id, farm_name=farm.name, location=farm.location) for _, farm in following],
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 @router.get("/details/{farm_id}")
-def get_farm_details(farm_id: int, db: Session = Depends(get_db)):
+async def get_farm_details(
+    farm_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     📋 Récupérer les détails complets d'une ferme publique avec crops et photos.
+    Répond 304 si le client envoie l'ETag de la version courante (If-None-Match),
+    sinon sert la réponse depuis le cache mémoire tant que la version n'a pas changé.
     """
     try:
+        key = etag_service.farm_key(farm_id)
+        versions = await etag_service.versions_async(db, key)
+        etag = etag_service.make_etag(versions, [key], request)
+        cached = etag_service.not_modified(request, response, etag)
+        if cached:
+            return cached
+        
+        # Le cache garde le JSON déjà encodé : un hit ne sérialise rien
+        body = farm_details_cache.get(farm_id, versions[key])
+        if body is not None:
+            return RawJSONResponse(body, headers=response.headers)
+        
         # Vérifier que c'est une ferme publique
-        profile = db.query(FarmProfile).filter(
-            FarmProfile.farm_id == farm_id,
-            FarmProfile.is_public == True
-        ).first()
+        profile = await db.scalar(
+            select(FarmProfile).where(
+                FarmProfile.farm_id == farm_id,
+                FarmProfile.is_public == True,
+                FarmProfile.farm_id.not_in(farm_deletion_service.active_farm_ids()),
+            )
+        )
         
         if not profile:
             raise HTTPException(status_code=404, detail="Ferme non trouvée ou privée")
         
         # Récupérer la ferme et l'utilisateur
-        farm = db.query(Farm).filter(Farm.id == farm_id).first()
-        user = db.query(User).filter(User.id == farm.user_id).first()
-        
+        farm = await db.get(Farm, farm_id)
         if not farm:
             raise HTTPException(status_code=404, detail="Ferme non trouvée")
+        user = await db.get(User, farm.user_id)
         
         # Récupérer les crops
-        crops = db.query(Crop).filter(Crop.farm_id == farm_id).all()
+        crops = (await db.scalars(select(Crop).where(Crop.farm_id == farm_id))).all()
         crops_data = []
         for c in crops:
             crop_dict = {
@@ -445,7 +481,7 @@ def get_farm_details(farm_id: int, db: Session = Depends(get_db)):
         
         # Récupérer les photos de la ferme
         from app.models.photo import FarmPhoto
-        photos = db.query(FarmPhoto).filter(FarmPhoto.farm_id == farm_id).all()
+        photos = (await db.scalars(select(FarmPhoto).where(FarmPhoto.farm_id == farm_id))).all()
         photos_data = [
             {
                 "id": p.id,
@@ -463,7 +499,7 @@ def get_farm_details(farm_id: int, db: Session = Depends(get_db)):
             except Exception:
                 specialties = []
         
-        return {
+        details = {
             "farm_id": farm.id,
             "farm_name": farm.name,
             "location": farm.location,
@@ -476,81 +512,137 @@ def get_farm_details(farm_id: int, db: Session = Depends(get_db)):
             "crops": crops_data,
             "photos": photos_data,
         }
+        body = dumps(details)
+        # Rangé sous la version lue avant la construction : une écriture concurrente la rend obsolète
+        farm_details_cache.set(farm_id, body, versions[key])
+        return RawJSONResponse(body, headers=response.headers)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ [get_farm_details] ERREUR: {str(e)}", exc_info=True)
+        logger.error("❌ [get_farm_details] ERREUR: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
-@router.get("/public-farms")
-def get_public_farms(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+@router.get("/public-farms", response_model=PublicFarmsPage)
+async def get_public_farms(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     🌾 Récupérer les fermes publiques (à découvrir).
     
     Affiche les fermes qui ont été rendues publiques par leurs propriétaires.
+    Pagination : passer `next_cursor` de la réponse précédente dans `cursor`.
+    Répond 304 si le client envoie l'ETag de la version courante (If-None-Match).
     """
-    logger.info(f"📍 [get_public_farms] Début - skip={skip}, limit={limit}")
     try:
-        # Vérifier les tables existent
-        logger.debug("🔍 [get_public_farms] Vérification des tables...")
-        farm_profile_count = db.query(FarmProfile).count()
-        logger.info(f"✅ [get_public_farms] farm_profiles table existe - {farm_profile_count} lignes")
-        
-        farm_count = db.query(Farm).count()
-        logger.info(f"✅ [get_public_farms] farms table existe - {farm_count} lignes")
-        
-        user_count = db.query(User).count()
-        logger.info(f"✅ [get_public_farms] users table existe - {user_count} lignes")
-        
-        # Récupérer les profils publics
-        logger.debug("🔍 [get_public_farms] Exécution de la query...")
-        profiles = db.query(FarmProfile, Farm, User)\
+        # Clés de la page d'abord (id, dates de mise à jour) : l'ETag en dérive, et les
+        # lignes complètes ne sont lues que si le client n'a pas déjà cette page
+        keys_query = select(FarmProfile.id, FarmProfile.created_at, FarmProfile.updated_at, Farm.updated_at, User.updated_at)\
             .join(Farm, FarmProfile.farm_id == Farm.id)\
             .join(User, Farm.user_id == User.id)\
-            .filter(FarmProfile.is_public == True)\
-            .order_by(FarmProfile.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
-        
-        logger.info(f"✅ [get_public_farms] Query réussie - {len(profiles)} fermes trouvées")
+            .where(FarmProfile.is_public == True, Farm.id.not_in(farm_deletion_service.active_farm_ids()))
+        result = await db.execute(apply_keyset(keys_query, FarmProfile.created_at, FarmProfile.id, cursor, limit, skip))
+        keys, next_cursor = split_page(result.all(), limit, lambda row: (row[1], row[0]))
+        etag = etag_service.rows_etag(keys, request)
+        cached = etag_service.not_modified(request, response, etag)
+        if cached:
+            return cached
+        
+        # Récupérer les profils publics de la page (par clé primaire), dans l'ordre des clés
+        result = await db.execute(
+            select(FarmProfile, Farm, User)
+            .join(Farm, FarmProfile.farm_id == Farm.id)
+            .join(User, Farm.user_id == User.id)
+            .where(FarmProfile.id.in_([key[0] for key in keys]))
+        )
+        by_id = {row[0].id: row for row in result.all()}
+        profiles = [by_id[key[0]] for key in keys if key[0] in by_id]
         
         # Transformer les résultats
         farms_list = []
-        for idx, (profile, farm, user) in enumerate(profiles):
-            logger.debug(f"  📦 Traitement ferme {idx+1}/{len(profiles)}: farm_id={farm.id}, farm_name={farm.name}")
-            
+        for profile, farm, user in profiles:
             # Traiter les spécialités de manière sûre
             specialties = []
             if profile.specialties:
                 try:
                     specialties = [s.strip() for s in profile.specialties.split(",") if s.strip()]
                 except Exception as e:
-                    logger.warning(f"  ⚠️ Erreur en traitant specialties: {e}")
+                    logger.warning("⚠️ [get_public_farms] specialties illisibles (farm_id=%s): %s", farm.id, e)
                     specialties = []
             
-            farm_data = {
-                "farm_id": farm.id,
-                "farm_name": farm.name,
-                "location": farm.location,
-                "user_id": user.id,
-                "owner_name": user.name,
-                "profile_image": getattr(user, 'profile_image', None),
-                "profile_image_farm": farm.image_url,
-                "description": profile.description or "",
-                "specialties": specialties,
-                "followers": profile.total_followers or 0,
-            }
+            farm_data = PublicFarmResponse(
+                farm_id=farm.id,
+                farm_name=farm.name,
+                location=farm.location,
+                user_id=user.id,
+                owner_name=user.name,
+                profile_image=getattr(user, 'profile_image', None),
+                profile_image_farm=farm.image_url,
+                description=profile.description or "",
+                specialties=specialties,
+                followers=profile.total_followers or 0,
+            )
             farms_list.append(farm_data)
         
-        result = {
-            "count": len(farms_list),
-            "farms": farms_list
-        }
-        logger.info(f"✅ [get_public_farms] Succès - Retour {len(farms_list)} fermes")
-        return result
+        logger.info("✅ [get_public_farms] skip=%s limit=%s -> %s fermes", skip, limit, len(farms_list))
+        return PublicFarmsPage(count=len(farms_list), next_cursor=next_cursor, farms=farms_list)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ [get_public_farms] ERREUR: {type(e).__name__}: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
\ No newline at end of file
+        logger.error("❌ [get_public_farms] ERREUR: %s: %s", type(e).__name__, e, exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
+
+@router.get("/nearby", response_model=NearbyFarmsPage)
+async def get_nearby_farms(
+    request: Request,
+    response: Response,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25, gt=0, le=geo_service.MAX_RADIUS_KM),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    📍 Fermes publiques autour d'un point, de la plus proche à la plus éloignée.
+    
+    Exemple : /nearby?lat=14.79&lon=-16.93&radius_km=30
+    Les fermes sans coordonnées n'apparaissent pas.
+    """
+    try:
+        rows = await geo_service.nearby_public_farms(db, lat, lon, radius_km, limit)
+        etag = etag_service.rows_etag(
+            ((row.profile_id, row.profile_updated_at, row.farm_updated_at, row.user_updated_at) for _, row in rows), request
+        )
+        cached = etag_service.not_modified(request, response, etag)
+        if cached:
+            return cached
+
+        farms_data = [
+            NearbyFarm(
+                farm_id=row.farm_id,
+                farm_name=row.farm_name,
+                location=row.location,
+                user_id=row.user_id,
+                owner_name=row.owner_name,
+                profile_image=row.profile_image,
+                profile_image_farm=row.farm_image_url,
+                description=row.description or "",
+                specialties=[s.strip() for s in (row.specialties or "").split(",") if s.strip()],
+                followers=row.total_followers or 0,
+                latitude=row.latitude,
+                longitude=row.longitude,
+                distance_km=round(distance, 2),
+            )
+            for distance, row in rows
+        ]
+        return NearbyFarmsPage(count=len(farms_data), radius_km=radius_km, farms=farms_data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
@@ -1,15 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session, selectinload
 from app.database import get_db
 from app.models.farm import Farm, Crop
 from app.models.photo import FarmPhoto
 from app.models.user import User
-from app.schemas.schemas import FarmCreate, FarmResponse, CropCreate, CropResponse
+from app.models.farm_deletion import FarmDeletionJob
+from app.schemas.schemas import FarmCreate, FarmResponse, FarmPhotoResponse, CropCreate, CropResponse
+from app.services import etag_service, farm_deletion_service
+from app.services.auth_service import get_current_user_id, ensure_owner
 
 router = APIRouter(prefix="/api/farms", tags=["farms"])
 
+
+def get_owned_farm(db: Session, farm_id: int, current_user_id: int, allow_deleting: bool = False) -> Farm:
+    """
+    Ferme à modifier : 404 si elle n'existe pas, 403 si elle appartient à un autre utilisateur,
+    409 si sa suppression est en cours (sauf `allow_deleting`, pour relancer la suppression).
+    """
+    farm = db.query(Farm).filter(Farm.id == farm_id).first()
+    if not farm:
+        raise HTTPException(status_code=404, detail="Farm not found")
+    ensure_owner(farm.user_id, current_user_id)
+    if not allow_deleting:
+        farm_deletion_service.ensure_not_being_deleted(db, farm_id)
+    return farm
+
+
 @router.post("/", response_model=FarmResponse)
-def create_farm(farm: FarmCreate, user_id: int, db: Session = Depends(get_db)):
+def create_farm(farm: FarmCreate, user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
     # Check if user exists
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
@@ -28,6 +47,7 @@ def create_farm(farm: FarmCreate, user_id: int, db: Session = Depends(get_db)):
     )
     
     db.add(new_farm)
+    etag_service.bump(db, etag_service.user_farms_key(user_id))
     db.commit()
     db.refresh(new_farm)
     
@@ -35,32 +55,35 @@ def create_farm(farm: FarmCreate, user_id: int, db: Session = Depends(get_db)):
 
 @router.get("/{farm_id}", response_model=FarmResponse)
 def get_farm(farm_id: int, db: Session = Depends(get_db)):
-    farm = db.query(Farm).filter(Farm.id == farm_id).first()
+    farm = db.query(Farm).options(selectinload(Farm.photos))\
+        .filter(Farm.id == farm_id, Farm.id.not_in(farm_deletion_service.active_farm_ids())).first()
     if not farm:
         raise HTTPException(status_code=404, detail="Farm not found")
-    # attach photo URLs
-    photos = db.query(FarmPhoto).filter(FarmPhoto.farm_id == farm_id).all()
-    farm_dict = farm.__dict__.copy()
-    farm_dict['photos'] = [{'id': p.id, 'image_url': p.image_url} for p in photos]
-    return farm_dict
-
-@router.get("/user/{user_id}")
-def get_user_farms(user_id: int, db: Session = Depends(get_db)):
-    farms = db.query(Farm).filter(Farm.user_id == user_id).all()
-    result = []
-    for f in farms:
-        photos = db.query(FarmPhoto).filter(FarmPhoto.farm_id == f.id).all()
-        d = f.__dict__.copy()
-        d['photos'] = [{'id': p.id, 'image_url': p.image_url} for p in photos]
-        result.append(d)
-    return result
+    # FarmResponse lit farm.photos (from_attributes)
+    return farm
+
+@router.get("/user/{user_id}", response_model=List[FarmResponse])
+def get_user_farms(user_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    etag = etag_service.etag_for(db, request, etag_service.user_farms_key(user_id))
+    cached = etag_service.not_modified(request, response, etag)
+    if cached:
+        return cached
+    # Photos chargées en une seule requête IN (...) pour toutes les fermes
+    # Les fermes en cours de suppression n'apparaissent plus
+    return (
+        db.query(Farm)
+        .options(selectinload(Farm.photos))
+        .filter(Farm.user_id == user_id, Farm.id.not_in(farm_deletion_service.active_farm_ids()))
+        .all()
+    )
 
 
 @router.put("/{farm_id}", response_model=FarmResponse)
-def update_farm(farm_id: int, farm: FarmCreate, db: Session = Depends(get_db)):
-    existing = db.query(Farm).filter(Farm.id == farm_id).first()
-    if not existing:
-        raise HTTPException(status_code=404, detail="Farm not found")
+def update_farm(
+    farm_id: int, farm: FarmCreate,
+    current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
+    existing = get_owned_farm(db, farm_id, current_user_id)
     existing.name = farm.name
     existing.location = farm.location
     existing.size_hectares = farm.size_hectares
@@ -69,95 +92,100 @@ def update_farm(farm_id: int, farm: FarmCreate, db: Session = Depends(get_db)):
     existing.latitude = farm.latitude
     existing.longitude = farm.longitude
     db.add(existing)
+    etag_service.touch_farm(db, farm_id, existing.user_id)
     db.commit()
     db.refresh(existing)
-    photos = db.query(FarmPhoto).filter(FarmPhoto.farm_id == farm_id).all()
-    d = existing.__dict__.copy()
-    d['photos'] = [p.image_url for p in photos]
-    return d
+    return existing
 
 
-@router.delete("/{farm_id}")
-def delete_farm(farm_id: int, db: Session = Depends(get_db)):
-    farm = db.query(Farm).filter(Farm.id == farm_id).first()
-    if not farm:
-        raise HTTPException(status_code=404, detail="Farm not found")
-    
-    # Delete all related photos first
-    db.query(FarmPhoto).filter(FarmPhoto.farm_id == farm_id).delete()
-    
-    # Delete all related crops
-    db.query(Crop).filter(Crop.farm_id == farm_id).delete()
-    
-    # Delete all related harvests
-    from app.models.harvest import Harvest
-    db.query(Harvest).filter(Harvest.farm_id == farm_id).delete()
-    
-    # Delete all related sales
-    from app.models.sale import Sale
-    db.query(Sale).filter(Sale.farm_id == farm_id).delete()
-    
-    # Delete all related livestock
-    from app.models.livestock import Livestock
-    db.query(Livestock).filter(Livestock.farm_id == farm_id).delete()
-    
-    # Delete the farm
-    db.delete(farm)
-    db.commit()
-    
-    return {"status": "deleted"}
+@router.delete("/{farm_id}", status_code=202)
+def delete_farm(
+    farm_id: int, background_tasks: BackgroundTasks,
+    current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
+    """
+    🗑️ Supprimer une ferme et toutes ses données (cultures, activités, récoltes, ventes, posts...).
+    La suppression tourne en tâche de fond : on répond 202 avec l'URL de suivi du job.
+    """
+    farm = get_owned_farm(db, farm_id, current_user_id, allow_deleting=True)
+
+    job = farm_deletion_service.request_deletion(db, farm)
+    if job.status == "pending":
+        background_tasks.add_task(farm_deletion_service.run_deletion, job.id)
+
+    return {
+        "status": "accepted",
+        "job_id": job.id,
+        "status_url": f"/api/farms/deletions/{job.id}",
+    }
+
+
+@router.get("/deletions/{job_id}")
+def get_farm_deletion(job_id: int, current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    """📋 Suivi d'une suppression de ferme : pending → running → done / failed"""
+    job = db.get(FarmDeletionJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    ensure_owner(job.user_id, current_user_id)
+    return farm_deletion_service.job_to_dict(job)
 
 
 @router.post("/{farm_id}/photos")
-def add_farm_photo(farm_id: int, payload: dict, db: Session = Depends(get_db)):
+def add_farm_photo(
+    farm_id: int, payload: dict,
+    current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
     # payload should contain 'image_url'
-    farm = db.query(Farm).filter(Farm.id == farm_id).first()
-    if not farm:
-        raise HTTPException(status_code=404, detail="Farm not found")
+    farm = get_owned_farm(db, farm_id, current_user_id)
     url = payload.get('image_url')
     if not url:
         raise HTTPException(status_code=400, detail="image_url required")
     photo = FarmPhoto(farm_id=farm_id, image_url=url)
     db.add(photo)
+    etag_service.touch_farm(db, farm_id, farm.user_id)
     db.commit()
     db.refresh(photo)
     return {"id": photo.id, "image_url": photo.image_url}
 
 
-@router.get("/{farm_id}/photos")
+@router.get("/{farm_id}/photos", response_model=List[FarmPhotoResponse])
 def list_farm_photos(farm_id: int, db: Session = Depends(get_db)):
-    photos = db.query(FarmPhoto).filter(FarmPhoto.farm_id == farm_id).order_by(FarmPhoto.created_at.desc()).all()
-    return [{"id": p.id, "image_url": p.image_url, "created_at": p.created_at} for p in photos]
+    return db.query(FarmPhoto).filter(FarmPhoto.farm_id == farm_id).order_by(FarmPhoto.created_at.desc()).all()
 
 
 @router.delete("/{farm_id}/photos/{photo_id}")
-def delete_farm_photo(farm_id: int, photo_id: int, db: Session = Depends(get_db)):
+def delete_farm_photo(
+    farm_id: int, photo_id: int,
+    current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
+    farm = get_owned_farm(db, farm_id, current_user_id)
     photo = db.query(FarmPhoto).filter(FarmPhoto.id == photo_id, FarmPhoto.farm_id == farm_id).first()
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
     db.delete(photo)
+    etag_service.touch_farm(db, farm_id, farm.user_id)
     db.commit()
     return {"status": "deleted"}
 
 
 @router.delete("/{farm_id}/profile")
-def delete_farm_profile(farm_id: int, db: Session = Depends(get_db)):
-    farm = db.query(Farm).filter(Farm.id == farm_id).first()
-    if not farm:
-        raise HTTPException(status_code=404, detail="Farm not found")
+def delete_farm_profile(farm_id: int, current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)):
+    farm = get_owned_farm(db, farm_id, current_user_id)
     # Clear the profile image_url
     farm.image_url = None
     db.add(farm)
+    etag_service.touch_farm(db, farm_id, farm.user_id)
     db.commit()
     db.refresh(farm)
     return {"status": "deleted", "image_url": None}
 
 @router.post("/{farm_id}/crops", response_model=CropResponse)
-def add_crop(farm_id: int, crop: CropCreate, db: Session = Depends(get_db)):
-    # Check if farm exists
-    farm = db.query(Farm).filter(Farm.id == farm_id).first()
-    if not farm:
-        raise HTTPException(status_code=404, detail="Farm not found")
+def add_crop(
+    farm_id: int, crop: CropCreate,
+    current_user_id: int = Depends(get_current_user_id), db: Session = Depends(get_db)
+):
+    # Check if farm exists and belongs to the caller
+    farm = get_owned_farm(db, farm_id, current_user_id)
     
     new_crop = Crop(
         farm_id=farm_id,
@@ -171,12 +199,13 @@ def add_crop(farm_id: int, crop: CropCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_crop)
+    etag_service.touch_farm(db, farm_id, farm.user_id)
     db.commit()
     db.refresh(new_crop)
     
     return new_crop
 
-@router.get("/{farm_id}/crops")
+@router.get("/{farm_id}/crops", response_model=List[CropResponse])
 def get_farm_crops(farm_id: int, db: Session = Depends(get_db)):
     crops = db.query(Crop).filter(Crop.farm_id == farm_id).all()
     return crops
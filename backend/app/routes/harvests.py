@@ -1,9 +1,12 @@
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.harvest import Harvest
-from app.models.farm import Farm
-from app.schemas.schemas import HarvestCreate, HarvestResponse
+from datetime import datetime
+from app.models.farm import Farm, Crop
+from app.schemas.schemas import HarvestCreate, HarvestResponse, BatchResult
+from app.services import batch_service, farm_deletion_service
 
 router = APIRouter(prefix="/api/harvests", tags=["harvests"])
 
@@ -12,6 +15,7 @@ def create_harvest(h: HarvestCreate, db: Session = Depends(get_db)):
     farm = db.query(Farm).filter(Farm.id == h.farm_id).first()
     if not farm:
         raise HTTPException(status_code=404, detail="Farm not found")
+    farm_deletion_service.ensure_not_being_deleted(db, farm.id)
 
     new_h = Harvest(
         farm_id=h.farm_id,
@@ -28,12 +32,40 @@ def create_harvest(h: HarvestCreate, db: Session = Depends(get_db)):
 
     return new_h
 
-@router.get("/farm/{farm_id}")
+@router.post("/batch", response_model=BatchResult)
+def create_harvests_batch(harvests: List[HarvestCreate], db: Session = Depends(get_db)):
+    # One transaction; items with an unknown farm or crop, or a crop of another farm, are rejected individually
+    batch_service.check_batch_size(harvests)
+    try:
+        errors = batch_service.find_missing_refs(db, harvests, {"farm_id": Farm, "crop_id": Crop})
+        batch_service.find_foreign_crops(db, harvests, errors)
+        batch_service.find_deleting_farms(db, harvests, errors)
+        now = datetime.utcnow()
+        created = batch_service.insert_returning(db, Harvest, [
+            {
+                "farm_id": h.farm_id,
+                "crop_id": h.crop_id,
+                "estimated_quantity": h.estimated_quantity,
+                "actual_quantity": h.actual_quantity,
+                "harvest_date": h.harvest_date or now,
+                "notes": h.notes,
+            }
+            for i, h in enumerate(harvests) if i not in errors
+        ])
+        db.commit()
+        return batch_service.build_results(len(harvests), errors, created)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/farm/{farm_id}", response_model=List[HarvestResponse])
 def get_harvests_for_farm(farm_id: int, db: Session = Depends(get_db)):
     items = db.query(Harvest).filter(Harvest.farm_id == farm_id).order_by(Harvest.harvest_date.desc()).all()
     return items
 
-@router.get("/crop/{crop_id}")
+@router.get("/crop/{crop_id}", response_model=List[HarvestResponse])
 def get_harvests_for_crop(crop_id: int, db: Session = Depends(get_db)):
     items = db.query(Harvest).filter(Harvest.crop_id == crop_id).order_by(Harvest.harvest_date.desc()).all()
     return items
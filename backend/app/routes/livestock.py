@@ -1,3 +1,4 @@
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
@@ -40,7 +41,7 @@ def get_livestock(livestock_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Livestock not found")
     return livestock
 
-@router.get("/user/{user_id}")
+@router.get("/user/{user_id}", response_model=List[LivestockResponse])
 def get_user_livestock(user_id: int, db: Session = Depends(get_db)):
     livestock_list = db.query(Livestock).filter(Livestock.user_id == user_id).all()
     return livestock_list
@@ -1,26 +1,134 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.market import MarketPrice
-from app.schemas.schemas import MarketPriceResponse
+from app.schemas.schemas import MarketPriceResponse, MarketPricePage
+from app.services import etag_service
+from app.services.market_service import latest_price_to_dict, latest_prices_source
+from app.services.pagination import apply_keyset, split_page
+from app.services.search_service import escape_like
 
 router = APIRouter(prefix="/api/market", tags=["market"])
 
-@router.get("/prices")
-def get_all_prices(db: Session = Depends(get_db)):
-    prices = db.query(MarketPrice).order_by(MarketPrice.price_date.desc()).all()
-    return prices
+@router.get("/prices", response_model=List[MarketPriceResponse])
+async def get_all_prices(
+    request: Request,
+    response: Response,
+    region: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(200, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Dernier prix connu par (produit, région), depuis la table market_latest_prices
+    (calculé depuis l'historique hors Postgres, voir market_service).
+    Répond 304 si le client envoie l'ETag courant (version bumpée par trigger sur market_prices).
+    """
+    etag = await etag_service.etag_for_async(db, request, etag_service.MARKET_PRICES)
+    cached = etag_service.not_modified(request, response, etag)
+    if cached:
+        return cached
+    latest = latest_prices_source(db)
+    query = select(latest)
+    if region:
+        query = query.where(latest.c.region == region)
+    query = query.order_by(latest.c.product_name, latest.c.region).offset(skip).limit(limit)
+    prices = await db.execute(query)
+    return [latest_price_to_dict(p) for p in prices.all()]
 
-@router.get("/prices/region/{region}")
-def get_prices_by_region(region: str, db: Session = Depends(get_db)):
-    prices = db.query(MarketPrice).filter(
-        MarketPrice.region == region
-    ).order_by(MarketPrice.price_date.desc()).all()
-    return prices
+def _price_history(
+    db: Session,
+    product_names: Optional[list],
+    region: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    cursor: Optional[str],
+    limit: int,
+) -> MarketPricePage:
+    query = db.query(MarketPrice)
+    if product_names is not None:
+        query = query.filter(MarketPrice.product_name.in_(product_names))
+    if region:
+        query = query.filter(MarketPrice.region == region)
+    if date_from:
+        query = query.filter(MarketPrice.price_date >= date_from)
+    if date_to:
+        query = query.filter(MarketPrice.price_date <= date_to)
+    prices = apply_keyset(query, MarketPrice.price_date, MarketPrice.id, cursor, limit).all()
+    prices, next_cursor = split_page(prices, limit, lambda p: (p.price_date, p.id))
+    return MarketPricePage(count=len(prices), next_cursor=next_cursor, prices=prices)
 
-@router.get("/prices/{product}")
-def get_product_prices(product: str, db: Session = Depends(get_db)):
-    prices = db.query(MarketPrice).filter(
-        MarketPrice.product_name.ilike(f"%{product}%")
-    ).order_by(MarketPrice.price_date.desc()).all()
-    return prices
+@router.get("/prices/history", response_model=MarketPricePage)
+def get_price_history(
+    product: Optional[str] = None,
+    region: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Historique des prix filtré (produit exact, région, période), du plus récent au plus ancien.
+    Pagination : passer `next_cursor` de la réponse précédente dans `cursor`.
+    """
+    return _price_history(db, [product] if product else None, region, date_from, date_to, cursor, limit)
+
+@router.get("/prices/region/{region}", response_model=List[MarketPriceResponse])
+async def get_prices_by_region(
+    region: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Dernier prix de chaque produit dans une région."""
+    etag = await etag_service.etag_for_async(db, request, etag_service.MARKET_PRICES)
+    cached = etag_service.not_modified(request, response, etag)
+    if cached:
+        return cached
+    latest = latest_prices_source(db)
+    prices = await db.execute(
+        select(latest)
+        .where(latest.c.region == region)
+        .order_by(latest.c.product_name)
+    )
+    return [latest_price_to_dict(p) for p in prices.all()]
+
+@router.get("/prices/{product}", response_model=List[MarketPriceResponse])
+def get_product_prices(
+    product: str,
+    response: Response,
+    region: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Historique des prix des produits dont le nom contient `product`, du plus récent au plus ancien.
+    La recherche partielle se fait sur la petite table des derniers prix, puis
+    l'historique est lu par nom exact via l'index (product_name, region, price_date).
+
+    Réponse : une liste, comme avant la pagination ; la page suivante s'obtient en
+    passant l'en-tête `X-Next-Cursor` dans `cursor` (absent sur la dernière page).
+    """
+    latest = latest_prices_source(db)
+    product_names = [
+        name for (name,) in db.execute(
+            select(latest.c.product_name)
+            # % et _ tapés par l'utilisateur sont cherchés tels quels, pas comme jokers
+            .where(latest.c.product_name.ilike(f"%{escape_like(product)}%", escape="\\"))
+            .distinct()
+        ).all()
+    ]
+    if not product_names:
+        return []
+    page = _price_history(db, product_names, region, date_from, date_to, cursor, limit)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.prices
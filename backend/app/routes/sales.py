@@ -1,8 +1,12 @@
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.sale import Sale
-from app.schemas.schemas import SaleCreate, SaleResponse
+from app.models.harvest import Harvest
+from app.models.user import User
+from app.schemas.schemas import SaleCreate, SaleResponse, BatchResult
+from app.services import batch_service
 
 router = APIRouter(prefix="/api/sales", tags=["sales"])
 
@@ -25,12 +29,39 @@ def create_sale(s: SaleCreate, db: Session = Depends(get_db)):
 
     return new_sale
 
-@router.get("/user/{user_id}")
+@router.post("/batch", response_model=BatchResult)
+def create_sales_batch(sales: List[SaleCreate], db: Session = Depends(get_db)):
+    # One transaction; items with an unknown harvest or user are rejected individually
+    batch_service.check_batch_size(sales)
+    try:
+        errors = batch_service.find_missing_refs(db, sales, {"harvest_id": Harvest, "user_id": User})
+        created = batch_service.insert_returning(db, Sale, [
+            {
+                "harvest_id": s.harvest_id,
+                "product_name": s.product_name,
+                "quantity": s.quantity,
+                "price_per_unit": s.price_per_unit,
+                "currency": s.currency or "CFA",
+                "delivery_location": s.delivery_location,
+                "contact": s.contact,
+                "user_id": s.user_id,
+            }
+            for i, s in enumerate(sales) if i not in errors
+        ])
+        db.commit()
+        return batch_service.build_results(len(sales), errors, created)
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/user/{user_id}", response_model=List[SaleResponse])
 def get_sales_by_user(user_id: int, db: Session = Depends(get_db)):
     items = db.query(Sale).filter(Sale.user_id == user_id).order_by(Sale.created_at.desc()).all()
     return items
 
-@router.get("/harvest/{harvest_id}")
+@router.get("/harvest/{harvest_id}", response_model=List[SaleResponse])
 def get_sales_for_harvest(harvest_id: int, db: Session = Depends(get_db)):
     items = db.query(Sale).filter(Sale.harvest_id == harvest_id).order_by(Sale.created_at.desc()).all()
     return items
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, Farm, FarmPost, Crop, Livestock
+from app.database import get_db, get_async_db
+from app.models import User, Farm, FarmPost, Crop, Livestock, FarmProfile
+from app.services.pagination import apply_keyset, split_page
+from app.services import etag_service, farm_deletion_service
+from app.services.auth_service import get_current_user_id, ensure_self
+from app.schemas.schemas import FeedPostResponse, FeedPage
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,35 +20,40 @@ router = APIRouter(prefix="/api/users", tags=["User Profile"])
 # ═══════════════════════════════════════════════════════════════════════════
 
 @router.get("/{user_id}/profile")
-def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+async def get_user_profile(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     👤 Récupérer le profil personnel d'un utilisateur.
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
         
         # Récupérer toutes les fermes de l'utilisateur
-        farms = db.query(Farm).filter(Farm.user_id == user_id).all()
+        farms = (await db.scalars(
+            select(Farm).where(Farm.user_id == user_id, Farm.id.not_in(farm_deletion_service.active_farm_ids()))
+        )).all()
         farm_ids = [f.id for f in farms]
         
         # Compter les posts totaux
-        total_posts = db.query(FarmPost).filter(FarmPost.user_id == user_id).count() if farm_ids else 0
-        
-        # Récupérer tous les crops d'une seule requête
-        all_crops = db.query(Crop).filter(Crop.farm_id.in_(farm_ids)).all() if farm_ids else []
-        
-        # Récupérer tous les livestock par user_id
-        all_livestock = db.query(Livestock).filter(Livestock.user_id == user_id).all()
+        total_posts = 0
+        if farm_ids:
+            total_posts = await db.scalar(
+                select(func.count()).select_from(FarmPost).where(FarmPost.user_id == user_id)
+            )
         
-        # Créer des dictionnaires pour compter
+        # Compter les crops par ferme en une seule requête (GROUP BY, sans charger les lignes)
         crops_by_farm = {}
-        for crop in all_crops:
-            crops_by_farm[crop.farm_id] = crops_by_farm.get(crop.farm_id, 0) + 1
+        if farm_ids:
+            rows = await db.execute(
+                select(Crop.farm_id, func.count()).where(Crop.farm_id.in_(farm_ids)).group_by(Crop.farm_id)
+            )
+            crops_by_farm = dict(rows.all())
         
         # Pour livestock, on met juste le total (pas associé à une ferme spécifique)
-        livestock_count = len(all_livestock)
+        livestock_count = await db.scalar(
+            select(func.count()).select_from(Livestock).where(Livestock.user_id == user_id)
+        )
         
         return {
             "id": user.id,
@@ -50,7 +62,8 @@ def get_user_profile(user_id: int, db: Session = Depends(get_db)):
             "phone": getattr(user, 'phone', None),
             "profile_image": getattr(user, 'profile_image', None),
             "total_farms": len(farms),
-            "total_followers": 0,
+            "total_followers": user.followers_count or 0,
+            "total_following": user.following_count or 0,
             "total_posts": total_posts,
             "farms": [
                 {
@@ -65,8 +78,10 @@ def get_user_profile(user_id: int, db: Session = Depends(get_db)):
                 for f in farms
             ]
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Erreur dans get_user_profile pour user_id={user_id}: {str(e)}", exc_info=True)
+        logger.error("Erreur dans get_user_profile pour user_id=%s: %s", user_id, e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
@@ -76,11 +91,14 @@ def update_user_profile(
     name: str = None,
     email: str = None,
     profile_image: str = None,
+    current_user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
     ✏️ Mettre à jour le profil utilisateur (nom, email et photo de profil).
+    Réservé à l'utilisateur lui-même (jeton Bearer).
     """
+    ensure_self(user_id, current_user_id)
     try:
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
@@ -110,6 +128,8 @@ def update_user_profile(
             profile_image = profile_image.strip()
             user.profile_image = profile_image
         
+        # Nom et photo apparaissent sur les fermes publiques de l'utilisateur
+        etag_service.touch_user(db, user_id)
         db.commit()
         db.refresh(user)
         
@@ -129,79 +149,89 @@ def update_user_profile(
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
-@router.get("/{user_id}/posts")
-def get_user_posts(user_id: int, skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
+@router.get("/{user_id}/posts", response_model=FeedPage)
+def get_user_posts(
+    user_id: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
     """
     📰 Récupérer tous les posts d'un utilisateur.
+    
+    Pagination : passer `next_cursor` de la réponse précédente dans `cursor`.
     """
     try:
-        # Récupérer les fermes de l'utilisateur
-        farms = db.query(Farm).filter(Farm.user_id == user_id).all()
-        farm_ids = [f.id for f in farms]
-        
-        if not farm_ids:
-            return {"count": 0, "posts": []}
-        
-        # Récupérer les posts des fermes
-        posts = db.query(FarmPost).filter(FarmPost.farm_id.in_(farm_ids))\
-            .order_by(FarmPost.created_at.desc())\
-            .offset(skip)\
-            .limit(limit)\
-            .all()
+        # Posts de l'utilisateur (FarmPost.user_id = propriétaire de la ferme), parcourus
+        # via ix_farm_posts_user_created_id ; le nom de la ferme vient de la même requête
+        query = db.query(FarmPost, Farm).join(Farm, FarmPost.farm_id == Farm.id)\
+            .filter(FarmPost.user_id == user_id)
+        rows = apply_keyset(query, FarmPost.created_at, FarmPost.id, cursor, limit, skip).all()
+        rows, next_cursor = split_page(rows, limit, lambda row: (row[0].created_at, row[0].id))
         
         posts_data = []
-        for post in posts:
-            farm = db.query(Farm).filter(Farm.id == post.farm_id).first()
-            posts_data.append({
-                "id": post.id,
-                "farm_id": post.farm_id,
-                "farm_name": farm.name if farm else "Unknown",
-                "title": post.title,
-                "description": post.description,
-                "photo_url": post.photo_url,
-                "post_type": post.post_type,
-                "created_at": post.created_at.isoformat() if post.created_at else None,
-            })
-        
-        return {
-            "count": len(posts_data),
-            "posts": posts_data
-        }
+        for post, farm in rows:
+            posts_data.append(FeedPostResponse(
+                id=post.id,
+                farm_id=post.farm_id,
+                farm_name=farm.name,
+                title=post.title,
+                description=post.description,
+                photo_url=post.photo_url,
+                post_type=post.post_type,
+                created_at=post.created_at,
+            ))
+        
+        return FeedPage(count=len(posts_data), next_cursor=next_cursor, posts=posts_data)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
 
 
 @router.put("/{user_id}/farms/{farm_id}/visibility")
-def toggle_farm_visibility(user_id: int, farm_id: int, is_public: bool, db: Session = Depends(get_db)):
+def toggle_farm_visibility(
+    user_id: int,
+    farm_id: int,
+    is_public: bool,
+    current_user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
     """
     🔒 Rendre une ferme publique ou privée dans le réseau agricole.
     
     Exemple :
     PUT /api/users/1/farms/5/visibility?is_public=true
     """
+    ensure_self(user_id, current_user_id)
     try:
         # Vérifier que la ferme appartient à l'utilisateur
         farm = db.query(Farm).filter(Farm.id == farm_id, Farm.user_id == user_id).first()
         if not farm:
             raise HTTPException(status_code=404, detail="Ferme non trouvée")
+        farm_deletion_service.ensure_not_being_deleted(db, farm_id)
         
         # Récupérer ou créer le profil de la ferme
         profile = db.query(FarmProfile).filter(FarmProfile.farm_id == farm_id).first()
         
         if not profile:
             # Créer un profil par défaut
+            owner = db.query(User).filter(User.id == user_id).first()
             profile = FarmProfile(
                 farm_id=farm_id,
                 user_id=user_id,
                 is_public=is_public,
                 description="",
                 specialties="",
+                total_followers=owner.followers_count if owner else 0,
             )
             db.add(profile)
         else:
             # Mettre à jour la visibilité
             profile.is_public = is_public
         
+        etag_service.touch_farm(db, farm_id, user_id)
         db.commit()
         db.refresh(profile)
         
@@ -210,6 +240,8 @@ def toggle_farm_visibility(user_id: int, farm_id: int, is_public: bool, db: Sess
             "is_public": profile.is_public,
             "message": f"Ferme {'✅ rendue publique' if is_public else '🔒 rendue privée'}"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur : {str(e)}")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from typing import Optional
 from typing import List
@@ -38,6 +38,8 @@ class UserLoginResponse(BaseModel):
     name: str
     role: str
     token: Optional[str] = None
+    access_token: Optional[str] = None
+    refresh_token: Optional[str] = None
     message: str
 
 # Farm Schemas
@@ -53,7 +55,9 @@ class CropCreate(BaseModel):
 class CropResponse(CropCreate):
     id: int
     farm_id: int
+    image_url: Optional[str] = None
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -67,12 +71,21 @@ class FarmCreate(BaseModel):
     latitude: Optional[float] = None
     longitude: Optional[float] = None
 
+class FarmPhotoResponse(BaseModel):
+    id: int
+    image_url: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 class FarmResponse(FarmCreate):
     id: int
     user_id: int
     created_at: datetime
-    # photos can be provided separately under a photos endpoint
-    photos: Optional[List[str]] = None
+    updated_at: Optional[datetime] = None
+    # Farm.photos relationship (load it with selectinload for lists)
+    photos: List[FarmPhotoResponse] = []
     
     class Config:
         from_attributes = True
@@ -94,6 +107,7 @@ class LivestockResponse(LivestockCreate):
     user_id: int
     last_vaccination_date: Optional[datetime]
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -111,6 +125,11 @@ class MarketPriceResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class MarketPricePage(BaseModel):
+    count: int
+    next_cursor: Optional[str] = None
+    prices: List[MarketPriceResponse]
+
 # Activity Schemas
 class ActivityCreate(BaseModel):
     farm_id: int
@@ -163,10 +182,102 @@ class SaleResponse(SaleCreate):
     class Config:
         from_attributes = True
 
+# Farm Network Schemas
+class FarmPostResponse(BaseModel):
+    id: int
+    farm_id: int
+    title: str
+    description: Optional[str] = None
+    photo_url: Optional[str] = None
+    post_type: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class FarmPostPage(BaseModel):
+    count: int
+    next_cursor: Optional[str] = None
+    posts: List[FarmPostResponse]
+
+class FeedPostResponse(FarmPostResponse):
+    farm_name: str
+    owner_name: Optional[str] = None
+
+class FeedPage(BaseModel):
+    count: int
+    next_cursor: Optional[str] = None
+    posts: List[FeedPostResponse]
+
+class PublicFarmResponse(BaseModel):
+    farm_id: int
+    farm_name: str
+    location: Optional[str] = None
+    user_id: int
+    owner_name: str
+    profile_image: Optional[str] = None
+    profile_image_farm: Optional[str] = None
+    description: str = ""
+    specialties: List[str] = []
+    followers: int = 0
+
+class PublicFarmsPage(BaseModel):
+    count: int
+    next_cursor: Optional[str] = None
+    farms: List[PublicFarmResponse]
+
+class FarmSearchResult(BaseModel):
+    farm_id: int
+    farm_name: str
+    location: Optional[str] = None
+    owner_name: str
+    description: str = ""
+    specialties: List[str] = []
+    followers: int = 0
+    score: float = 0
+
+class FarmSearchPage(BaseModel):
+    count: int
+    skip: int
+    limit: int
+    farms: List[FarmSearchResult]
+
+class NearbyFarm(PublicFarmResponse):
+    latitude: float
+    longitude: float
+    distance_km: float
+
+class NearbyFarmsPage(BaseModel):
+    count: int
+    radius_km: float
+    farms: List[NearbyFarm]
+
+class FollowedFarm(BaseModel):
+    farm_id: int
+    farm_name: str
+    location: Optional[str] = None
+
+class FollowedFarmList(BaseModel):
+    count: int
+    farms: List[FollowedFarm]
+
+# Batch Schemas (POST .../batch)
+class BatchItemResult(BaseModel):
+    index: int  # position in the submitted array
+    status: str  # created, error
+    id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BatchItemResult]
+
 # Advice Schema
 class AdviceRequest(BaseModel):
     type: str  # "crop" or "livestock"
-    topic: str  # crop_name, animal_type, etc.
+    topic: str = Field(..., max_length=200)  # crop_name, animal_type, etc.
     region: Optional[str] = None
     context: Optional[str] = None
 
@@ -0,0 +1,444 @@
+"""
+Bulk generation of realistic, correlated data (development databases, benchmarks).
+
+Everything derives from one seed, so the same counts and seed always give the
+same rows:
+
+- users spread over the regions; farms per farmer follow a power law (many
+  smallholders, a few large owners), in or near the owner's region;
+- each farm grows 1-4 crops typical of its region, more on larger farms;
+- every crop gets a dated activity timeline (tillage, sowing, upkeep, harvest);
+- mature crops are harvested and part of each harvest is sold at the regional
+  market price of the week of the sale;
+- the follow graph has a power-law in-degree (a few very followed farmers);
+- market prices are a weekly history per product and region (trend, season, noise).
+
+On PostgreSQL rows are streamed with COPY FROM STDIN in CSV batches; other
+databases (SQLite in local development) get batched INSERTs. Derived data is
+then rebuilt with the services the app uses: follower counters, materialized
+timelines and latest prices. Used by ``python seed.py`` and benchmarks/dataset.py.
+"""
+import bisect
+import csv
+import io
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+DEFAULT_COUNTS = {
+    "users": 10_000,
+    "farms": 50_000,
+    "activities": 1_000_000,
+    "posts": 200_000,
+    "follows": 500_000,
+}
+DEFAULT_PASSWORD = "mbaymi-seed-password"
+# Bump whenever the generated rows or the password change: cached benchmark databases are keyed on it
+DATASET_VERSION = 2
+EPOCH = datetime(2025, 6, 1)
+
+PUBLIC_PROFILE_RATIO = 0.6
+PRICE_WEEKS = 104
+SOLD_HARVEST_RATIO = 0.7
+
+# Region -> (approximate centre, relative number of users)
+REGIONS = {
+    "Dakar": ((14.72, -17.45), 4), "Thiès": ((14.79, -16.93), 10), "Diourbel": ((14.65, -16.23), 8),
+    "Fatick": ((14.34, -16.41), 6), "Kaolack": ((14.15, -16.07), 9), "Kaffrine": ((14.10, -15.55), 7),
+    "Louga": ((15.62, -16.22), 6), "Saint-Louis": ((16.03, -16.49), 7), "Matam": ((15.66, -13.26), 4),
+    "Tambacounda": ((13.77, -13.67), 5), "Kédougou": ((12.56, -12.18), 2), "Kolda": ((12.89, -14.94), 5),
+    "Sédhiou": ((12.71, -15.56), 4), "Ziguinchor": ((12.57, -16.27), 5),
+}
+DEFAULT_REGION_CROPS = ["mil", "arachide", "niébé", "maïs", "pastèque"]
+REGION_CROPS = {
+    "Dakar": ["tomate", "oignon", "gombo", "pastèque"],
+    "Thiès": ["tomate", "oignon", "manioc", "niébé", "arachide"],
+    "Saint-Louis": ["riz", "oignon", "tomate", "maïs"],
+    "Matam": ["riz", "sorgho", "maïs", "niébé"],
+    "Ziguinchor": ["riz", "manioc", "arachide", "maïs"],
+    "Sédhiou": ["riz", "arachide", "maïs", "manioc"],
+    "Kolda": ["maïs", "riz", "arachide", "sorgho"],
+    "Kédougou": ["maïs", "sorgho", "arachide"],
+}
+# Crop -> (days to harvest, yield t/ha, base price CFA/kg, peak price month)
+CROPS = {
+    "maïs": (100, 2.5, 250, 8), "riz": (120, 4.0, 400, 9), "arachide": (110, 1.2, 500, 9),
+    "mil": (95, 0.9, 275, 8), "sorgho": (110, 1.1, 260, 8), "niébé": (75, 0.7, 600, 8),
+    "tomate": (90, 20.0, 350, 6), "oignon": (120, 18.0, 300, 7), "manioc": (300, 10.0, 150, 5),
+    "pastèque": (85, 15.0, 200, 3), "gombo": (60, 6.0, 450, 4),
+}
+UPKEEP_ACTIVITIES = ["watering", "weeding", "fertilizing", "treatment"]
+ROLES = ["farmer"] * 7 + ["livestock_breeder", "buyer", "seller"]
+OWNER_ROLES = {"farmer", "livestock_breeder"}
+SOILS = ["sandy", "loamy", "clay"]
+
+
+def scaled_counts(factor: float) -> Dict[str, int]:
+    return {name: max(1, int(count * factor)) for name, count in DEFAULT_COUNTS.items()}
+
+
+def _cumulative(weights: Iterable[float]) -> List[float]:
+    return list(itertools.accumulate(weights))
+
+
+def _pick(rng: random.Random, cum_weights: Sequence[float]) -> int:
+    """Index drawn with the given cumulative weights (rng.choices without the list overhead)."""
+    return bisect.bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+class Dataset:
+    """Row generators sharing the correlated state (owners, regions, crops, prices)."""
+
+    def __init__(self, counts: Dict[str, int], seed: int, password_hash: str):
+        self.counts = counts
+        self.rng = random.Random(seed)
+        self.password_hash = password_hash
+        self.regions = list(REGIONS)
+        self.region_cum = _cumulative(REGIONS[r][1] for r in self.regions)
+        self.user_region: List[str] = []
+        self.user_role: List[str] = []
+        self.farms: List[Tuple[int, int, str, float]] = []  # (id, owner, region, hectares)
+        self.crops: List[Tuple[int, int, str, datetime, datetime, str, float]] = []  # (id, farm, name, planted, harvest, status, yield kg)
+        self.farm_crops: Dict[int, List[int]] = {}  # farm id -> indexes in self.crops
+        self.prices: Dict[Tuple[str, str], List[float]] = {}
+        self.harvests: List[Tuple[int, int, str, str, datetime, float]] = []  # (id, owner, crop, region, date, kg)
+
+    def _at(self, days: int = 365) -> datetime:
+        return EPOCH - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    # ─── Users and farms ─────────────────────────────────────────────────────
+
+    def users(self) -> Iterator[tuple]:
+        rng = self.rng
+        for i in range(1, self.counts["users"] + 1):
+            region = self.regions[_pick(rng, self.region_cum)]
+            role = rng.choice(ROLES)
+            self.user_region.append(region)
+            self.user_role.append(role)
+            created = self._at(730)
+            yield (
+                i, f"Agriculteur {i}", f"user{i}@seed.mbaymi.sn", f"+22177{i:07d}", self.password_hash,
+                role, region, f"Village {rng.randrange(500)}", True, 0, 0, created, created,
+            )
+
+    USER_COLUMNS = ("id", "name", "email", "phone", "password_hash", "role", "region", "village",
+                    "is_active", "followers_count", "following_count", "created_at", "updated_at")
+
+    def farm_rows(self) -> Iterator[tuple]:
+        rng = self.rng
+        owners = [i + 1 for i, role in enumerate(self.user_role) if role in OWNER_ROLES] or [1]
+        # Farms per owner: power law, most farmers have one or two, a few have dozens
+        owner_cum = _cumulative(rng.paretovariate(1.6) for _ in owners)
+        for farm_id in range(1, self.counts["farms"] + 1):
+            owner = owners[_pick(rng, owner_cum)]
+            region = self.user_region[owner - 1] if rng.random() < 0.9 else self.regions[_pick(rng, self.region_cum)]
+            (lat, lon), _ = REGIONS[region]
+            hectares = round(min(200.0, rng.lognormvariate(1.0, 0.9)), 2)
+            self.farms.append((farm_id, owner, region, hectares))
+            created = self._at(730)
+            yield (
+                farm_id, owner, f"Ferme {farm_id}", f"{region}, Sénégal", hectares, rng.choice(SOILS),
+                lat + rng.uniform(-0.4, 0.4), lon + rng.uniform(-0.4, 0.4), created, created,
+            )
+
+    FARM_COLUMNS = ("id", "user_id", "name", "location", "size_hectares", "soil_type",
+                    "latitude", "longitude", "created_at", "updated_at")
+
+    def crop_rows(self) -> Iterator[tuple]:
+        rng = self.rng
+        crop_id = 0
+        for farm_id, _owner, region, hectares in self.farms:
+            candidates = REGION_CROPS.get(region, DEFAULT_REGION_CROPS)
+            count = min(len(candidates), 1 + rng.randrange(1 + min(3, int(hectares // 3))))
+            indexes = []
+            for name in rng.sample(candidates, count):
+                crop_id += 1
+                days, tonnes_per_ha, _, _ = CROPS[name]
+                planted = self._at(365)
+                harvest = planted + timedelta(days=days)
+                area = hectares / count
+                expected_kg = round(area * tonnes_per_ha * 1000, 1)
+                if rng.random() < 0.05:
+                    status = "failed"
+                else:
+                    status = "harvested" if harvest <= EPOCH else "growing"
+                indexes.append(len(self.crops))
+                self.crops.append((crop_id, farm_id, name, planted, harvest, status, expected_kg))
+                yield (
+                    crop_id, farm_id, name, planted, harvest, round(area * 30, 1), expected_kg,
+                    status, planted, planted,
+                )
+            self.farm_crops[farm_id] = indexes
+
+    CROP_COLUMNS = ("id", "farm_id", "crop_name", "planted_date", "expected_harvest_date",
+                    "quantity_planted", "expected_yield", "status", "created_at", "updated_at")
+
+    def profile_rows(self) -> Iterator[tuple]:
+        rng = self.rng
+        profile_id = 0
+        for farm_id, owner, region, _ in self.farms:
+            if rng.random() >= PUBLIC_PROFILE_RATIO:
+                continue
+            profile_id += 1
+            specialties = ",".join(sorted({self.crops[i][2] for i in self.farm_crops[farm_id]}))
+            created = self._at(365)
+            yield (
+                profile_id, farm_id, owner, True, f"Exploitation familiale à {region}",
+                specialties, 0, created, created,
+            )
+
+    PROFILE_COLUMNS = ("id", "farm_id", "user_id", "is_public", "description", "specialties",
+                       "total_followers", "created_at", "updated_at")
+
+    # ─── Activity timelines, harvests, sales ─────────────────────────────────
+
+    def activity_rows(self) -> Iterator[tuple]:
+        rng = self.rng
+        total = self.counts["activities"]
+        per_crop, extra = divmod(total, len(self.crops))
+        activity_id = 0
+        for index, (crop_id, farm_id, _name, planted, harvest, status, _kg) in enumerate(self.crops):
+            quota = per_crop + (1 if index < extra else 0)
+            if not quota:
+                continue
+            owner = self.farms[farm_id - 1][1]
+            end = min(harvest, EPOCH)
+            harvested = status == "harvested" and quota >= 3
+            steps = [("labour", planted - timedelta(days=rng.randint(3, 14)))]
+            if quota >= 2:
+                steps.append(("sowing", planted))
+            upkeep = quota - len(steps) - (1 if harvested else 0)
+            span = max((end - planted).total_seconds(), 86400)
+            for k in range(upkeep):
+                offset = span * (k + rng.random()) / upkeep
+                steps.append((rng.choice(UPKEEP_ACTIVITIES), planted + timedelta(seconds=offset)))
+            if harvested:
+                steps.append(("harvest", harvest))
+            for activity_type, when in steps[:quota]:
+                activity_id += 1
+                yield (activity_id, farm_id, crop_id, owner, activity_type, when, None, when, when)
+
+    ACTIVITY_COLUMNS = ("id", "farm_id", "crop_id", "user_id", "activity_type", "activity_date",
+                        "notes", "created_at", "updated_at")
+
+    def harvest_rows(self) -> Iterator[tuple]:
+        rng = self.rng
+        harvest_id = 0
+        for crop_id, farm_id, name, _planted, harvest, status, expected_kg in self.crops:
+            if status != "harvested":
+                continue
+            harvest_id += 1
+            _, owner, region, _ = self.farms[farm_id - 1]
+            actual = round(expected_kg * rng.uniform(0.6, 1.1), 1)
+            self.harvests.append((harvest_id, owner, name, region, harvest, actual))
+            yield (harvest_id, farm_id, crop_id, expected_kg, actual, harvest, None, harvest)
+
+    HARVEST_COLUMNS = ("id", "farm_id", "crop_id", "estimated_quantity", "actual_quantity",
+                       "harvest_date", "notes", "created_at")
+
+    def _price_at(self, product: str, region: str, when: datetime) -> float:
+        history = self.prices[(product, region)]
+        weeks_ago = int((EPOCH - when).days // 7)
+        return history[min(max(PRICE_WEEKS - 1 - weeks_ago, 0), PRICE_WEEKS - 1)]
+
+    def sale_rows(self) -> Iterator[tuple]:
+        """Part of each harvest sold within weeks, at the regional market price of the week."""
+        rng = self.rng
+        sale_id = 0
+        for harvest_id, owner, name, region, harvest_date, kg in self.harvests:
+            if rng.random() >= SOLD_HARVEST_RATIO or kg <= 0:
+                continue
+            remaining = kg * rng.uniform(0.4, 0.9)
+            for _ in range(rng.randint(1, 3)):
+                sold_at = harvest_date + timedelta(days=rng.randint(1, 45))
+                if sold_at > EPOCH or remaining < 1:
+                    break
+                quantity = round(remaining * rng.uniform(0.3, 1.0), 1)
+                remaining -= quantity
+                sale_id += 1
+                price = round(self._price_at(name, region, sold_at) * rng.uniform(0.9, 1.1), 1)
+                yield (sale_id, harvest_id, name, quantity, price, "CFA", region, None, owner, sold_at)
+
+    SALE_COLUMNS = ("id", "harvest_id", "product_name", "quantity", "price_per_unit", "currency",
+                    "delivery_location", "contact", "user_id", "created_at")
+
+    # ─── Network ─────────────────────────────────────────────────────────────
+
+    def post_rows(self) -> Iterator[tuple]:
+        """Farms with more crops and more active owners post more."""
+        rng = self.rng
+        owner_activity = [rng.paretovariate(2.0) for _ in self.user_role]
+        farm_cum = _cumulative(len(self.farm_crops[f[0]]) * owner_activity[f[1] - 1] for f in self.farms)
+        for post_id in range(1, self.counts["posts"] + 1):
+            farm_id, owner, _, _ = self.farms[_pick(rng, farm_cum)]
+            crop_id, _, name, planted, _harvest, status, _ = self.crops[rng.choice(self.farm_crops[farm_id])]
+            if status == "harvested":
+                post_type, title = "harvest_result", f"Récolte de {name}"
+            elif status == "failed":
+                post_type, title = "problem_report", f"Problème sur la parcelle de {name}"
+            else:
+                post_type, title = rng.choice([("crop_update", f"Nouvelles du {name}"), ("tip", f"Astuce : {name}")])
+            created = planted + timedelta(seconds=rng.randrange(max(int((EPOCH - planted).total_seconds()), 1)))
+            yield (post_id, farm_id, owner, crop_id, title, "Point sur la parcelle cette semaine",
+                   None, post_type, created, created)
+
+    POST_COLUMNS = ("id", "farm_id", "user_id", "crop_id", "title", "description", "photo_url",
+                    "post_type", "created_at", "updated_at")
+
+    def follow_rows(self) -> Iterator[tuple]:
+        """Unique edges; in-degree follows a power law (preferential attachment on popularity)."""
+        rng = self.rng
+        n_users = len(self.user_role)
+        target = min(self.counts["follows"], n_users * (n_users - 1) // 2)
+        popularity = _cumulative(rng.paretovariate(1.2) for _ in range(n_users))
+        activity = _cumulative(rng.paretovariate(2.0) for _ in range(n_users))
+        seen = set()
+        edge_id = 0
+        while edge_id < target:
+            follower = _pick(rng, activity) + 1
+            followed = _pick(rng, popularity) + 1
+            if follower == followed or (follower, followed) in seen:
+                continue
+            seen.add((follower, followed))
+            edge_id += 1
+            yield (edge_id, follower, followed, self._at(365))
+
+    FOLLOW_COLUMNS = ("id", "follower_id", "following_id", "created_at")
+
+    # ─── Market ──────────────────────────────────────────────────────────────
+
+    def price_rows(self) -> Iterator[tuple]:
+        """Weekly prices: regional level, seasonal peak before harvest, small random walk."""
+        rng = self.rng
+        price_id = 0
+        for product, (_, _, base, peak_month) in CROPS.items():
+            for region in self.regions:
+                level = base * rng.uniform(0.85, 1.15)
+                history = []
+                for week in range(PRICE_WEEKS):
+                    when = EPOCH - timedelta(weeks=PRICE_WEEKS - 1 - week)
+                    level *= rng.uniform(0.97, 1.035)
+                    season = 1 + 0.15 * math.cos(2 * math.pi * (when.month - peak_month) / 12)
+                    price = round(max(50.0, level * season), 1)
+                    history.append(price)
+                    price_id += 1
+                    yield (price_id, product, region, price, "CFA", when, "market_data", when)
+                self.prices[(product, region)] = history
+
+    PRICE_COLUMNS = ("id", "product_name", "region", "price_per_kg", "currency", "price_date",
+                     "source", "created_at")
+
+
+# ─── Writers ─────────────────────────────────────────────────────────────────
+
+def _copy_rows(engine, table: str, columns: Sequence[str], rows: Iterator[tuple], batch_size: int) -> int:
+    """COPY ... FROM STDIN (CSV), one in-memory batch at a time, one transaction per table."""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    raw = engine.raw_connection()
+    total = 0
+    try:
+        cursor = raw.cursor()
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            buffer = io.StringIO()
+            # None -> empty unquoted field, read back as NULL by COPY csv
+            csv.writer(buffer).writerows(batch)
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+            else:  # psycopg 3 (the default driver of a bare postgresql:// URL on SQLAlchemy 2.1)
+                with cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+            total += len(batch)
+        raw.commit()
+        return total
+    except Exception:
+        raw.rollback()
+        raise
+    finally:
+        raw.close()
+
+
+def _insert_rows(engine, table: str, columns: Sequence[str], rows: Iterator[tuple], batch_size: int) -> int:
+    from app.models.base import Base
+
+    statement = Base.metadata.tables[table].insert()
+    total = 0
+    with engine.begin() as conn:
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return total
+            conn.execute(statement, [dict(zip(columns, row)) for row in batch])
+            total += len(batch)
+
+
+def _reset_sequences(engine, tables: Sequence[str]) -> None:
+    """Explicit ids bypass the Postgres sequences: move them past the seeded rows."""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in tables:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            ))
+
+
+def is_empty(engine) -> bool:
+    from app.models import User
+
+    with engine.connect() as conn:
+        return not conn.execute(select(func.count()).select_from(User.__table__)).scalar()
+
+
+def seed(engine, counts: Dict[str, int] = None, seed: int = 42, batch_size: int = 50_000,
+         password: str = DEFAULT_PASSWORD, log: Callable[[str], None] = print) -> Dict[str, int]:
+    """Fill an empty, migrated database. Every user's password is `password`. Returns rows per table."""
+    from app.services import follow_service, market_service, password_service, timeline_service
+
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    password_hash = password_service.make_context(password_service.argon2_params()).hash(password)
+    data = Dataset(counts, seed, password_hash)
+    write = _copy_rows if engine.dialect.name == "postgresql" else _insert_rows
+
+    # Order matters: foreign keys, and later generators read what earlier ones recorded
+    steps = [
+        ("users", data.USER_COLUMNS, data.users()),
+        ("market_prices", data.PRICE_COLUMNS, data.price_rows()),
+        ("farms", data.FARM_COLUMNS, data.farm_rows()),
+        ("crops", data.CROP_COLUMNS, data.crop_rows()),
+        ("farm_profiles", data.PROFILE_COLUMNS, data.profile_rows()),
+        ("activities", data.ACTIVITY_COLUMNS, data.activity_rows()),
+        ("harvests", data.HARVEST_COLUMNS, data.harvest_rows()),
+        ("sales", data.SALE_COLUMNS, data.sale_rows()),
+        ("farm_posts", data.POST_COLUMNS, data.post_rows()),
+        ("user_following", data.FOLLOW_COLUMNS, data.follow_rows()),
+    ]
+    written = {}
+    for table, columns, rows in steps:
+        start = time.perf_counter()
+        written[table] = write(engine, table, columns, rows, batch_size)
+        elapsed = time.perf_counter() - start
+        log(f"   {table:<16} {written[table]:>10} rows  {elapsed:6.1f} s  ({written[table] / max(elapsed, 1e-9):,.0f} rows/s)")
+    _reset_sequences(engine, [table for table, _, _ in steps])
+
+    start = time.perf_counter()
+    with Session(engine) as db:
+        follow_service.reconcile_follow_counts(db)
+        timeline_service.rebuild_timelines(db)
+        market_service.rebuild_latest_prices(db)
+        db.commit()
+    if engine.dialect.name == "postgresql":
+        # Fresh statistics for the planner (and the reltuples estimates shown in /metrics)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    log(f"   derived data (follower counters, timelines, latest prices)  {time.perf_counter() - start:6.1f} s")
+    return written
@@ -1,187 +1,179 @@
-from typing import Optional
+"""
+Conseils automatiques pour l'agriculture et l'élevage (sans IA, règles prédéfinies).
+
+Les fiches sont dans app/data/advice/*.json : une entrée par culture ou espèce,
+avec ses noms en français, wolof et anglais ("names"). Elles sont chargées une
+seule fois (instance `advice_service`) dans un index :
+  - dictionnaire nom normalisé -> fiche (minuscules, sans accents : "mais" == "maïs") ;
+  - index de trigrammes pour les fautes de frappe ("tomatte", "chevres").
+La fiche trouvée est mise en cache par sujet normalisé (chaque réponse est une copie).
+"""
+import json
+import os
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+from app.services.search_service import normalize_query
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "advice")
+
+# Similarité trigramme minimale pour accepter un nom approché (pg_trgm utilise 0.3)
+FUZZY_THRESHOLD = 0.45
+# Au-delà de ce nombre de mots, seuls les groupes de mots plus courts sont essayés
+MAX_NGRAM_WORDS = 3
+# Seuls les premiers mots d'une demande sont comparés aux noms (coût borné par requête)
+MAX_TOPIC_WORDS = 20
+
+GENERIC_CROP_TIPS = [
+    "Préparez bien votre sol avant la plantation",
+    "Assurez-vous une irrigation régulière",
+    "Utilisez un engrais adapté à votre sol",
+    "Nettoyez régulièrement vos champs",
+    "Consultez les données météorologiques locales",
+]
+
+GENERIC_LIVESTOCK_TIPS = [
+    "Fournissez un abri adéquat et propre",
+    "Assurez un accès constant à l'eau propre",
+    "Alimentez avec une nutrition équilibrée",
+    "Vaccinez régulièrement",
+    "Nettoyez et entretenez les enclos",
+]
+
+
+def normalize(text: str) -> str:
+    """Minuscules, sans accents ni ponctuation ("Bœuf !" -> "boeuf")."""
+    text = text.replace("œ", "oe").replace("Œ", "oe").replace("æ", "ae").replace("Æ", "ae")
+    text = "".join(c if c.isalnum() else " " for c in normalize_query(text))
+    return " ".join(text.split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrammes à la manière de pg_trgm : chaque mot est entouré d'espaces."""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class AdviceIndex:
+    """Fiches d'un domaine (cultures ou élevage) indexées par nom normalisé et par trigramme."""
+
+    def __init__(self, entries: Dict[str, dict]):
+        self.entries = entries
+        self.by_name: Dict[str, str] = {}
+        self.name_trigrams: List[Tuple[str, Set[str]]] = []  # (nom normalisé, trigrammes)
+        self.by_trigram: Dict[str, List[int]] = defaultdict(list)
+        for key, entry in entries.items():
+            for name in [key, *entry.get("names", [])]:
+                norm = normalize(name)
+                if not norm or norm in self.by_name:
+                    continue
+                self.by_name[norm] = key
+                grams = trigrams(norm)
+                for gram in grams:
+                    self.by_trigram[gram].append(len(self.name_trigrams))
+                self.name_trigrams.append((norm, grams))
+
+    @classmethod
+    def from_file(cls, filename: str) -> "AdviceIndex":
+        with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _fuzzy(self, text: str) -> Tuple[float, Optional[str]]:
+        grams = trigrams(text)
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for idx in self.by_trigram.get(gram, ()):
+                shared[idx] += 1
+        best, best_name = 0.0, None
+        for idx, count in shared.items():
+            name, name_grams = self.name_trigrams[idx]
+            score = count / (len(grams) + len(name_grams) - count)
+            if score > best:
+                best, best_name = score, name
+        return best, best_name
+
+    def find(self, topic: str) -> Optional[str]:
+        """Clé de la fiche correspondant à `topic` (déjà normalisé), ou None."""
+        if topic in self.by_name:
+            return self.by_name[topic]
+        words = topic.split()[:MAX_TOPIC_WORDS]
+        # Nom contenu dans la demande ("culture du mais" -> maïs) : groupes de mots, les plus longs d'abord
+        ngrams = [
+            " ".join(words[i:i + n])
+            for n in range(min(len(words), MAX_NGRAM_WORDS), 0, -1)
+            for i in range(len(words) - n + 1)
+        ]
+        for gram in ngrams:
+            if gram in self.by_name:
+                return self.by_name[gram]
+        # Fautes de frappe : meilleure similarité trigramme (mots d'au moins 3 lettres)
+        best, best_name = 0.0, None
+        for gram in ngrams:
+            if len(gram) < 3:
+                continue
+            score, name = self._fuzzy(gram)
+            if score > best:
+                best, best_name = score, name
+        return self.by_name[best_name] if best >= FUZZY_THRESHOLD else None
+
 
 class AdviceService:
     """
     Service pour générer des conseils automatiques pour l'agriculture et l'élevage
     sans IA - basé sur des règles prédéfinies
     """
-    
-    CROP_ADVICE = {
-        "maïs": {
-            "title": "Guide de culture du maïs",
-            "advice": "Le maïs nécessite un sol riche en nutriments et une bonne irrigation. Plantez en saison des pluies pour un meilleur rendement.",
-            "tips": [
-                "Préparez le sol 2-3 semaines avant de planter",
-                "Espacez les plants de 25-30cm",
-                "Arrosez régulièrement, surtout pendant la floraison",
-                "Appliquez un engrais NPK riche en azote",
-                "Récoltez 3-4 mois après la plantation"
-            ],
-            "warnings": ["Attention aux ravageurs: moucherons du maïs", "Assurez-vous d'une bonne drainage"]
-        },
-        "riz": {
-            "title": "Guide de culture du riz",
-            "advice": "Le riz a besoin d'une submersion régulière. Un pH du sol entre 6 et 7 est optimal.",
-            "tips": [
-                "Préparez les lits de semis longtemps à l'avance",
-                "Maintenez 5-10cm d'eau sur le champ pendant la croissance",
-                "Appliquez de l'engrais composé tous les 15 jours",
-                "Luttez contre les mauvaises herbes régulièrement",
-                "Récoltez quand 80-90% des grains sont matures"
-            ],
-            "warnings": ["Prévenez la pourriture des tiges", "Contrôlez les criquets"]
-        },
-        "arachide": {
-            "title": "Guide de culture de l'arachide",
-            "advice": "L'arachide préfère un sol sableux. Elle a besoin de 120-150 jours pour arriver à maturité.",
-            "tips": [
-                "Semez après les premières pluies",
-                "Espacez les plants de 15-20cm",
-                "Le sol doit rester humide mais pas inondé",
-                "Appliquez du calcium (chaux) pour éviter la carence",
-                "Arrachez quand les feuilles commencent à jaunir"
-            ],
-            "warnings": ["Attention à l'aflatoxine en stockage", "Prévenez le pourrissement des gousses"]
-        },
-        "millet": {
-            "title": "Guide de culture du millet",
-            "advice": "Le millet est très résistant à la sécheresse. C'est une culture idéale pour les régions arides.",
-            "tips": [
-                "Semez en début de saison des pluies",
-                "Nécessite peu d'engrais",
-                "Espacez les plants de 20-25cm",
-                "Arrosez modérément",
-                "Récoltez 60-90 jours après la plantation"
-            ],
-            "warnings": ["Attention aux oiseaux pendant la maturation", "Traitez les pucerons si nécessaire"]
-        },
-        "tomate": {
-            "title": "Guide de culture de la tomate",
-            "advice": "La tomate a besoin de soleil et de beaucoup d'eau. Un sol riche en matière organique est important.",
-            "tips": [
-                "Plantez en début de saison chaude",
-                "Tuteurez les plants pour éviter qu'ils ne se cassent",
-                "Arrosez profondément 2-3 fois par semaine",
-                "Appliquez un engrais riche en phosphore et potassium",
-                "Récoltez 60-80 jours après la plantation"
-            ],
-            "warnings": ["Attention au mildiou par temps humide", "Éliminez les feuilles malades"]
-        }
-    }
-    
-    LIVESTOCK_ADVICE = {
-        "cattle": {
-            "title": "Guide d'élevage du bétail",
-            "advice": "Le bétail a besoin d'un accès régulier à l'eau et à une alimentation équilibrée. La vaccination régulière est essentielle.",
-            "tips": [
-                "Fournissez de l'eau propre au moins 2 fois par jour",
-                "Alimentez avec du foin de qualité ou des pâturages verts",
-                "Vaccinez contre les maladies courantes (fièvre aphteuse, charbon)",
-                "Effectuez un contrôle vétérinaire mensuel",
-                "Maintenez une bonne hygiène des enclos"
-            ],
-            "warnings": ["Attention à la fièvre aphteuse", "Prévenez les parasites externes"]
-        },
-        "goat": {
-            "title": "Guide d'élevage des chèvres",
-            "advice": "Les chèvres sont des animaux robustes mais ont besoin d'un abri adéquat et d'une alimentation diversifiée.",
-            "tips": [
-                "Fournissez un abri ventilé et sec",
-                "Alimentez avec du foin, des grains et des pâturages",
-                "Vaccinez contre la fièvre Q et autres maladies",
-                "Trayez 2 fois par jour (femelles laitières)",
-                "Examinez régulièrement les sabots et les cornes"
-            ],
-            "warnings": ["Attention à la gale", "Prévenez les entérocolites"]
-        },
-        "sheep": {
-            "title": "Guide d'élevage des moutons",
-            "advice": "Les moutons ont besoin de pâturages de qualité et d'un abri protégé. La tonte doit être régulière.",
-            "tips": [
-                "Assurez une alimentation riche en fibres",
-                "Tondez une fois par an, généralement au printemps",
-                "Vaccinez contre les maladies communes",
-                "Fournissez un accès à l'eau propre à volonté",
-                "Contrôlez les parasites internes 2-3 fois par an"
-            ],
-            "warnings": ["Attention à la gale sarcoptique", "Prévenez la pourriture des sabots"]
-        },
-        "poultry": {
-            "title": "Guide d'élevage de la volaille",
-            "advice": "La volaille a besoin de chaleur, d'eau et d'une alimentation équilibrée. L'hygiène est cruciale.",
-            "tips": [
-                "Maintenez la température à 35°C pour les poussins",
-                "Fournissez une eau propre à volonté",
-                "Alimentez avec un aliment équilibré (protéines 16-20%)",
-                "Nettoyez le poulailler régulièrement",
-                "Vaccinez contre Newcastle et les autres maladies"
-            ],
-            "warnings": ["Attention aux maladies respiratoires", "Prévenez la coccidiose"]
-        },
-        "pig": {
-            "title": "Guide d'élevage des porcs",
-            "advice": "Les porcs ont besoin d'un bon abri, d'eau propre et d'une alimentation riche en protéines.",
-            "tips": [
-                "Construisez une porcherie bien ventilée",
-                "Fournissez de l'eau fraîche constamment",
-                "Alimentez avec des aliments riches en protéines et minéraux",
-                "Vaccinez contre la peste porcine africaine",
-                "Maintenez un bon système de drainage"
-            ],
-            "warnings": ["Attention à la peste porcine africaine", "Prévenez les infections parasitaires"]
+
+    def __init__(self, crops_file: str = "crops.json", livestock_file: str = "livestock.json"):
+        self.crops = AdviceIndex.from_file(crops_file)
+        self.livestock = AdviceIndex.from_file(livestock_file)
+
+    @staticmethod
+    def _response(entry: dict) -> dict:
+        # Nouveau dict et nouvelles listes à chaque appel : la fiche indexée ne peut pas être modifiée
+        return {
+            "title": entry["title"],
+            "advice": entry["advice"],
+            "tips": list(entry["tips"]),
+            "warnings": list(entry.get("warnings", [])),
         }
-    }
-    
+
+    @lru_cache(maxsize=4096)
+    def _lookup(self, kind: str, topic: str) -> Optional[str]:
+        """Clé de la fiche pour un sujet normalisé (None si aucune fiche) ; mise en cache."""
+        index = self.crops if kind == "crop" else self.livestock
+        return index.find(topic)
+
     def get_crop_advice(self, crop_name: str, region: Optional[str] = None) -> dict:
         """Obtenir des conseils pour une culture spécifique"""
-        crop_lower = crop_name.lower()
-        
-        for crop_key, advice in self.CROP_ADVICE.items():
-            if crop_key in crop_lower or crop_lower in crop_key:
-                return {
-                    "title": advice["title"],
-                    "advice": advice["advice"],
-                    "tips": advice["tips"],
-                    "warnings": advice.get("warnings", [])
-                }
-        
+        key = self._lookup("crop", normalize(crop_name))
+        if key:
+            return self._response(self.crops.entries[key])
+
         # Si la culture n'existe pas, retourner un conseil générique
         return {
             "title": f"Conseils pour {crop_name}",
             "advice": f"Nous n'avons pas de guide spécifique pour {crop_name}. Consultez un agent agricole local pour des conseils détaillés.",
-            "tips": [
-                "Préparez bien votre sol avant la plantation",
-                "Assurez-vous une irrigation régulière",
-                "Utilisez un engrais adapté à votre sol",
-                "Nettoyez régulièrement vos champs",
-                "Consultez les données météorologiques locales"
-            ],
+            "tips": GENERIC_CROP_TIPS,
             "warnings": None
         }
-    
+
     def get_livestock_advice(self, animal_type: str, region: Optional[str] = None) -> dict:
         """Obtenir des conseils pour un type d'animal spécifique"""
-        animal_lower = animal_type.lower()
-        
-        for animal_key, advice in self.LIVESTOCK_ADVICE.items():
-            if animal_key in animal_lower or animal_lower in animal_key:
-                return {
-                    "title": advice["title"],
-                    "advice": advice["advice"],
-                    "tips": advice["tips"],
-                    "warnings": advice.get("warnings", [])
-                }
-        
+        key = self._lookup("livestock", normalize(animal_type))
+        if key:
+            return self._response(self.livestock.entries[key])
+
         # Si l'animal n'existe pas, retourner un conseil générique
         return {
             "title": f"Conseils pour l'élevage de {animal_type}",
             "advice": f"Nous n'avons pas de guide spécifique pour {animal_type}. Consultez un vétérinaire local pour des conseils détaillés.",
-            "tips": [
-                "Fournissez un abri adéquat et propre",
-                "Assurez un accès constant à l'eau propre",
-                "Alimentez avec une nutrition équilibrée",
-                "Vaccinez régulièrement",
-                "Nettoyez et entretenez les enclos"
-            ],
+            "tips": GENERIC_LIVESTOCK_TIPS,
             "warnings": None
         }
+
+
+# Instance unique : fiches chargées et indexées une fois par worker
+advice_service = AdviceService()
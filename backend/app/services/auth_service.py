@@ -0,0 +1,146 @@
+"""
+Authentification par jeton Bearer (JWT d'accès émis par /api/auth/login).
+
+Les routes déclarent `current_user_id: int = Depends(get_current_user_id)` au
+lieu de recevoir un `user_id` en paramètre. Sans base de données :
+  - le jeton est décodé une fois, puis ses claims sont gardés dans un LRU
+    (clé : hash du jeton) jusqu'à son expiration ;
+  - la révocation (déconnexion) est vérifiée dans un ensemble en mémoire de
+    `jti` révoqués, relu depuis la table revoked_tokens toutes les
+    AUTH_REVOCATION_SYNC_INTERVAL secondes (les autres workers), et mis à jour
+    tout de suite par le worker qui révoque.
+"""
+import asyncio
+import calendar
+import hashlib
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import RevokedToken
+from app.services import jwt_service
+from app.services.cache_service import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+_bearer = HTTPBearer(auto_error=False)
+
+# Claims des jetons déjà vérifiés ; le TTL est la durée de vie max d'un jeton d'accès
+token_cache = LRUTTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=jwt_service.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+# jti révoqué -> expiration (timestamp) ; inutile de le garder au-delà
+_revoked: Dict[str, float] = {}
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Claims {"user_id", "jti", "exp"} d'un jeton d'accès valide, sinon None."""
+    key = _token_key(token)
+    claims = token_cache.get(key)
+    if claims is None:
+        payload = jwt_service.decode_token(token)
+        if not payload or payload.get("type") != "access" or "user_id" not in payload:
+            return None
+        claims = {"user_id": int(payload["user_id"]), "jti": payload.get("jti"), "exp": payload["exp"]}
+        token_cache.set(key, claims)
+    if claims["exp"] <= time.time() or is_revoked(claims["jti"]):
+        return None
+    return claims
+
+
+async def get_current_claims(credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)) -> dict:
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    claims = decode_access_token(credentials.credentials)
+    if claims is None:
+        raise HTTPException(
+            status_code=401, detail="Invalid or expired token", headers={"WWW-Authenticate": "Bearer"}
+        )
+    return claims
+
+
+async def get_current_user_id(claims: dict = Depends(get_current_claims)) -> int:
+    """Dépendance FastAPI : id de l'utilisateur authentifié (401 sinon)."""
+    return claims["user_id"]
+
+
+def ensure_self(user_id: int, current_user_id: int) -> None:
+    """Route /users/{user_id}/... : seul l'utilisateur lui-même y a accès."""
+    if user_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Accès refusé")
+
+
+def ensure_owner(owner_id: Optional[int], current_user_id: int) -> None:
+    """La ressource (ferme...) doit appartenir à l'utilisateur authentifié."""
+    if owner_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Accès refusé")
+
+
+# ─── Révocation ──────────────────────────────────────────────────────────────
+
+def is_revoked(jti: Optional[str]) -> bool:
+    return jti is not None and jti in _revoked
+
+
+def revoke(db: Session, jti: Optional[str], user_id: Optional[int], exp: float) -> None:
+    """Révoquer un jeton jusqu'à son expiration. Ne commit pas."""
+    if not jti or exp <= time.time():
+        return
+    db.merge(RevokedToken(jti=jti, user_id=user_id, expires_at=datetime.utcfromtimestamp(exp)))
+    _revoked[jti] = exp
+
+
+def load_revocations(db: Session) -> int:
+    """Fusionner les révocations encore actives de la base ; oublier celles expirées."""
+    global _revoked
+    now = time.time()
+    rows = db.query(RevokedToken.jti, RevokedToken.expires_at).filter(
+        RevokedToken.expires_at > datetime.utcfromtimestamp(now)
+    ).all()
+    merged = dict(_revoked)
+    merged.update((jti, calendar.timegm(expires_at.timetuple())) for jti, expires_at in rows)
+    # Réaffectation atomique : les lectures concurrentes voient l'ancien ou le nouveau dict
+    _revoked = {jti: exp for jti, exp in merged.items() if exp > now}
+    return len(_revoked)
+
+
+def run_revocation_sync() -> int:
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        count = load_revocations(db)
+        # Les lignes expirées ne servent plus
+        db.query(RevokedToken).filter(RevokedToken.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+        db.commit()
+        return count
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def revocation_sync_loop(interval: int = None) -> None:
+    """Tâche de fond : relit la liste des jetons révoqués (au démarrage, puis toutes les `interval` s)."""
+    interval = interval or settings.AUTH_REVOCATION_SYNC_INTERVAL
+    while True:
+        try:
+            await asyncio.to_thread(run_revocation_sync)
+        except Exception as e:
+            logger.warning("⚠️ Revoked tokens sync failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+def stats() -> dict:
+    return {**token_cache.stats(), "revoked": len(_revoked)}
@@ -0,0 +1,93 @@
+"""
+Création en lot (synchronisation hors-ligne des agents de terrain).
+
+Un lot est validé en une requête IN (...) par clé étrangère, puis les lignes
+valides sont insérées par un INSERT multi-lignes ... RETURNING (insertmanyvalues
+de SQLAlchemy) dans une seule transaction. Chaque élément reçoit son propre
+résultat : créé (avec son id) ou rejeté (avec la raison), dans l'ordre d'envoi.
+"""
+from typing import Dict, List, Sequence, Tuple, Type
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.models.base import Base
+from app.models import FarmDeletionJob
+from app.models.farm import Crop
+from app.services import farm_deletion_service
+
+MAX_BATCH_ITEMS = 500
+
+
+def check_batch_size(items: Sequence) -> None:
+    if not items:
+        raise HTTPException(status_code=400, detail="Empty batch")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {MAX_BATCH_ITEMS} items)")
+
+
+def find_missing_refs(db: Session, items: Sequence, refs: Dict[str, Type[Base]]) -> Dict[int, str]:
+    """
+    Vérifier les clés étrangères de tout le lot : une requête par référence.
+    `refs` : champ -> modèle référencé, ex. {"farm_id": Farm}. Retourne {index: erreur}.
+    """
+    errors: Dict[int, str] = {}
+    for field, model in refs.items():
+        wanted = {getattr(item, field) for item in items} - {None}
+        if not wanted:
+            continue
+        found = set(db.scalars(select(model.id).where(model.id.in_(wanted))))
+        for index, item in enumerate(items):
+            value = getattr(item, field)
+            if index not in errors and value is not None and value not in found:
+                errors[index] = f"{model.__name__} {value} not found"
+    return errors
+
+
+def find_foreign_crops(db: Session, items: Sequence, errors: Dict[int, str]) -> Dict[int, str]:
+    """
+    Rejeter les éléments dont la culture (crop_id) appartient à une autre ferme que farm_id.
+    Une seule requête pour tout le lot ; complète et retourne `errors`.
+    """
+    wanted = {item.crop_id for index, item in enumerate(items) if index not in errors and item.crop_id is not None}
+    if not wanted:
+        return errors
+    crop_farms = dict(db.execute(select(Crop.id, Crop.farm_id).where(Crop.id.in_(wanted))).all())
+    for index, item in enumerate(items):
+        if index not in errors and item.crop_id is not None and crop_farms.get(item.crop_id) != item.farm_id:
+            errors[index] = f"Crop {item.crop_id} does not belong to farm {item.farm_id}"
+    return errors
+
+
+def find_deleting_farms(db: Session, items: Sequence, errors: Dict[int, str]) -> Dict[int, str]:
+    """Rejeter les éléments d'une ferme en cours de suppression. Complète et retourne `errors`."""
+    wanted = {item.farm_id for index, item in enumerate(items) if index not in errors}
+    if not wanted:
+        return errors
+    deleting = set(db.scalars(farm_deletion_service.active_farm_ids().where(
+        FarmDeletionJob.farm_id.in_(wanted)
+    )))
+    for index, item in enumerate(items):
+        if index not in errors and item.farm_id in deleting:
+            errors[index] = f"Farm {item.farm_id} is being deleted"
+    return errors
+
+
+def insert_returning(db: Session, model: Type[Base], rows: List[dict]) -> List[Tuple]:
+    """INSERT multi-lignes ... RETURNING id, created_at ; résultats dans l'ordre de `rows`. Ne commit pas."""
+    if not rows:
+        return []
+    stmt = insert(model).returning(model.id, model.created_at, sort_by_parameter_order=True)
+    return db.execute(stmt, rows).all()
+
+
+def build_results(count: int, errors: Dict[int, str], created: List[Tuple]) -> dict:
+    """Assembler la réponse : un résultat par élément, dans l'ordre d'envoi."""
+    created_iter = iter(created)
+    results = []
+    for index in range(count):
+        if index in errors:
+            results.append({"index": index, "status": "error", "detail": errors[index]})
+        else:
+            row = next(created_iter)
+            results.append({"index": index, "status": "created", "id": row.id, "created_at": row.created_at})
+    return {"created": len(created), "failed": len(errors), "results": results}
@@ -0,0 +1,83 @@
+"""
+Cache mémoire borné (LRU + TTL) pour les réponses agrégées coûteuses.
+
+Un cache par worker. Chaque entrée porte la version de la ressource
+(resource_versions, voir etag_service) au moment où elle a été construite :
+une entrée dont la version ne correspond plus est ignorée, donc une écriture
+faite par un autre worker invalide aussi ce cache. Le worker qui écrit
+supprime en plus l'entrée tout de suite (invalidate).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from app.config import settings
+
+
+class LRUTTLCache:
+    """LRU borné à `maxsize` entrées, chacune valable `ttl` secondes. Thread-safe."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, version, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # sorties LRU (cache plein)
+        self.expirations = 0  # TTL dépassé ou version obsolète
+        self.invalidations = 0
+
+    def get(self, key: Hashable, version: Any = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, entry_version, value = entry
+            if expires_at <= time.monotonic() or entry_version != version:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, version: Any = None) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Réponse de GET /api/farm-network/details/{farm_id}, par farm_id
+farm_details_cache = LRUTTLCache(settings.FARM_DETAILS_CACHE_SIZE, settings.FARM_DETAILS_CACHE_TTL)
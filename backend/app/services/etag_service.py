@@ -0,0 +1,125 @@
+"""
+Réponses conditionnelles (ETag / If-None-Match) pilotées par les écritures.
+
+Chaque ressource cacheable a une clé ("farm:12", "user_farms:3", "market_prices")
+dont la version vit dans resource_versions. Les endpoints de lecture calculent
+l'ETag à partir de ces versions (une lecture par clé primaire) et répondent 304
+sans reconstruire la réponse si le client l'a déjà.
+Les endpoints d'écriture appellent touch_farm / touch_user avant leur commit ;
+ces fonctions vident aussi les entrées du cache mémoire des fermes concernées.
+
+Les listes de fermes publiques (découverte, à proximité) n'ont pas de compteur :
+une clé unique serait verrouillée par chaque écriture sur n'importe quelle ferme
+et invaliderait tous les clients à chaque fois. Leur ETag dérive des lignes de la
+page elle-même (ids et updated_at, voir rows_etag).
+"""
+import hashlib
+from typing import Iterable, Optional
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models import Farm, ResourceVersion
+from app.services.cache_service import farm_details_cache
+
+MARKET_PRICES = "market_prices"
+
+
+def farm_key(farm_id: int) -> str:
+    return f"farm:{farm_id}"
+
+
+def user_farms_key(user_id: int) -> str:
+    return f"user_farms:{user_id}"
+
+
+# ─── Écriture ────────────────────────────────────────────────────────────────
+
+def bump(db: Session, *keys: str) -> None:
+    """Incrémenter la version des clés (upsert). Ne commit pas : suit la transaction de l'écriture."""
+    keys = sorted(set(keys))  # Ordre stable : évite les interblocages entre écritures concurrentes
+    if not keys:
+        return
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(ResourceVersion).values([{"key": k, "version": 1} for k in keys])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.key],
+        set_={"version": ResourceVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
+
+
+def touch_farm(db: Session, farm_id: int, user_id: Optional[int] = None) -> None:
+    """Une ferme (profil, cultures, photos...) a changé. `user_id` : propriétaire, relu si absent."""
+    if user_id is None:
+        user_id = db.query(Farm.user_id).filter(Farm.id == farm_id).scalar()
+    keys = [farm_key(farm_id)]
+    if user_id is not None:
+        keys.append(user_farms_key(user_id))
+    bump(db, *keys)
+    farm_details_cache.invalidate(farm_id)
+
+
+def touch_user(db: Session, user_id: int) -> None:
+    """Des données affichées sur toutes les fermes d'un utilisateur ont changé (nom, abonnés...)."""
+    farm_ids = [fid for (fid,) in db.query(Farm.id).filter(Farm.user_id == user_id).all()]
+    bump(db, user_farms_key(user_id), *(farm_key(fid) for fid in farm_ids))
+    for fid in farm_ids:
+        farm_details_cache.invalidate(fid)
+
+
+# ─── Lecture ─────────────────────────────────────────────────────────────────
+
+def _etag(raw: str, request: Request) -> str:
+    # Chemin et query string font partie de l'ETag : chaque ressource / page / filtre a le sien
+    raw += f"|{request.url.path}?{request.url.query}"
+    return 'W/"' + hashlib.blake2b(raw.encode(), digest_size=12).hexdigest() + '"'
+
+
+def make_etag(versions: dict, keys: Iterable[str], request: Request) -> str:
+    return _etag("|".join(f"{k}={versions[k]}" for k in keys), request)
+
+
+def rows_etag(rows: Iterable[tuple], request: Request) -> str:
+    """
+    ETag d'une page dérivé de ses lignes : tuples (id, updated_at...) de chaque élément.
+    Change dès qu'une ligne de la page est modifiée, ajoutée ou retirée, et seulement alors.
+    """
+    return _etag("|".join(",".join(str(value) for value in row) for row in rows), request)
+
+
+def versions(db: Session, *keys: str) -> dict:
+    """Versions courantes des clés (0 si jamais écrite)."""
+    rows = db.execute(select(ResourceVersion.key, ResourceVersion.version).where(ResourceVersion.key.in_(keys)))
+    return {key: 0 for key in keys} | dict(rows.all())
+
+
+async def versions_async(db: AsyncSession, *keys: str) -> dict:
+    rows = await db.execute(select(ResourceVersion.key, ResourceVersion.version).where(ResourceVersion.key.in_(keys)))
+    return {key: 0 for key in keys} | dict(rows.all())
+
+
+def etag_for(db: Session, request: Request, *keys: str) -> str:
+    return make_etag(versions(db, *keys), keys, request)
+
+
+async def etag_for_async(db: AsyncSession, request: Request, *keys: str) -> str:
+    return make_etag(await versions_async(db, *keys), keys, request)
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Poser l'ETag sur la réponse ; retourner une 304 si le client a déjà cette version.
+    À appeler avant de construire la réponse complète.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"  # Le client peut garder la réponse mais doit revalider
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {tag.strip() for tag in if_none_match.split(",")}
+        # Comparaison faible (RFC 9110) : W/"x" et "x" sont équivalents
+        normalized = {tag[2:] if tag.startswith("W/") else tag for tag in candidates}
+        if "*" in candidates or etag[2:] in normalized:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
@@ -0,0 +1,122 @@
+"""
+Exports complets (CSV / NDJSON) des données d'une ferme ou d'un utilisateur.
+
+Les lignes sont lues par paquets de EXPORT_CHUNK_ROWS via un curseur serveur
+(yield_per → stream_results sur Postgres) et écrites paquet par paquet dans la
+réponse : la mémoire reste constante quel que soit le nombre de lignes.
+Le générateur ouvre sa propre session, car la session de la requête
+(get_db) est fermée avant que le corps ne soit envoyé.
+"""
+import csv
+import io
+from datetime import date, datetime
+from typing import Iterator, List
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.models import CropProblem, Farm
+from app.models.activity import Activity
+from app.models.harvest import Harvest
+from app.models.sale import Sale
+from app.responses import dumps
+
+EXPORT_CHUNK_ROWS = 1000
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Jeu de données -> (modèle, colonnes exportées)
+DATASETS = {
+    "activities": (Activity, [
+        "id", "farm_id", "crop_id", "user_id", "activity_type", "activity_date", "notes", "created_at", "image_urls",
+    ]),
+    "harvests": (Harvest, [
+        "id", "farm_id", "crop_id", "estimated_quantity", "actual_quantity", "harvest_date", "notes", "created_at",
+    ]),
+    "sales": (Sale, [
+        "id", "harvest_id", "user_id", "product_name", "quantity", "price_per_unit", "currency",
+        "delivery_location", "contact", "created_at",
+    ]),
+    "crop-problems": (CropProblem, [
+        "id", "farm_id", "crop_id", "user_id", "problem_type", "description", "photo_url", "severity", "status",
+        "treatment_notes", "created_at", "updated_at",
+    ]),
+}
+
+
+def _base_query(dataset: str):
+    model, _ = DATASETS[dataset]
+    query = select(model).order_by(model.id)
+    if model is Activity:
+        # Photos chargées par paquet (une requête IN par paquet de yield_per)
+        query = query.options(selectinload(Activity.photos))
+    return query
+
+
+def farm_query(dataset: str, farm_id: int):
+    model, _ = DATASETS[dataset]
+    if model is Sale:
+        # Les ventes sont rattachées à la ferme via la récolte
+        return _base_query(dataset).join(Harvest, Sale.harvest_id == Harvest.id).where(Harvest.farm_id == farm_id)
+    return _base_query(dataset).where(model.farm_id == farm_id)
+
+
+def user_query(dataset: str, user_id: int):
+    model, _ = DATASETS[dataset]
+    if model is Sale:
+        return _base_query(dataset).where(Sale.user_id == user_id)
+    farm_ids = select(Farm.id).where(Farm.user_id == user_id)
+    return _base_query(dataset).where(model.farm_id.in_(farm_ids))
+
+
+def _values(obj, columns: List[str]) -> list:
+    return [
+        [p.image_url for p in obj.photos] if col == "image_urls" else getattr(obj, col)
+        for col in columns
+    ]
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return value
+
+
+def _csv_chunks(rows, columns: List[str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    # BOM : Excel ouvre alors le fichier en UTF-8 (accents)
+    buf.write("\ufeff")
+    writer.writerow(columns)
+    for partition in rows:
+        for obj in partition:
+            writer.writerow([_csv_cell(v) for v in _values(obj, columns)])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(rows, columns: List[str]) -> Iterator[bytes]:
+    for partition in rows:
+        yield b"".join(dumps(dict(zip(columns, _values(obj, columns)))) + b"\n" for obj in partition)
+
+
+def stream_export(query, dataset: str, fmt: str) -> Iterator[bytes]:
+    """Générateur du corps de la réponse : une session et un curseur serveur pour tout l'export."""
+    from app.database import SessionLocal
+
+    _, columns = DATASETS[dataset]
+    db = SessionLocal()
+    try:
+        result = db.scalars(query.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        rows = result.partitions()
+        yield from (_csv_chunks(rows, columns) if fmt == "csv" else _ndjson_chunks(rows, columns))
+    finally:
+        db.close()
@@ -0,0 +1,151 @@
+"""
+Suppression d'une ferme et de toutes ses données (tâche de fond).
+
+DELETE /api/farms/{id} crée un FarmDeletionJob et répond tout de suite ; le job
+supprime ensuite, dans UNE transaction, chaque table dépendante par une requête
+ensembliste (DELETE ... WHERE x IN (SELECT ...)), de bas en haut, puis la ferme.
+Tout est supprimé ou rien : le statut "done" est écrit dans la même transaction.
+Sur Postgres, les clés étrangères ON DELETE CASCADE (migration 0010) couvrent
+en plus toute autre suppression de ferme.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import delete, exists, select, or_
+from sqlalchemy.orm import Session
+from app.models import Farm, Crop, CropProblem, FarmProfile, FarmPost, FarmFollowing, TimelineEntry, FarmDeletionJob
+from app.models.activity import Activity
+from app.models.harvest import Harvest
+from app.models.sale import Sale
+from app.models.photo import FarmPhoto, ActivityPhoto
+from app.services import etag_service
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "running")
+
+# Un job actif plus vieux que ça est considéré comme perdu (worker redémarré) : on peut relancer
+STALE_AFTER = timedelta(hours=1)
+
+
+def active_farm_ids():
+    """Sous-requête des fermes en cours de suppression (à masquer dans toutes les lectures)."""
+    return select(FarmDeletionJob.farm_id).where(FarmDeletionJob.status.in_(ACTIVE_STATUSES))
+
+
+def is_being_deleted(db: Session, farm_id: int) -> bool:
+    return db.scalar(select(exists().where(
+        FarmDeletionJob.farm_id == farm_id, FarmDeletionJob.status.in_(ACTIVE_STATUSES)
+    )))
+
+
+def ensure_not_being_deleted(db: Session, farm_id: Optional[int]) -> None:
+    """409 si la ferme est en cours de suppression : plus d'écriture jusqu'à la fin du job."""
+    if farm_id is not None and is_being_deleted(db, farm_id):
+        raise HTTPException(status_code=409, detail="Farm is being deleted")
+
+
+def request_deletion(db: Session, farm: Farm) -> FarmDeletionJob:
+    """Créer le job (ou retourner celui déjà en cours). Commit."""
+    job = db.scalars(
+        select(FarmDeletionJob)
+        .where(FarmDeletionJob.farm_id == farm.id, FarmDeletionJob.status.in_(ACTIVE_STATUSES))
+        .order_by(FarmDeletionJob.id.desc())
+    ).first()
+    if job and job.created_at > datetime.utcnow() - STALE_AFTER:
+        return job
+    if job:
+        job.status = "failed"
+        job.error = "Abandonné (worker arrêté avant la fin)"
+        job.finished_at = datetime.utcnow()
+    job = FarmDeletionJob(farm_id=farm.id, user_id=farm.user_id, status="pending")
+    db.add(job)
+    # La ferme disparaît tout de suite des listes et de son détail public (ETags, cache)
+    etag_service.touch_farm(db, farm.id, farm.user_id)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def delete_farm_rows(db: Session, farm_id: int) -> dict:
+    """Supprimer la ferme et ses dépendances, de bas en haut. Ne commit pas."""
+    crop_ids = select(Crop.id).where(Crop.farm_id == farm_id)
+    activity_ids = select(Activity.id).where(or_(Activity.farm_id == farm_id, Activity.crop_id.in_(crop_ids)))
+    harvest_ids = select(Harvest.id).where(or_(Harvest.farm_id == farm_id, Harvest.crop_id.in_(crop_ids)))
+    post_ids = select(FarmPost.id).where(or_(FarmPost.farm_id == farm_id, FarmPost.crop_id.in_(crop_ids)))
+
+    steps = [
+        ("timeline_entries", delete(TimelineEntry).where(TimelineEntry.post_id.in_(post_ids))),
+        ("farm_posts", delete(FarmPost).where(FarmPost.id.in_(post_ids))),
+        ("farm_following", delete(FarmFollowing).where(FarmFollowing.farm_id == farm_id)),
+        ("farm_profiles", delete(FarmProfile).where(FarmProfile.farm_id == farm_id)),
+        ("activity_photos", delete(ActivityPhoto).where(ActivityPhoto.activity_id.in_(activity_ids))),
+        ("activities", delete(Activity).where(Activity.id.in_(activity_ids))),
+        ("crop_problems", delete(CropProblem).where(
+            or_(CropProblem.farm_id == farm_id, CropProblem.crop_id.in_(crop_ids))
+        )),
+        ("sales", delete(Sale).where(Sale.harvest_id.in_(harvest_ids))),
+        ("harvests", delete(Harvest).where(Harvest.id.in_(harvest_ids))),
+        ("crops", delete(Crop).where(Crop.farm_id == farm_id)),
+        ("farm_photos", delete(FarmPhoto).where(FarmPhoto.farm_id == farm_id)),
+        ("farms", delete(Farm).where(Farm.id == farm_id)),
+    ]
+    deleted = {}
+    for table, stmt in steps:
+        count = db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+        if count:
+            deleted[table] = count
+    return deleted
+
+
+def run_deletion(job_id: int) -> None:
+    """Exécuter un job (BackgroundTasks) dans sa propre session."""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        job = db.get(FarmDeletionJob, job_id)
+        if job is None or job.status != "pending":
+            return
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        db.commit()
+
+        # Verrou sur la ferme : les insertions concurrentes d'enfants attendent la fin
+        farm = db.scalars(select(Farm).where(Farm.id == job.farm_id).with_for_update()).first()
+        deleted = delete_farm_rows(db, job.farm_id) if farm else {}
+        etag_service.touch_farm(db, job.farm_id, job.user_id)
+        job.status = "done"
+        job.deleted = deleted
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        logger.info("🗑️ Farm %s deleted: %s", job.farm_id, deleted)
+    except Exception as e:
+        db.rollback()
+        logger.error("❌ Farm deletion job %s failed: %s", job_id, e, exc_info=True)
+        _mark_failed(db, job_id, str(e))
+    finally:
+        db.close()
+
+
+def _mark_failed(db: Session, job_id: int, error: str) -> None:
+    job: Optional[FarmDeletionJob] = db.get(FarmDeletionJob, job_id)
+    if job is not None:
+        job.status = "failed"
+        job.error = error[:2000]
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+
+def job_to_dict(job: FarmDeletionJob) -> dict:
+    return {
+        "job_id": job.id,
+        "farm_id": job.farm_id,
+        "status": job.status,
+        "deleted": job.deleted or {},
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
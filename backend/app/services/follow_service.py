@@ -0,0 +1,134 @@
+"""
+Compteurs d'abonnés / d'abonnements.
+
+users.followers_count / following_count et farm_profiles.total_followers sont
+mis à jour par incrément atomique (UPDATE ... SET n = n + 1) dans la même
+transaction que l'abonnement, donc sans COUNT(*) à la lecture.
+Une réconciliation périodique recalcule tout depuis user_following pour
+corriger une éventuelle dérive (écritures SQL manuelles, anciennes données).
+"""
+import asyncio
+import logging
+from datetime import datetime
+from sqlalchemy import delete, insert, update, select, func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import User, UserFollowing, FarmProfile
+
+logger = logging.getLogger(__name__)
+
+# Identifie le verrou de réconciliation dans pg_locks (un seul worker à la fois)
+RECONCILE_LOCK_KEY = 72_617_362
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def add_follow(db: Session, follower_id: int, followed_id: int) -> bool:
+    """
+    Créer l'abonnement s'il n'existe pas. Ne commit pas.
+    True seulement si la ligne a été insérée : deux requêtes simultanées pour le même
+    couple n'en insèrent qu'une (index unique), l'autre ne doit pas toucher aux compteurs.
+    """
+    values = {"follower_id": follower_id, "following_id": followed_id, "created_at": datetime.utcnow()}
+    dialect_insert = _DIALECT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        inserted = db.execute(
+            dialect_insert(UserFollowing).values(**values)
+            .on_conflict_do_nothing(index_elements=["follower_id", "following_id"])
+            .returning(UserFollowing.id)
+        ).scalar()
+        return inserted is not None
+    try:
+        with db.begin_nested():
+            db.execute(insert(UserFollowing).values(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def remove_follow(db: Session, follower_id: int, followed_id: int) -> bool:
+    """Supprimer l'abonnement. Ne commit pas. True seulement si une ligne a été supprimée."""
+    deleted = db.execute(
+        delete(UserFollowing)
+        .where(UserFollowing.follower_id == follower_id, UserFollowing.following_id == followed_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return deleted == 1
+
+
+def apply_follow_delta(db: Session, follower_id: int, followed_id: int, delta: int) -> None:
+    """Ajuster les compteurs après un follow (+1) ou un unfollow (-1). Ne commit pas."""
+    db.execute(
+        update(User).where(User.id == followed_id)
+        .values(followers_count=User.followers_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(User).where(User.id == follower_id)
+        .values(following_count=User.following_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    # Les profils de ferme affichent le nombre d'abonnés de leur propriétaire
+    db.execute(
+        update(FarmProfile).where(FarmProfile.user_id == followed_id)
+        .values(total_followers=func.coalesce(FarmProfile.total_followers, 0) + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_follow_counts(db: Session) -> int:
+    """Recalculer tous les compteurs depuis user_following. Retourne le nombre d'utilisateurs corrigés."""
+    followers = select(func.count()).where(UserFollowing.following_id == User.id).scalar_subquery()
+    following = select(func.count()).where(UserFollowing.follower_id == User.id).scalar_subquery()
+    fixed = db.execute(
+        update(User)
+        .where((User.followers_count != followers) | (User.following_count != following))
+        .values(followers_count=followers, following_count=following)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    owner_followers = select(User.followers_count).where(User.id == FarmProfile.user_id).scalar_subquery()
+    db.execute(
+        update(FarmProfile)
+        .where(func.coalesce(FarmProfile.total_followers, -1) != owner_followers)
+        .values(total_followers=owner_followers)
+        .execution_options(synchronize_session=False)
+    )
+    return fixed
+
+
+def run_reconciliation() -> int:
+    """Réconciliation dans sa propre session ; sur Postgres, sautée si un autre worker la fait déjà."""
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        is_postgres = db.bind.dialect.name == "postgresql"
+        if is_postgres:
+            # Verrou transactionnel : relâché automatiquement au commit/rollback
+            got_lock = db.execute(text("SELECT pg_try_advisory_xact_lock(:k)"), {"k": RECONCILE_LOCK_KEY}).scalar()
+            if not got_lock:
+                db.rollback()
+                return 0
+        fixed = reconcile_follow_counts(db)
+        db.commit()
+        return fixed
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def reconciliation_loop(interval: int = None) -> None:
+    """Tâche de fond : réconcilie les compteurs toutes les `interval` secondes."""
+    interval = interval or settings.FOLLOW_COUNTS_RECONCILE_INTERVAL
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            fixed = await asyncio.to_thread(run_reconciliation)
+            if fixed:
+                logger.info("🔁 Follower counters reconciled: %s user(s) fixed", fixed)
+        except Exception as e:
+            logger.warning("⚠️ Follower counter reconciliation failed: %s", e)
@@ -0,0 +1,143 @@
+"""
+Recherche des fermes publiques autour d'un point (/api/farm-network/nearby).
+
+Index spatial par grille : la Terre est découpée en cellules de GRID_DEG degrés
+(~11 km) et chaque ferme porte le numéro de sa cellule (farms.geo_cell, B-tree,
+maintenu par trigger, migration 0011). Les cellules d'une même ligne de latitude
+ont des numéros consécutifs : le carré qui englobe le cercle de recherche devient
+une plage `geo_cell BETWEEN a AND b` par ligne, soit quelques parcours d'index.
+Sur Postgres la distance réelle (haversine) est calculée en SQL : filtre sur le
+rayon, ORDER BY distance et LIMIT dans la base. Seules les colonnes affichées
+sont lues (pas de lignes ORM complètes).
+Un carré qui déborde de ±180° de longitude est coupé en deux de part et d'autre
+de l'antiméridien.
+Sur SQLite (dev/tests) : repli sur un filtre latitude / longitude, distance et
+tri en Python.
+"""
+import math
+from typing import List, Optional, Tuple
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Farm, FarmProfile, User
+from app.services import farm_deletion_service
+
+GRID_DEG = 0.1
+# Nombre de cellules par ligne de latitude (360° / GRID_DEG)
+GRID_COLS = 3600
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+
+MAX_RADIUS_KM = 200
+
+
+def grid_cell(lat: Optional[float], lon: Optional[float]) -> Optional[int]:
+    """Numéro de cellule d'un point ; même formule que farms_geo_cell() en SQL."""
+    if lat is None or lon is None:
+        return None
+    row = math.floor((lat + 90.0) / GRID_DEG)
+    col = math.floor((lon + 180.0) / GRID_DEG)
+    return row * GRID_COLS + col
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_boxes(lat: float, lon: float, radius_km: float) -> List[Tuple[float, float, float, float]]:
+    """
+    [(lat_min, lat_max, lon_min, lon_max)] des carrés qui contiennent le cercle :
+    un seul, ou deux si le carré traverse l'antiméridien (±180°).
+    """
+    d_lat = radius_km / KM_PER_DEG_LAT
+    # Près des pôles, un degré de longitude tend vers 0 km : on borne le cosinus
+    d_lon = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 0.01))
+    lat_min, lat_max = max(lat - d_lat, -90.0), min(lat + d_lat, 90.0 - 1e-9)
+    east_edge = 180.0 - 1e-9
+    lon_min, lon_max = lon - d_lon, lon + d_lon
+    if d_lon >= 180.0:
+        lon_ranges = [(-180.0, east_edge)]
+    elif lon_min < -180.0:
+        lon_ranges = [(-180.0, lon_max), (lon_min + 360.0, east_edge)]
+    elif lon_max >= 180.0:
+        lon_ranges = [(lon_min, east_edge), (-180.0, lon_max - 360.0)]
+    else:
+        lon_ranges = [(lon_min, lon_max)]
+    return [(lat_min, lat_max, low, high) for low, high in lon_ranges]
+
+
+def cell_ranges(lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> List[Tuple[int, int]]:
+    """Une plage [première, dernière cellule] par ligne de latitude couverte."""
+    first = grid_cell(lat_min, lon_min)
+    last = grid_cell(lat_max, lon_max)
+    first_row, first_col = divmod(first, GRID_COLS)
+    last_row, last_col = divmod(last, GRID_COLS)
+    return [
+        (row * GRID_COLS + first_col, row * GRID_COLS + last_col)
+        for row in range(first_row, last_row + 1)
+    ]
+
+
+def _distance_sql(lat: float, lon: float):
+    """haversine_km(lat, lon, farms.latitude, farms.longitude) en SQL (Postgres)."""
+    d_phi = func.radians(Farm.latitude - lat)
+    d_lambda = func.radians(Farm.longitude - lon)
+    a = func.power(func.sin(d_phi / 2), 2) \
+        + math.cos(math.radians(lat)) * func.cos(func.radians(Farm.latitude)) * func.power(func.sin(d_lambda / 2), 2)
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
+
+
+# Colonnes affichées par /nearby, plus les dates de mise à jour qui forment l'ETag
+NEARBY_COLUMNS = (
+    FarmProfile.id.label("profile_id"),
+    FarmProfile.description,
+    FarmProfile.specialties,
+    FarmProfile.total_followers,
+    FarmProfile.updated_at.label("profile_updated_at"),
+    Farm.id.label("farm_id"),
+    Farm.name.label("farm_name"),
+    Farm.location,
+    Farm.image_url.label("farm_image_url"),
+    Farm.latitude,
+    Farm.longitude,
+    Farm.updated_at.label("farm_updated_at"),
+    User.id.label("user_id"),
+    User.name.label("owner_name"),
+    User.profile_image,
+    User.updated_at.label("user_updated_at"),
+)
+
+
+async def nearby_public_farms(db: AsyncSession, lat: float, lon: float, radius_km: float, limit: int) -> list:
+    """[(distance_km, row)] triés par distance, au plus `limit` ; `row` porte les NEARBY_COLUMNS."""
+    boxes = bounding_boxes(lat, lon, radius_km)
+    query = (
+        select(*NEARBY_COLUMNS)
+        .join(Farm, FarmProfile.farm_id == Farm.id)
+        .join(User, Farm.user_id == User.id)
+        .where(FarmProfile.is_public == True, Farm.id.not_in(farm_deletion_service.active_farm_ids()))
+    )
+    if db.bind.dialect.name == "postgresql":
+        distance = _distance_sql(lat, lon)
+        query = query.add_columns(distance.label("distance_km"))\
+            .where(or_(*(Farm.geo_cell.between(a, b) for box in boxes for a, b in cell_ranges(*box))))\
+            .where(distance <= radius_km)\
+            .order_by(distance, Farm.id)\
+            .limit(limit)
+        return [(row.distance_km, row) for row in (await db.execute(query)).all()]
+
+    query = query.where(or_(*(
+        and_(Farm.latitude.between(lat_min, lat_max), Farm.longitude.between(lon_min, lon_max))
+        for lat_min, lat_max, lon_min, lon_max in boxes
+    )))
+    rows = []
+    for row in (await db.execute(query)).all():
+        distance = haversine_km(lat, lon, row.latitude, row.longitude)
+        if distance <= radius_km:
+            rows.append((distance, row))
+    rows.sort(key=lambda item: (item[0], item[1].farm_id))
+    return rows[:limit]
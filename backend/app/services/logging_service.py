@@ -0,0 +1,119 @@
+"""
+Journalisation non bloquante des loggers "app.*".
+
+Les handlers ne formatent ni n'écrivent dans le thread de la requête : un
+QueueHandler dépose l'enregistrement brut dans une file bornée et un thread
+(QueueListener) le formate ("%s" % args, traceback) puis l'écrit sur stderr.
+File pleine : l'enregistrement est abandonné et compté, la requête n'attend pas.
+
+Échantillonnage : sous WARNING, seule une fraction des requêtes HTTP garde ses
+logs (LOG_SAMPLE_RATE, ou LOG_ROUTE_SAMPLE_RATES par modèle de route). La
+décision est prise une fois par requête : ses lignes sont gardées ensemble.
+WARNING et au-delà sont toujours écrits.
+"""
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from typing import Dict, Optional
+from app.config import settings
+from app.services.metrics_service import current_db_stats, route_template
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["LazyQueueHandler"] = None
+
+
+def parse_route_rates(raw: str) -> Dict[str, float]:
+    """"/api/farm-network/public-farms=0.05,/api/farm-network/feed=0.1" -> {route: taux}"""
+    rates = {}
+    for item in (raw or "").split(","):
+        route, sep, rate = item.strip().rpartition("=")
+        if sep and route:
+            rates[route.strip()] = float(rate)
+    return rates
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Dépose l'enregistrement tel quel : le formatage se fait dans le thread d'écriture."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RouteSampler(logging.Filter):
+    """Garde les logs (< WARNING) d'une fraction des requêtes HTTP, par modèle de route."""
+
+    def __init__(self, default_rate: float, route_rates: Dict[str, float]):
+        super().__init__()
+        self.default_rate = default_rate
+        self.route_rates = route_rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        request = current_db_stats.get()
+        route = route_template(request.scope) if request is not None and request.scope else None
+        rate = self.route_rates.get(route, self.default_rate)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        if request is None:
+            return random.random() < rate
+        if request.log_sampled is None:
+            request.log_sampled = random.random() < rate
+        return request.log_sampled
+
+
+def setup_logging() -> None:
+    """Brancher la file et son thread d'écriture sur le logger "app" (une fois par worker)."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _handler = LazyQueueHandler(log_queue)
+    _handler.addFilter(RouteSampler(settings.LOG_SAMPLE_RATE, parse_route_rates(settings.LOG_ROUTE_SAMPLE_RATES)))
+
+    writer = logging.StreamHandler(sys.stderr)
+    writer.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(log_queue, writer)
+    _listener.start()
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(settings.LOG_LEVEL)
+    app_logger.addHandler(_handler)
+    app_logger.propagate = False
+
+
+def shutdown() -> None:
+    """Vider la file (enregistrements restants écrits) et arrêter le thread."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger("app").removeHandler(_handler)
+    _listener = _handler = None
+
+
+def stats() -> dict:
+    if _handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "queued": _handler.queue.qsize(),
+        "capacity": _handler.queue.maxsize,
+        "dropped": _handler.dropped,
+    }
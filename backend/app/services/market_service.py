@@ -0,0 +1,65 @@
+"""
+Prix du marché : dernier prix par (produit, région) et historique paginé.
+
+Sur Postgres, market_latest_prices est tenu à jour par trigger (insertion, mise à
+jour et suppression dans market_prices). Ailleurs (SQLite en local) il n'y a pas
+de trigger : latest_prices_source calcule les derniers prix depuis l'historique.
+rebuild_latest_prices reconstruit la table (imports en masse via COPY, réparation).
+"""
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.orm import Session
+from app.models import MarketPrice, MarketLatestPrice
+from app.services import etag_service
+
+
+_LATEST_COLUMNS = ["product_name", "region", "price_id", "price_per_kg", "currency", "price_date", "source"]
+
+
+def _latest_from_history():
+    """SELECT du dernier relevé (date, puis id) de chaque (produit, région) de market_prices."""
+    ranked = select(
+        MarketPrice.product_name,
+        MarketPrice.region,
+        MarketPrice.id.label("price_id"),
+        MarketPrice.price_per_kg,
+        MarketPrice.currency,
+        MarketPrice.price_date,
+        MarketPrice.source,
+        func.row_number().over(
+            partition_by=(MarketPrice.product_name, MarketPrice.region),
+            order_by=(MarketPrice.price_date.desc(), MarketPrice.id.desc()),
+        ).label("rn"),
+    ).where(MarketPrice.price_date.isnot(None)).subquery()
+    return select(*(ranked.c[name] for name in _LATEST_COLUMNS)).where(ranked.c.rn == 1)
+
+
+def latest_prices_source(db):
+    """
+    Derniers prix à interroger (colonnes de market_latest_prices) : la table tenue
+    par trigger sur Postgres, sinon une sous-requête sur l'historique.
+    `db` : Session ou AsyncSession.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return MarketLatestPrice.__table__
+    return _latest_from_history().subquery("market_latest_prices")
+
+
+def rebuild_latest_prices(db: Session) -> None:
+    """Recalculer market_latest_prices depuis market_prices. Ne commit pas."""
+    latest = _latest_from_history().add_columns(func.now())
+    db.execute(delete(MarketLatestPrice))
+    db.execute(insert(MarketLatestPrice).from_select(_LATEST_COLUMNS + ["updated_at"], latest))
+    etag_service.bump(db, etag_service.MARKET_PRICES)
+
+
+def latest_price_to_dict(p) -> dict:
+    # Même forme que MarketPriceResponse : `id` est l'id du relevé dans market_prices
+    return {
+        "id": p.price_id,
+        "product_name": p.product_name,
+        "region": p.region,
+        "price_per_kg": p.price_per_kg,
+        "currency": p.currency,
+        "price_date": p.price_date,
+        "source": p.source,
+    }
@@ -0,0 +1,273 @@
+"""
+Métriques Prometheus (/metrics, format texte 0.0.4).
+
+- Latence de chaque requête HTTP par méthode, modèle de route
+  ("/api/farms/{farm_id}", pas l'URL réelle) et statut ;
+- nombre de requêtes SQL et temps passé en base par requête HTTP, mesurés
+  par les événements before/after_cursor_execute de SQLAlchemy : un N+1
+  apparaît comme un pic de requêtes SQL sur une route ;
+- état des pools de connexions et des caches mémoire.
+
+Les valeurs sont propres à chaque worker uvicorn (comme /health/db-pool).
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from app.services import slow_query_service
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestDBStats:
+    """Requête HTTP en cours : requêtes SQL exécutées, et logs gardés ou non (logging_service)."""
+    __slots__ = ("scope", "queries", "seconds", "log_sampled")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+        self.log_sampled: Optional[bool] = None
+
+    @property
+    def route(self) -> str:
+        """Méthode et modèle de route ("GET /api/farms/{farm_id}")."""
+        return f"{self.scope.get('method', '')} {route_template(self.scope)}" if self.scope else "unknown"
+
+
+# Compteur de la requête HTTP en cours ; partagé avec le threadpool (copie du contexte)
+current_db_stats: ContextVar[Optional[RequestDBStats]] = ContextVar("current_db_stats", default=None)
+
+
+def route_template(scope: dict) -> str:
+    """Modèle de la route appelée, connu une fois le routage fait (Starlette remplit scope["route"])."""
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def total(self) -> float:
+        """Somme de toutes les séries (benchmarks)."""
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_fmt(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [comptes par bucket..., somme, total]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.doc}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = f'le="{_fmt(float(bound))}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(series[-2])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {series[-1]}"
+
+
+HTTP_LABELS = ("method", "route", "status")
+
+http_requests = Counter("http_requests_total", "HTTP requests handled", HTTP_LABELS)
+http_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", HTTP_LABELS, LATENCY_BUCKETS
+)
+db_queries_per_request = Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+db_time_per_request = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per HTTP request", ("method", "route"), DB_TIME_BUCKETS
+)
+db_queries = Counter("db_queries_total", "SQL statements executed", ("engine",))
+db_seconds = Counter("db_query_seconds_total", "Time spent in SQL statements", ("engine",))
+
+METRICS = [http_requests, http_latency, db_queries_per_request, db_time_per_request, db_queries, db_seconds]
+
+
+# ─── SQL ─────────────────────────────────────────────────────────────────────
+
+def instrument_engine(engine, name: str) -> None:
+    """Compter les requêtes SQL d'un Engine (pour un AsyncEngine : passer .sync_engine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        db_queries.inc((name,))
+        db_seconds.inc((name,), elapsed)
+        stats = current_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+        if slow_query_service.is_slow(elapsed) and context.execution_options.get("slow_query_log", True):
+            slow_query_service.record(name, statement, parameters, elapsed, executemany, stats)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # Requête en échec : after_cursor_execute n'est pas appelé, on retire le départ
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+# ─── HTTP ────────────────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    """Middleware ASGI : latence et nombre de requêtes SQL de chaque requête HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        stats = RequestDBStats(scope)
+        token = current_db_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_db_stats.reset(token)
+            # Modèle de route, pas le chemin réel : le nombre de séries reste borné
+            template = route_template(scope)
+            method = scope.get("method", "")
+            http_requests.inc((method, template, str(status["code"])))
+            http_latency.observe((method, template, str(status["code"])), elapsed)
+            db_queries_per_request.observe((method, template), stats.queries)
+            db_time_per_request.observe((method, template), stats.seconds)
+
+
+# ─── Jauges lues au moment du scrape ─────────────────────────────────────────
+
+def _samples(name: str, doc: str, samples: List[Tuple[str, float]], kind: str = "gauge") -> Iterable[str]:
+    yield f"# HELP {name} {doc}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in samples:
+        yield f"{name}{labels} {_fmt(value)}"
+
+
+def _pool_lines(pools: Dict[str, object]) -> Iterable[str]:
+    from app.database import pool_stats
+
+    queue_pools = {name: pool for name, pool in pools.items() if isinstance(pool, QueuePool)}
+    for metric, doc, getter in (
+        ("db_pool_size", "Configured pool size", lambda p: p.size()),
+        ("db_pool_checked_out", "Connections currently in use", lambda p: p.checkedout()),
+        ("db_pool_overflow", "Overflow connections currently open", lambda p: p.overflow()),
+    ):
+        yield from _samples(metric, doc, [(f'{{engine="{name}"}}', getter(p)) for name, p in queue_pools.items()])
+    snapshot = pool_stats.snapshot()
+    yield from _samples(
+        "db_pool_checkouts_total", "Successful checkouts (sync engine)", [("", snapshot["checkouts"])], "counter"
+    )
+    yield from _samples(
+        "db_pool_timeouts_total", "Checkouts that timed out (sync engine)", [("", snapshot["timeouts"])], "counter"
+    )
+    yield from _samples(
+        "db_pool_wait_seconds_total", "Time spent waiting for a connection (sync engine)",
+        [("", snapshot["total_wait_seconds"])], "counter",
+    )
+
+
+def _cache_lines(caches: Dict[str, dict]) -> Iterable[str]:
+    yield from _samples("cache_entries", "Entries in the in-memory cache", [
+        (f'{{cache="{name}"}}', stats["size"]) for name, stats in caches.items()
+    ])
+    for field in ("hits", "misses", "evictions", "expirations"):
+        yield from _samples(f"cache_{field}_total", f"In-memory cache {field}", [
+            (f'{{cache="{name}"}}', stats[field]) for name, stats in caches.items()
+        ], "counter")
+
+
+def _table_lines(estimates: Dict[str, int]) -> Iterable[str]:
+    yield from _samples("db_table_rows_estimate", "Rows per table estimated by PostgreSQL (pg_class.reltuples)", [
+        (f'{{table="{name}"}}', rows) for name, rows in sorted(estimates.items())
+    ])
+
+
+def render() -> str:
+    from app.database import engine, async_engine
+    from app.services.cache_service import farm_details_cache
+    from app.services import auth_service, table_stats_service
+
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    lines.extend(_pool_lines({"sync": engine.pool, "async": async_engine.sync_engine.pool}))
+    lines.extend(_cache_lines({"farm_details": farm_details_cache.stats(), "auth_tokens": auth_service.token_cache.stats()}))
+    lines.extend(_table_lines(table_stats_service.estimates))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,201 @@
+"""
+Agrégation des actualités agricoles (flux RSS Google News).
+
+Les flux sont récupérés en parallèle (httpx.AsyncClient) et la liste fusionnée
+est gardée en mémoire :
+- fraîche (< NEWS_CACHE_TTL) : servie directement
+- périmée (< NEWS_STALE_TTL) : servie directement, rafraîchie en arrière-plan
+- absente ou trop vieille : la requête attend un rafraîchissement, partagé par
+  toutes les requêtes arrivées pendant qu'il tourne
+Un fetch en échec (ou sans article) n'est pas retenté avant NEWS_FAILURE_TTL :
+pendant ce délai les requêtes reçoivent le contenu actuel du cache sans attendre.
+Un rafraîchisseur de fond (start_refresher) garde le cache chaud entre les requêtes.
+"""
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlencode
+from xml.etree import ElementTree as ET
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Google News RSS queries (base URL configurable to point tests at a local stub server)
+FEEDS = [
+    {
+        "params": {"q": "agriculture", "ceid": "SN:fr"},
+        "category": "Agriculture",
+        "description": "Actualités agricoles"
+    },
+    {
+        "params": {"q": "élevage bétail", "ceid": "SN:fr"},
+        "category": "Élevage",
+        "description": "Actualités d'élevage"
+    },
+    {
+        "params": {"q": "Senegal agriculture", "ceid": "SN:fr"},
+        "category": "Local",
+        "description": "Actualités locales Sénégal"
+    },
+    {
+        "params": {"q": "agriculture international", "hl": "fr"},
+        "category": "International",
+        "description": "Actualités internationales"
+    },
+]
+
+ITEMS_PER_FEED = 3
+
+
+def feed_url(feed_config: dict) -> str:
+    return f"{settings.NEWS_FEED_BASE_URL}?{urlencode(feed_config['params'])}"
+
+
+def _clean_description(description: str) -> str:
+    # Clean HTML tags and entities from description
+    description = re.sub(r'<[^>]*>', '', description)
+    description = description.replace('&nbsp;', ' ')
+    description = description.replace('&quot;', '"')
+    description = description.replace('&apos;', "'")
+    description = description.replace('&amp;', '&')
+    description = description.replace('&lt;', '<')
+    description = description.replace('&gt;', '>')
+    description = description.replace('&#39;', "'")
+    description = re.sub(r'&#\d+;', '', description)  # Remove numeric entities
+    # Remove extra whitespace
+    description = ' '.join(description.split())
+    if len(description) > 300:
+        description = description[:300] + "..."
+    return description
+
+
+def _parse_pub_date(pub_date_str: str) -> datetime:
+    for fmt in ("%a, %d %b %Y %H:%M:%S %Z", "%a, %d %b %Y %H:%M:%S %z"):
+        try:
+            return datetime.strptime(pub_date_str, fmt)
+        except ValueError:
+            continue
+    return datetime.now()
+
+
+def parse_feed(content: bytes, feed_config: dict) -> List[Dict[str, Any]]:
+    """Extraire les ITEMS_PER_FEED premiers articles d'un flux RSS."""
+    root = ET.fromstring(content)
+    articles = []
+    for item in root.findall('.//item'):
+        if len(articles) >= ITEMS_PER_FEED:
+            break
+        title_elem = item.find('title')
+        description_elem = item.find('description')
+        link_elem = item.find('link')
+        pub_date_elem = item.find('pubDate')
+        image_elem = item.find('.//image/url')
+
+        title = title_elem.text if title_elem is not None else feed_config["description"]
+        if not title:
+            continue
+        description = description_elem.text if description_elem is not None else ""
+
+        articles.append({
+            "title": title,
+            "description": _clean_description(description or ""),
+            "imageUrl": image_elem.text if image_elem is not None else None,
+            "pubDate": _parse_pub_date(pub_date_elem.text if pub_date_elem is not None else "").isoformat(),
+            "source": feed_config["description"],
+            "category": feed_config["category"],
+            "link": link_elem.text if link_elem is not None else "",
+        })
+    return articles
+
+
+async def _fetch_feed(client: httpx.AsyncClient, feed_config: dict) -> List[Dict[str, Any]]:
+    response = await client.get(feed_url(feed_config))
+    response.raise_for_status()
+    return parse_feed(response.content, feed_config)
+
+
+async def fetch_all_feeds() -> List[Dict[str, Any]]:
+    """Récupérer tous les flux en parallèle ; un flux en erreur est simplement ignoré."""
+    async with httpx.AsyncClient(timeout=settings.NEWS_FETCH_TIMEOUT, follow_redirects=True) as client:
+        results = await asyncio.gather(*(_fetch_feed(client, f) for f in FEEDS), return_exceptions=True)
+    articles = []
+    for feed_config, result in zip(FEEDS, results):
+        if isinstance(result, Exception):
+            logger.warning("Error fetching %s news: %s", feed_config["category"], result)
+            continue
+        articles.extend(result)
+    return articles
+
+
+class NewsCache:
+    """Cache TTL en mémoire avec stale-while-revalidate (un cache par worker)."""
+
+    def __init__(self, fetcher=fetch_all_feeds):
+        self._fetcher = fetcher
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.articles: List[Dict[str, Any]] = []
+        self.fetched_at: float = 0.0
+        self.failed_at: float = 0.0
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at if self.fetched_at else float("inf")
+
+    def recently_failed(self) -> bool:
+        """Dernier fetch en échec (ou vide) il y a moins de NEWS_FAILURE_TTL : ne pas réessayer."""
+        return bool(self.failed_at) and time.monotonic() - self.failed_at < settings.NEWS_FAILURE_TTL
+
+    async def _refresh(self) -> None:
+        if self.age() < settings.NEWS_CACHE_TTL:
+            return
+        try:
+            articles = await self._fetcher()
+        except Exception:
+            self.failed_at = time.monotonic()
+            raise
+        if articles:
+            self.articles = articles
+            self.fetched_at = time.monotonic()
+            self.failed_at = 0.0
+        else:
+            self.failed_at = time.monotonic()
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        return self._refresh_task
+
+    async def refresh(self) -> None:
+        # Single-flight : les appelants concurrents partagent le résultat du rafraîchissement
+        # en cours au lieu de relancer chacun les flux l'un après l'autre.
+        # shield : un client qui se déconnecte n'annule pas le fetch des autres
+        await asyncio.shield(self._start_refresh())
+
+    async def get(self) -> List[Dict[str, Any]]:
+        age = self.age()
+        if age < settings.NEWS_CACHE_TTL:
+            return self.articles
+        if self.recently_failed():
+            # Cache négatif : les flux viennent d'échouer, servir ce qu'on a (éventuellement rien)
+            return self.articles
+        if age < settings.NEWS_STALE_TTL:
+            self._start_refresh()
+            return self.articles
+        await self.refresh()
+        return self.articles
+
+
+news_cache = NewsCache()
+
+
+async def refresher_loop(cache: NewsCache = news_cache) -> None:
+    """Tâche de fond : garde le cache chaud pour que les requêtes ne paient jamais le fetch."""
+    while True:
+        try:
+            await cache.refresh()
+        except Exception as e:
+            logger.warning("⚠️ News refresh failed: %s", e)
+        await asyncio.sleep(settings.NEWS_CACHE_TTL)
@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode la position (created_at, id) du dernier élément d'une page en jeton opaque."""
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Décode un jeton produit par encode_cursor ; 400 si le jeton est invalide."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def apply_keyset(query, created_col, id_col, cursor: Optional[str], limit: int, skip: int = 0):
+    """
+    Pagination par clé (keyset) sur (created_at, id) décroissants.
+
+    Contrairement à offset(), la base saute directement à la position du curseur
+    via l'index composite : la page N coûte autant que la première page.
+    Fonctionne avec Query (ORM legacy) comme avec select().
+    `skip` reste accepté pour les anciens clients mais est ignoré si un curseur est fourni.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(created_col, id_col) < tuple_(created_at, row_id))
+    query = query.order_by(created_col.desc(), id_col.desc())
+    if skip and not cursor:
+        query = query.offset(skip)
+    # Un élément de plus pour savoir s'il existe une page suivante
+    return query.limit(limit + 1)
+
+
+def split_page(rows: list, limit: int, key) -> Tuple[list, Optional[str]]:
+    """Coupe l'élément sentinelle et calcule next_cursor ; key(row) -> (created_at, id)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    created_at, row_id = key(rows[-1])
+    return rows, encode_cursor(created_at, row_id)
@@ -0,0 +1,122 @@
+"""
+Hachage des mots de passe (argon2id) hors du threadpool des requêtes.
+
+argon2 est volontairement coûteux en CPU et en mémoire : exécuté dans les
+handlers, chaque connexion occupait un thread du threadpool anyio et du temps
+CPU pris aux autres requêtes. Ici le calcul part dans un pool de processus
+dédié (PASSWORD_HASH_WORKERS par worker uvicorn) ; l'appelant attend sans
+bloquer la boucle. Au-delà de PASSWORD_HASH_MAX_PENDING appels en attente, on
+répond 503 plutôt que d'empiler les connexions.
+
+Les paramètres argon2 viennent de la config ; un hash créé avec d'autres
+paramètres est recalculé à la prochaine connexion réussie (verify_and_update).
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+# Contexte du processus courant (créé par _init_worker dans chaque processus du pool)
+_context: Optional[CryptContext] = None
+
+
+def argon2_params() -> dict:
+    return {
+        "time_cost": settings.ARGON2_TIME_COST,
+        "memory_cost": settings.ARGON2_MEMORY_COST,
+        "parallelism": settings.ARGON2_PARALLELISM,
+    }
+
+
+def make_context(params: dict) -> CryptContext:
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        **{f"argon2__{name}": value for name, value in params.items()},
+    )
+
+
+# ─── Exécuté dans les processus du pool ──────────────────────────────────────
+
+def _init_worker(params: dict) -> None:
+    global _context
+    _context = make_context(params)
+
+
+def _hash(password: str) -> str:
+    return _context.hash(password)
+
+
+def _verify(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(mot de passe correct, nouveau hash si les paramètres ont changé)"""
+    try:
+        return _context.verify_and_update(password, hashed)
+    except ValueError:
+        # Hash illisible (ancien format, colonne corrompue) : refusé, pas d'erreur 500
+        return False, None
+
+
+# ─── Côté application ────────────────────────────────────────────────────────
+
+def get_executor() -> ProcessPoolExecutor:
+    """Pool créé au premier usage ; "spawn" : pas de fork d'un processus multi-thread."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(argon2_params(),),
+        )
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _run(fn, *args):
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_executor(), fn, *args)
+    except BrokenProcessPool:
+        # Un processus est mort (OOM avec un memory_cost trop élevé...) : pool recréé au prochain appel
+        logger.error("❌ Password hashing pool broken, restarting it")
+        shutdown()
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Vérifier un mot de passe. Retourne (ok, nouveau hash à enregistrer ou None)."""
+    return await _run(_verify, password, hashed)
+
+
+def stats() -> dict:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "pending": _pending,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "argon2": argon2_params(),
+    }
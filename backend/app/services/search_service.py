@@ -0,0 +1,94 @@
+"""
+Recherche de fermes publiques.
+
+Sur Postgres : document tsvector pondéré (farm_profiles.search_vector, maintenu par
+trigger) + similarité trigramme sur le nom et le lieu, le tout sans accents
+("Thiès" == "thies") et servi par des index GIN (migration 0006).
+Chaque correspondance est une sous-requête indexée, réunies par UNION.
+Sur SQLite (dev/tests) : repli sur LIKE, sans accents grâce à une fonction
+f_unaccent Python enregistrée sur les connexions (app.database).
+"""
+import unicodedata
+from sqlalchemy import select, func, literal, or_, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Farm, FarmProfile, User
+from app.services import farm_deletion_service
+
+# Config plein texte utilisée à l'indexation (voir sql/migrations/0006_farm_search.sql)
+TS_CONFIG = "french"
+
+
+def normalize_query(q: str) -> str:
+    """Minuscules, sans accents ni espaces superflus."""
+    decomposed = unicodedata.normalize("NFKD", q.strip().lower())
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def escape_like(value: str) -> str:
+    """Échapper \\, % et _ pour un motif LIKE (à utiliser avec escape="\\")."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _postgres_search(q: str):
+    """
+    (ids des profils trouvés, rang). Chaque correspondance est une sous-requête servie
+    par son propre index GIN, puis UNION : un seul OR sur deux tables jointes empêcherait
+    le BitmapOr et forcerait un parcours séquentiel des profils publics.
+    """
+    q_norm = normalize_query(q)
+    tsquery = func.websearch_to_tsquery(TS_CONFIG, func.f_unaccent(q))
+    # Mêmes expressions que les index trigramme ix_farms_name_trgm / ix_farms_location_trgm
+    name_expr = func.f_unaccent(func.lower(Farm.name))
+    location_expr = func.f_unaccent(func.lower(Farm.location))
+    q_lit = literal(q_norm)
+    matched = union(
+        select(FarmProfile.id).where(FarmProfile.search_vector.op("@@")(tsquery)),
+        select(FarmProfile.id).join(Farm, FarmProfile.farm_id == Farm.id).where(q_lit.op("<%")(name_expr)),
+        select(FarmProfile.id).join(Farm, FarmProfile.farm_id == Farm.id).where(q_lit.op("<%")(location_expr)),
+    )
+    rank = (
+        func.coalesce(func.ts_rank(FarmProfile.search_vector, tsquery), 0)
+        + func.greatest(
+            func.word_similarity(q_lit, name_expr),
+            func.coalesce(func.word_similarity(q_lit, location_expr), 0),
+        )
+    ).label("rank")
+    return matched, rank
+
+
+def _fallback_search(q: str):
+    """
+    SQLite : LIKE sans accents des deux côtés (f_unaccent enregistrée sur chaque
+    connexion par app.database), sur le nom, le lieu, la description et les spécialités.
+    """
+    term = "%" + escape_like(normalize_query(q)) + "%"
+    matched = select(FarmProfile.id).join(Farm, FarmProfile.farm_id == Farm.id).where(or_(
+        func.f_unaccent(Farm.name).ilike(term, escape="\\"),
+        func.f_unaccent(Farm.location).ilike(term, escape="\\"),
+        func.f_unaccent(FarmProfile.description).ilike(term, escape="\\"),
+        func.f_unaccent(FarmProfile.specialties).ilike(term, escape="\\"),
+    ))
+    return matched, literal(0).label("rank")
+
+
+async def search_public_farms(db: AsyncSession, q: str, skip: int, limit: int):
+    """Retourne [(profile, farm, user, rank)] des fermes publiques, les plus pertinentes d'abord."""
+    query = select(FarmProfile, Farm, User)\
+        .join(Farm, FarmProfile.farm_id == Farm.id)\
+        .join(User, Farm.user_id == User.id)\
+        .where(FarmProfile.is_public == True, Farm.id.not_in(farm_deletion_service.active_farm_ids()))
+
+    if not q or not q.strip():
+        query = query.add_columns(literal(0).label("rank"))\
+            .order_by(FarmProfile.created_at.desc(), FarmProfile.id.desc())
+    else:
+        if db.bind.dialect.name == "postgresql":
+            matched, rank = _postgres_search(q)
+        else:
+            matched, rank = _fallback_search(q)
+        matched = matched.subquery("matched")
+        query = query.join(matched, matched.c.id == FarmProfile.id).add_columns(rank)\
+            .order_by(rank.desc(), FarmProfile.id.desc())
+
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.all()
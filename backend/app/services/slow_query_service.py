@@ -0,0 +1,210 @@
+"""
+Journal des requêtes SQL lentes (au-delà de SLOW_QUERY_THRESHOLD_MS).
+
+Alimenté par les événements SQLAlchemy posés par metrics_service.instrument_engine :
+chaque requête lente est gardée avec ses paramètres et la route HTTP qui l'a
+lancée, dans un tampon circulaire de SLOW_QUERY_LOG_SIZE entrées par worker
+(lu par GET /admin/slow-queries, vidé par POST /admin/slow-queries/clear).
+
+Échantillonnage : sur PostgreSQL, une fraction SLOW_QUERY_EXPLAIN_SAMPLE_RATE des
+SELECT lents est rejouée avec EXPLAIN (ANALYZE, BUFFERS) sur une autre connexion,
+hors de la requête HTTP, et le plan est ajouté à l'entrée. ANALYZE exécute la
+requête une seconde fois : un seul EXPLAIN à la fois, jamais sur une écriture,
+dans une transaction annulée et avec un statement_timeout.
+"""
+import asyncio
+import itertools
+import logging
+import random
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_TIMEOUT_MS = 10000
+# Option d'exécution : requête jamais journalisée (les EXPLAIN eux-mêmes)
+NOT_LOGGED = {"slow_query_log": False}
+MAX_PARAM_LENGTH = 200
+SENSITIVE_PARAM = re.compile(r"password|token|secret", re.IGNORECASE)
+# Un SELECT (ou WITH) peut cacher une écriture dans une CTE : EXPLAIN ANALYZE l'exécuterait
+WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|CREATE|DROP|ALTER|FOR\s+UPDATE)\b", re.IGNORECASE)
+
+_entries: deque = deque(maxlen=max(settings.SLOW_QUERY_LOG_SIZE, 1))
+_lock = threading.Lock()
+_ids = itertools.count(1)
+_explain_in_flight = False
+_explain_executor: Optional[ThreadPoolExecutor] = None
+_explain_tasks: set = set()  # référence aux tâches asyncio en cours (sinon ramassées par le GC)
+_counters = {"recorded": 0, "explained": 0, "explain_skipped": 0, "explain_failed": 0}
+
+
+class _OneLine:
+    """Requête sur une ligne, formatée seulement si le message de log est écrit."""
+
+    def __init__(self, statement: str):
+        self.statement = statement
+
+    def __str__(self) -> str:
+        return " ".join(self.statement[:1000].split())
+
+
+def is_slow(elapsed: float) -> bool:
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    return threshold > 0 and elapsed * 1000 >= threshold
+
+
+def _format_params(statement: str, parameters, executemany: bool):
+    """Paramètres lisibles et bornés ; les mots de passe / jetons sont masqués."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = _format_params(statement, parameters[0], False) if parameters else None
+        return {"rows": len(parameters), "first": first}
+
+    def short(value):
+        text = repr(value)
+        return text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + "…"
+
+    if isinstance(parameters, dict):
+        return {
+            key: "***" if SENSITIVE_PARAM.search(str(key)) else short(value)
+            for key, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        # Paramètres positionnels ($1, ?) : pas de nom, on masque tout si une écriture touche un secret
+        if SENSITIVE_PARAM.search(statement) and not statement.lstrip().upper().startswith("SELECT"):
+            return ["***"] * len(parameters)
+        return [short(value) for value in parameters]
+    return short(parameters)
+
+
+def _explainable(statement: str, executemany: bool) -> bool:
+    from app.database import engine
+
+    if executemany or engine.dialect.name != "postgresql":
+        return False
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return head in ("SELECT", "WITH") and not WRITE_KEYWORDS.search(statement)
+
+
+def record(engine_name: str, statement: str, parameters, elapsed: float, executemany: bool, request_stats) -> dict:
+    """Enregistrer une requête lente (appelé depuis after_cursor_execute)."""
+    entry = {
+        "id": next(_ids),
+        "at": datetime.utcnow().isoformat() + "Z",
+        "duration_ms": round(elapsed * 1000, 2),
+        "engine": engine_name,
+        "route": request_stats.route if request_stats is not None else "background",
+        "statement": statement,
+        "parameters": _format_params(statement, parameters, executemany),
+        "explain": None,
+    }
+    with _lock:
+        _entries.append(entry)
+        _counters["recorded"] += 1
+    # Via la file de logging_service : jamais d'écriture bloquante sous le curseur
+    logger.warning("🐢 Slow query %s ms (%s): %.200s", entry["duration_ms"], entry["route"], _OneLine(statement))
+
+    rate = settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+    if rate > 0 and random.random() < rate and _explainable(statement, executemany):
+        _schedule_explain(entry, engine_name, statement, parameters)
+    return entry
+
+
+# ─── EXPLAIN (ANALYZE, BUFFERS) ──────────────────────────────────────────────
+
+def _schedule_explain(entry: dict, engine_name: str, statement: str, parameters) -> None:
+    global _explain_executor, _explain_in_flight
+    with _lock:
+        if _explain_in_flight:
+            # Un EXPLAIN déjà en cours : on ne charge pas plus la base
+            _counters["explain_skipped"] += 1
+            return
+        _explain_in_flight = True
+    entry["explain"] = "pending"
+
+    if engine_name == "async":
+        # Paramètres au format asyncpg ($1...) : rejoués sur le moteur async, dans la boucle
+        try:
+            task = asyncio.get_running_loop().create_task(_explain_async(entry, statement, parameters))
+            _explain_tasks.add(task)
+            task.add_done_callback(_explain_tasks.discard)
+        except RuntimeError:
+            _finish_explain(entry, error="no running event loop")
+        return
+
+    if _explain_executor is None:
+        _explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+    _explain_executor.submit(_explain_sync, entry, statement, parameters)
+
+
+def _explain_sql(statement: str) -> str:
+    return "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + statement
+
+
+def _explain_sync(entry: dict, statement: str, parameters) -> None:
+    from app.database import engine
+
+    try:
+        with engine.connect() as conn:
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}", None, NOT_LOGGED)
+            rows = conn.exec_driver_sql(_explain_sql(statement), parameters, NOT_LOGGED).fetchall()
+            conn.rollback()
+        _finish_explain(entry, plan="\n".join(row[0] for row in rows))
+    except Exception as e:
+        _finish_explain(entry, error=str(e))
+
+
+async def _explain_async(entry: dict, statement: str, parameters) -> None:
+    from app.database import async_engine
+
+    try:
+        async with async_engine.connect() as conn:
+            await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {EXPLAIN_TIMEOUT_MS}", None, NOT_LOGGED)
+            result = await conn.exec_driver_sql(_explain_sql(statement), parameters, NOT_LOGGED)
+            rows = result.fetchall()
+            await conn.rollback()
+        _finish_explain(entry, plan="\n".join(row[0] for row in rows))
+    except Exception as e:
+        _finish_explain(entry, error=str(e))
+
+
+def _finish_explain(entry: dict, plan: Optional[str] = None, error: Optional[str] = None) -> None:
+    global _explain_in_flight
+    with _lock:
+        if error is None:
+            entry["explain"] = plan
+            _counters["explained"] += 1
+        else:
+            entry["explain"] = None
+            entry["explain_error"] = error
+            _counters["explain_failed"] += 1
+        _explain_in_flight = False
+
+
+# ─── Lecture ─────────────────────────────────────────────────────────────────
+
+def entries(limit: Optional[int] = None) -> List[dict]:
+    """Requêtes lentes, les plus récentes d'abord."""
+    with _lock:
+        items = [dict(entry) for entry in reversed(_entries)]
+    return items[:limit] if limit else items
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            **_counters,
+            "buffered": len(_entries),
+            "capacity": _entries.maxlen,
+            "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+            "explain_sample_rate": settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        }
@@ -0,0 +1,56 @@
+"""
+Nombre de lignes estimé par table, sans COUNT(*).
+
+PostgreSQL tient une estimation dans pg_class.reltuples (mise à jour par
+ANALYZE / autovacuum) : la lire coûte une requête sur le catalogue, là où
+COUNT(*) parcourt toute la table. Les valeurs sont relues en tâche de fond
+toutes les TABLE_STATS_REFRESH_INTERVAL secondes et exposées par /metrics.
+Hors PostgreSQL (SQLite en local) : pas d'estimation.
+"""
+import asyncio
+import logging
+from typing import Dict
+from sqlalchemy import text
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ESTIMATES_SQL = text(
+    """
+    SELECT c.relname, c.reltuples
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p')
+    """
+)
+
+# table -> lignes estimées ; réaffecté d'un bloc à chaque rafraîchissement
+estimates: Dict[str, int] = {}
+
+
+def refresh() -> Dict[str, int]:
+    global estimates
+    from app.database import engine
+    from app.models.base import Base
+
+    if engine.dialect.name != "postgresql":
+        return estimates
+    with engine.connect() as conn:
+        rows = conn.execute(ESTIMATES_SQL).all()
+    # reltuples = -1 : table jamais analysée, pas d'estimation
+    estimates = {
+        name: int(reltuples) for name, reltuples in rows
+        if name in Base.metadata.tables and reltuples >= 0
+    }
+    return estimates
+
+
+async def refresher_loop(interval: int = None) -> None:
+    """Tâche de fond : relit les estimations (au démarrage, puis toutes les `interval` s)."""
+    interval = interval or settings.TABLE_STATS_REFRESH_INTERVAL
+    while True:
+        try:
+            await asyncio.to_thread(refresh)
+        except Exception as e:
+            logger.warning("⚠️ Table size estimates refresh failed: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,169 @@
+"""
+Fil d'actualité en fan-out à l'écriture.
+
+- create_farm_post recopie le post dans le fil de chaque abonné (fan_out_post)
+- follow / unfollow remplissent ou vident le fil (backfill_timeline / prune_timeline)
+- les auteurs au-delà de FEED_FANOUT_MAX_FOLLOWERS ("célébrités") ne sont pas recopiés :
+  leurs posts sont lus à la demande et fusionnés au moment de la lecture (read_timeline)
+
+Une fois marqué célébrité, un auteur le reste : ses anciens posts ne sont plus
+dans les fils et ne seraient plus visibles s'il repassait sous le seuil.
+"""
+from typing import Optional
+from sqlalchemy import select, delete, insert, literal, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models import Farm, FarmPost, User, UserFollowing, TimelineEntry, CelebrityAuthor
+from app.services import farm_deletion_service
+from app.services.pagination import apply_keyset, split_page
+
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _is_celebrity(db: Session, author_id: int) -> bool:
+    return db.get(CelebrityAuthor, author_id) is not None
+
+
+def _insert_entries(db: Session, rows):
+    """
+    INSERT ... SELECT dans timeline_entries qui ignore les couples (user_id, post_id)
+    déjà présents : réabonnement, nouvelle tentative ou fan-out concurrent d'un backfill.
+    """
+    dialect_insert = _DIALECT_INSERTS.get(db.get_bind().dialect.name)
+    columns = ["user_id", "post_id", "author_id", "created_at"]
+    if dialect_insert is None:
+        return insert(TimelineEntry).from_select(columns, rows)
+    return dialect_insert(TimelineEntry).from_select(columns, rows)\
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+
+
+def fan_out_post(db: Session, post: FarmPost, author_id: int) -> int:
+    """
+    Recopier un nouveau post dans le fil des abonnés de son auteur (un seul INSERT ... SELECT).
+    Le post doit être flushé (id et created_at connus). Ne commit pas.
+    Retourne le nombre d'abonnés servis, 0 si l'auteur est lu à la demande.
+    """
+    if _is_celebrity(db, author_id):
+        return 0
+
+    follower_count = db.query(User.followers_count).filter(User.id == author_id).scalar() or 0
+    if follower_count > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        db.add(CelebrityAuthor(user_id=author_id, follower_count=follower_count))
+        return 0
+    if follower_count == 0:
+        return 0
+
+    followers = select(
+        UserFollowing.follower_id,
+        literal(post.id),
+        literal(author_id),
+        literal(post.created_at, FarmPost.created_at.type),
+    ).where(UserFollowing.following_id == author_id)
+    db.execute(_insert_entries(db, followers))
+    return follower_count
+
+
+def backfill_timeline(db: Session, follower_id: int, author_id: int) -> None:
+    """Copier les posts récents d'un auteur dans le fil d'un nouvel abonné. Ne commit pas."""
+    if _is_celebrity(db, author_id):
+        return
+    # Repartir de zéro pour ce couple : évite les doublons si un ancien abonnement a laissé des lignes
+    prune_timeline(db, follower_id, author_id)
+    recent_posts = select(
+        literal(follower_id),
+        FarmPost.id,
+        FarmPost.user_id,
+        FarmPost.created_at,
+    ).where(FarmPost.user_id == author_id)\
+        .order_by(FarmPost.created_at.desc(), FarmPost.id.desc())\
+        .limit(settings.FEED_BACKFILL_POSTS)
+    db.execute(_insert_entries(db, recent_posts))
+
+
+def prune_timeline(db: Session, follower_id: int, author_id: int) -> None:
+    """Retirer les posts d'un auteur du fil d'un utilisateur (désabonnement). Ne commit pas."""
+    db.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == follower_id,
+            TimelineEntry.author_id == author_id,
+        )
+    )
+
+
+def rebuild_timelines(db: Session, per_user: Optional[int] = None) -> None:
+    """
+    Reconstruire tous les fils depuis user_following (imports en masse, jeux de
+    données de benchmark) : chaque fil reçoit les `per_user` posts les plus récents
+    de ses abonnements (FEED_BACKFILL_POSTS par défaut). Les auteurs au-delà de
+    FEED_FANOUT_MAX_FOLLOWERS sont marqués célébrités et lus à la demande.
+    Les compteurs d'abonnés doivent être à jour (reconcile_follow_counts). Ne commit pas.
+    """
+    per_user = per_user or settings.FEED_BACKFILL_POSTS
+    db.execute(insert(CelebrityAuthor).from_select(
+        ["user_id", "follower_count"],
+        select(User.id, User.followers_count).where(
+            User.followers_count > settings.FEED_FANOUT_MAX_FOLLOWERS,
+            User.id.not_in(select(CelebrityAuthor.user_id)),
+        ),
+    ))
+    db.execute(delete(TimelineEntry))
+    ranked = select(
+        UserFollowing.follower_id,
+        FarmPost.id.label("post_id"),
+        FarmPost.user_id.label("author_id"),
+        FarmPost.created_at,
+        func.row_number().over(
+            partition_by=UserFollowing.follower_id,
+            order_by=(FarmPost.created_at.desc(), FarmPost.id.desc()),
+        ).label("rn"),
+    ).select_from(UserFollowing)\
+        .join(FarmPost, FarmPost.user_id == UserFollowing.following_id)\
+        .where(UserFollowing.following_id.not_in(select(CelebrityAuthor.user_id)))\
+        .subquery()
+    db.execute(insert(TimelineEntry).from_select(
+        ["user_id", "post_id", "author_id", "created_at"],
+        select(ranked.c.follower_id, ranked.c.post_id, ranked.c.author_id, ranked.c.created_at)
+        .where(ranked.c.rn <= per_user),
+    ))
+
+
+async def read_timeline(db: AsyncSession, user_id: int, cursor: Optional[str], limit: int, skip: int = 0):
+    """
+    Lire une page du fil : parcours d'index sur timeline_entries, fusionné avec
+    les posts des célébrités suivies. Retourne ([(post, farm, user)], next_cursor).
+    """
+    # Sans curseur, `skip` (anciens clients) est appliqué après fusion des deux sources
+    window = limit if cursor else limit + skip
+
+    materialized = select(FarmPost, Farm, User)\
+        .select_from(TimelineEntry)\
+        .join(FarmPost, FarmPost.id == TimelineEntry.post_id)\
+        .join(Farm, FarmPost.farm_id == Farm.id)\
+        .join(User, Farm.user_id == User.id)\
+        .where(TimelineEntry.user_id == user_id, FarmPost.farm_id.not_in(farm_deletion_service.active_farm_ids()))
+    result = await db.execute(apply_keyset(materialized, TimelineEntry.created_at, TimelineEntry.post_id, cursor, window))
+    rows = list(result.all())
+
+    celebrity_ids = (await db.scalars(
+        select(CelebrityAuthor.user_id)
+        .join(UserFollowing, UserFollowing.following_id == CelebrityAuthor.user_id)
+        .where(UserFollowing.follower_id == user_id)
+    )).all()
+    if celebrity_ids:
+        # Filtre sur farm_posts.user_id : parcours de ix_farm_posts_user_created_id par auteur,
+        # les jointures ne servent qu'à charger la ferme et l'auteur
+        on_read = select(FarmPost, Farm, User)\
+            .join(Farm, FarmPost.farm_id == Farm.id)\
+            .join(User, FarmPost.user_id == User.id)\
+            .where(FarmPost.user_id.in_(celebrity_ids), FarmPost.farm_id.not_in(farm_deletion_service.active_farm_ids()))
+        result = await db.execute(apply_keyset(on_read, FarmPost.created_at, FarmPost.id, cursor, window))
+        seen = {row[0].id for row in rows}
+        rows.extend(row for row in result.all() if row[0].id not in seen)
+        rows.sort(key=lambda row: (row[0].created_at, row[0].id), reverse=True)
+
+    if not cursor and skip:
+        rows = rows[skip:]
+    return split_page(rows[:limit + 1], limit, lambda row: (row[0].created_at, row[0].id))
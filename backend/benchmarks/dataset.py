@@ -0,0 +1,29 @@
+"""
+Synthetic dataset for the endpoint benchmarks.
+
+Full scale (factor 1.0): 10k users, 50k farms, 1M activities, 200k posts and
+500k follow edges, generated by app.seeding (the same generator as
+``python seed.py``) with correlated crops, harvests, sales and market prices.
+The same seed always produces the same rows, so results from two runs are
+comparable.
+"""
+from typing import Callable, Dict
+
+from app import seeding
+
+FULL_SCALE = seeding.DEFAULT_COUNTS
+PASSWORD = seeding.DEFAULT_PASSWORD
+VERSION = seeding.DATASET_VERSION
+
+
+def scale_counts(factor: float) -> Dict[str, int]:
+    return seeding.scaled_counts(factor)
+
+
+def is_seeded(engine) -> bool:
+    return not seeding.is_empty(engine)
+
+
+def load(engine, factor: float = 1.0, seed: int = 42, log: Callable[[str], None] = print) -> Dict[str, int]:
+    """Insert the dataset into an empty, migrated database. Returns row counts per table."""
+    return seeding.seed(engine, scale_counts(factor), seed, log=log)
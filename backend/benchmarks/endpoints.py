@@ -0,0 +1,266 @@
+"""
+Endpoint benchmark: the hot API routes served in-process against a seeded database.
+
+The app is driven through httpx's ASGI transport, so the whole request path
+(middleware, routing, validation, SQL, serialization) is measured but no
+network or uvicorn process is involved. Each scenario sends a fixed number of
+requests at a fixed concurrency and reports p50/p95/p99 latency, throughput
+and SQL statements per request (from metrics_service). Latencies only cover
+successful responses; any error response makes the run exit with status 1
+(after the results are written). Results are written as JSON; pass a previous
+file with --compare to print the differences.
+
+The dataset (benchmarks/dataset.py) is seeded on first use and reused after:
+SQLite by default (a file in the temp directory, one per dataset version, scale
+and seed), or any migrated Postgres database given with --database-url.
+
+Run from backend/:
+    python -m benchmarks.endpoints --scale 0.1 --out benchmarks/results/baseline.json
+    python -m benchmarks.endpoints --scale 0.1 --compare benchmarks/results/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# name -> (method, path builder, bearer token?, share of --requests, share of --concurrency)
+SCENARIOS = {
+    "feed": ("GET", lambda rng, ids: "/api/farm-network/feed?limit=20", True, 1.0, 1.0),
+    "public_farms": ("GET", lambda rng, ids: "/api/farm-network/public-farms?limit=20", False, 1.0, 1.0),
+    "farm_details": ("GET", lambda rng, ids: f"/api/farm-network/details/{rng.choice(ids['public_farms'])}", False, 1.0, 1.0),
+    "activities_by_farm": ("GET", lambda rng, ids: f"/api/activities/farm/{rng.choice(ids['farms'])}", False, 1.0, 1.0),
+    "user_profile": ("GET", lambda rng, ids: f"/api/users/{rng.choice(ids['users'])}/profile", False, 1.0, 1.0),
+    "market_prices": ("GET", lambda rng, ids: "/api/market/prices", False, 1.0, 1.0),
+    # argon2 verification: a tenth of the requests, at most as many in flight as the pool can queue
+    "login": ("POST", lambda rng, ids: "/api/auth/login", False, 0.1, 0.5),
+}
+WARMUP_REQUESTS = 5
+SAMPLE_IDS = 1000
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def prepare_database(factor: float, seed: int, reseed: bool) -> None:
+    from app.database import engine
+    from app.migrations import run_migrations
+    from benchmarks import dataset
+
+    run_migrations(engine, log=lambda *_: None)
+    if dataset.is_seeded(engine) and not reseed:
+        print("Reusing seeded database")
+        return
+    if dataset.is_seeded(engine):
+        sys.exit("--reseed needs an empty database (the default SQLite file is recreated automatically)")
+    print(f"Seeding dataset at scale {factor}: {dataset.scale_counts(factor)}")
+    dataset.load(engine, factor, seed)
+
+
+def sample_ids() -> Dict[str, list]:
+    from sqlalchemy import select
+    from app.database import SessionLocal
+    from app.models import Farm, FarmProfile, User, UserFollowing
+
+    db = SessionLocal()
+    try:
+        followers = db.scalars(select(UserFollowing.follower_id).distinct().limit(SAMPLE_IDS)).all()
+        users = db.execute(select(User.id, User.email).limit(SAMPLE_IDS)).all()
+        return {
+            "followers": list(followers),
+            "users": [row.id for row in users],
+            "emails": [row.email for row in users],
+            "farms": list(db.scalars(select(Farm.id).limit(SAMPLE_IDS)).all()),
+            "public_farms": list(db.scalars(
+                select(FarmProfile.farm_id).where(FarmProfile.is_public == True).limit(SAMPLE_IDS)  # noqa: E712
+            ).all()),
+        }
+    finally:
+        db.close()
+
+
+async def run_scenario(client, name: str, build: Callable, method: str, auth: bool,
+                       ids: dict, requests: int, concurrency: int, rng: random.Random) -> dict:
+    from app.services import jwt_service, metrics_service
+    from benchmarks.dataset import PASSWORD
+
+    def make_request():
+        kwargs = {}
+        if auth:
+            token = jwt_service.create_access_token({"user_id": rng.choice(ids["followers"])})
+            kwargs["headers"] = {"Authorization": f"Bearer {token}"}
+        if name == "login":
+            kwargs["json"] = {"email": rng.choice(ids["emails"]), "password": PASSWORD}
+        return method, build(rng, ids), kwargs
+
+    latencies: List[float] = []
+    errors: Counter = Counter()  # status code -> count
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def one(request, record: bool = True):
+        req_method, path, kwargs = request
+        async with limiter:
+            start = time.perf_counter()
+            response = await client.request(req_method, path, **kwargs)
+            elapsed = time.perf_counter() - start
+        if not record:
+            return
+        # An error response is not a measurement of the endpoint: counted, never timed
+        if response.status_code >= 400:
+            errors[response.status_code] += 1
+        else:
+            latencies.append(elapsed * 1000)
+
+    await asyncio.gather(*(one(make_request(), record=False) for _ in range(WARMUP_REQUESTS)))
+
+    requests_to_send = [make_request() for _ in range(requests)]
+    queries_before = metrics_service.db_queries.total()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(request) for request in requests_to_send))
+    wall = time.perf_counter() - start
+    queries = metrics_service.db_queries.total() - queries_before
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(errors.values()),
+        "error_statuses": {str(status): count for status, count in sorted(errors.items())},
+        "throughput_rps": round(len(latencies) / wall, 1),
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+        "p50_ms": round(_percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(_percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 99), 2) if latencies else None,
+        "queries_per_request": round(queries / requests, 2),
+    }
+
+
+async def run_all(names: List[str], requests: int, concurrency: int, seed: int) -> Dict[str, dict]:
+    import httpx
+    from app.main import app, include_routes
+    from app.services import password_service
+
+    # Routes only: the startup background jobs (news refresh, reconciliations) would skew timings
+    include_routes()
+    ids = sample_ids()
+    rng = random.Random(seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name in names:
+            method, build, auth, request_share, concurrency_share = SCENARIOS[name]
+            n = max(1, int(requests * request_share))
+            c = max(1, int(concurrency * concurrency_share))
+            results[name] = await run_scenario(client, name, build, method, auth, ids, n, c, rng)
+            r = results[name]
+            if r["p50_ms"] is None:
+                print(f"  {name:<20} every request failed: {r['error_statuses']}")
+                continue
+            print(f"  {name:<20} {r['throughput_rps']:8.1f} req/s   p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}"
+                  f"  p99 {r['p99_ms']:8.2f} ms   {r['queries_per_request']:6.2f} queries/req"
+                  + (f"   {r['errors']} errors {r['error_statuses']}" if r["errors"] else ""))
+    password_service.shutdown()
+    return results
+
+
+def compare(results: Dict[str, dict], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["scenarios"]
+    print(f"\nCompared with {baseline_path} (negative latency / positive throughput = faster):")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or current["p50_ms"] is None:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            if before.get(key):
+                deltas.append(f"{key} {100 * (current[key] - before[key]) / before[key]:+6.1f}%")
+        deltas.append(f"queries/req {current['queries_per_request'] - before['queries_per_request']:+.2f}")
+        print(f"  {name:<20} " + "   ".join(deltas))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="dataset size, 1.0 = 10k users / 1M activities")
+    parser.add_argument("--database-url", help="migrated database to use (default: SQLite file in the temp dir)")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reseed", action="store_true", help="recreate the default SQLite dataset")
+    parser.add_argument("--out", help="JSON results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="previous JSON results to compare against")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    from benchmarks.dataset import VERSION  # app.seeding only: no settings read yet
+
+    database_url = args.database_url
+    if not database_url:
+        # The dataset version is in the name: a file seeded by an older generator is never reused
+        path = os.path.join(tempfile.gettempdir(), f"mbaymi_bench_v{VERSION}_{args.scale:g}_{args.seed}.db")
+        if args.reseed and os.path.exists(path):
+            os.remove(path)
+        database_url = f"sqlite:///{path}"
+    # Settings and engines are built at import time: configure before importing app
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", secrets.token_hex(32))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "0")
+
+    prepare_database(args.scale, args.seed, args.reseed and bool(args.database_url))
+    print(f"{len(names)} scenarios, {args.requests} requests each, concurrency {args.concurrency}")
+    results = asyncio.run(run_all(names, args.requests, args.concurrency, args.seed))
+
+    from sqlalchemy.engine import make_url
+    report = {
+        "meta": {
+            "date": datetime.utcnow().isoformat() + "Z",
+            "commit": _git_commit(),
+            "database": make_url(database_url).get_backend_name(),
+            "scale": args.scale,
+            "seed": args.seed,
+            "dataset_version": VERSION,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+        },
+        "scenarios": results,
+    }
+    out = args.out or os.path.join("benchmarks", "results", datetime.utcnow().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+    if args.compare:
+        compare(results, args.compare)
+    failed = {name: r["error_statuses"] for name, r in results.items() if r["errors"]}
+    if failed:
+        sys.exit(f"Error responses (not counted in the latencies): {failed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Login spike benchmark: argon2 verification inline in the anyio threadpool
+(the old sync handlers) vs. in password_service's process pool.
+
+A burst of concurrent logins is verified while a probe keeps running a
+trivial threadpool task every 10 ms, standing in for the other (sync)
+endpoints served by the same worker. Reported: logins per second and the
+probe's latency, i.e. how long an unrelated request waits for a thread.
+
+Run from backend/:  python -m benchmarks.login_throughput [logins] [concurrency]
+No database needed. Cost parameters come from ARGON2_* / PASSWORD_HASH_WORKERS.
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import anyio.to_thread
+
+from app.services import password_service
+
+PASSWORD = "mot-de-passe-agriculteur"
+PROBE_INTERVAL = 0.01
+
+
+async def inline_verify(context, hashed: str):
+    """Before: verification in the request's threadpool thread."""
+    return await anyio.to_thread.run_sync(context.verify_and_update, PASSWORD, hashed)
+
+
+async def pool_verify(context, hashed: str):
+    """After: the handler awaits the process pool."""
+    return await password_service.verify_password(PASSWORD, hashed)
+
+
+async def probe(latencies: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await anyio.to_thread.run_sync(lambda: None)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+
+
+async def run_case(verify, context, hashed: str, logins: int, concurrency: int) -> None:
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with limiter:
+            valid, _ = await verify(context, hashed)
+            assert valid
+
+    latencies: list = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(latencies, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"  {verify.__name__:<14} {logins / elapsed:7.1f} logins/s"
+        f"   probe p50 {statistics.median(latencies):7.2f} ms   p99 {p99:7.2f} ms   max {latencies[-1]:7.2f} ms"
+    )
+
+
+async def main(logins: int = 200, concurrency: int = 50) -> None:
+    params = password_service.argon2_params()
+    context = password_service.make_context(params)
+    hashed = context.hash(PASSWORD)
+    # Warm the pool up (process start-up is not part of a login)
+    await password_service.verify_password(PASSWORD, hashed)
+
+    print(f"{logins} logins, {concurrency} concurrent, argon2 {params}, "
+          f"{password_service.stats()['workers']} pool workers")
+    for verify in (inline_verify, pool_verify):
+        await run_case(verify, context, hashed, logins, concurrency)
+    password_service.shutdown()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(main(*args))
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark: cost of serializing 1,000 farms (3 photos each) to JSON bytes.
+
+Compares the old path (SQLAlchemy __dict__ copies walked by jsonable_encoder,
+then json.dumps) with typed response models validated once with
+from_attributes and dumped by pydantic-core, and with orjson.
+
+Run from backend/:  python -m benchmarks.serialization [rows] [repeat]
+No database needed: ORM objects are built in memory.
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models import Farm
+from app.models.photo import FarmPhoto
+from app.schemas.schemas import FarmResponse
+from app.responses import JSONBytesResponse
+
+FARMS_ADAPTER = TypeAdapter(List[FarmResponse])
+
+
+def make_farms(rows: int) -> list:
+    now = datetime.utcnow()
+    farms = []
+    for i in range(rows):
+        farm = Farm(
+            id=i, user_id=i % 50, name=f"Ferme {i}", location="Thiès, Sénégal",
+            size_hectares=2.5, soil_type="sableux", image_url=f"https://cdn.example/{i}.jpg",
+            latitude=14.79, longitude=-16.92, created_at=now, updated_at=now,
+        )
+        farm.photos = [
+            FarmPhoto(id=i * 3 + k, farm_id=i, image_url=f"https://cdn.example/{i}-{k}.jpg", created_at=now)
+            for k in range(3)
+        ]
+        farms.append(farm)
+    return farms
+
+
+def dict_copy_json(farms) -> bytes:
+    """Avant : __dict__.copy() + jsonable_encoder + json.dumps (JSONResponse par défaut)."""
+    out = []
+    for f in farms:
+        d = f.__dict__.copy()
+        d["photos"] = [{"id": p.id, "image_url": p.image_url} for p in f.photos]
+        out.append(d)
+    return json.dumps(jsonable_encoder(out), ensure_ascii=False).encode("utf-8")
+
+
+def dict_copy_orjson(farms) -> bytes:
+    """__dict__.copy() + jsonable_encoder + orjson : seul le dumps final change."""
+    out = []
+    for f in farms:
+        d = f.__dict__.copy()
+        d["photos"] = [{"id": p.id, "image_url": p.image_url} for p in f.photos]
+        out.append(d)
+    return orjson.dumps(jsonable_encoder(out))
+
+
+def model_dump_json(farms) -> bytes:
+    """Après : modèles Pydantic (from_attributes) sérialisés par pydantic-core (response_model)."""
+    return FARMS_ADAPTER.dump_json(FARMS_ADAPTER.validate_python(farms, from_attributes=True))
+
+
+def model_orjson(farms) -> bytes:
+    """Après, corps construit à la main : modèles -> JSONBytesResponse (orjson)."""
+    models = FARMS_ADAPTER.validate_python(farms, from_attributes=True)
+    return JSONBytesResponse(FARMS_ADAPTER.dump_python(models)).body
+
+
+CASES = [dict_copy_json, dict_copy_orjson, model_dump_json, model_orjson]
+
+
+def main(rows: int = 1000, repeat: int = 20) -> None:
+    farms = make_farms(rows)
+    print(f"Serializing {rows} farms x 3 photos, best of {repeat} runs")
+    baseline = None
+    for case in CASES:
+        payload = case(farms)
+        best = min(timeit.repeat(lambda: case(farms), number=1, repeat=repeat))
+        per_1000 = best * 1000 / rows * 1000
+        baseline = baseline or per_1000
+        print(f"  {case.__name__:<18} {per_1000:8.2f} ms / 1000 rows  x{baseline / per_1000:5.1f}  {len(payload):>8} bytes")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -1,40 +1,62 @@
 """
 Script to run database migrations
-Run with: python migrate.py
+Run with: python migrate.py            (apply pending versioned migrations)
+          python migrate.py status     (list migrations and whether they are applied)
+          python migrate.py file.sql   (run a one-off SQL file, legacy)
 """
 import os
 import sys
 from dotenv import load_dotenv
-import psycopg2
 
 load_dotenv()
 
 def run_migration(migration_file: str):
     """Execute a SQL migration file"""
+    import psycopg2
+
     db_url = os.getenv("DATABASE_URL")
     if not db_url:
         print("❌ DATABASE_URL not set in environment variables")
         sys.exit(1)
-    
+
     try:
         conn = psycopg2.connect(db_url)
         cursor = conn.cursor()
-        
+
         # Read and execute SQL file
         with open(migration_file, 'r') as f:
             sql_content = f.read()
-        
+
         print(f"📝 Running migration: {migration_file}")
         cursor.execute(sql_content)
         conn.commit()
         print(f"✅ Migration executed successfully")
-        
+
         cursor.close()
         conn.close()
     except Exception as e:
         print(f"❌ Migration failed: {e}")
         sys.exit(1)
 
+def run_versioned_migrations():
+    """Apply pending migrations from sql/migrations (safe to run from several processes)"""
+    from app.migrations import run_migrations
+    try:
+        run_migrations()
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
+
+def print_status():
+    from app.migrations import migration_status
+    for version, name, applied in migration_status():
+        print(f"{'✅' if applied else '⏳'} {version:04d}_{name}")
+
 if __name__ == "__main__":
-    migration_file = sys.argv[1] if len(sys.argv) > 1 else "sql/add_crop_image_url.sql"
-    run_migration(migration_file)
+    arg = sys.argv[1] if len(sys.argv) > 1 else None
+    if arg is None:
+        run_versioned_migrations()
+    elif arg == "status":
+        print_status()
+    else:
+        run_migration(arg)
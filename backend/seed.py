@@ -0,0 +1,57 @@
+"""
+Script to fill a development database with realistic generated data
+Run with: python seed.py                    (full scale: 10k users, 50k farms, 1M activities...)
+          python seed.py --scale 0.1        (a tenth of every count)
+          python seed.py --scale 10 --seed 7 --activities 5000000
+
+Pending migrations are applied first. The database must be empty (no users).
+On PostgreSQL rows are written with COPY FROM STDIN; see app/seeding.py.
+Every generated user can log in with the password printed at the end.
+"""
+import argparse
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main():
+    from app import seeding
+
+    parser = argparse.ArgumentParser(description="Seed the database with generated data")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier applied to every default count")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (same seed, same rows)")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="rows per COPY / INSERT batch")
+    parser.add_argument("--password", default=seeding.DEFAULT_PASSWORD, help="password of every generated user")
+    for name, count in seeding.DEFAULT_COUNTS.items():
+        parser.add_argument(f"--{name}", type=int, help=f"number of {name} (default {count} x scale)")
+    args = parser.parse_args()
+
+    counts = seeding.scaled_counts(args.scale)
+    counts.update({name: getattr(args, name) for name in seeding.DEFAULT_COUNTS if getattr(args, name)})
+
+    from app.database import engine
+    from app.migrations import run_migrations
+    try:
+        run_migrations(engine)
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
+
+    if not seeding.is_empty(engine):
+        print("❌ The database already has users: seed an empty database")
+        sys.exit(1)
+
+    print(f"🌱 Seeding {engine.url.get_backend_name()} (seed {args.seed}): {counts}")
+    start = time.perf_counter()
+    try:
+        written = seeding.seed(engine, counts, args.seed, args.batch_size, args.password)
+    except Exception as e:
+        print(f"❌ Seeding failed: {e}")
+        sys.exit(1)
+    print(f"✅ {sum(written.values()):,} rows in {time.perf_counter() - start:.1f} s. Password: {args.password}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+-- Columns previously added at every boot by init_db() and by /admin/migrate
+ALTER TABLE farms ADD COLUMN IF NOT EXISTS image_url VARCHAR(500);
+ALTER TABLE farms ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION;
+ALTER TABLE farms ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION;
+ALTER TABLE crops ADD COLUMN IF NOT EXISTS image_url VARCHAR(500);
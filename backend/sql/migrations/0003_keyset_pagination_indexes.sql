@@ -0,0 +1,4 @@
+-- Composite indexes backing cursor (keyset) pagination on (created_at, id)
+-- Applied by the versioned runner: python migrate.py
+CREATE INDEX IF NOT EXISTS ix_farm_posts_farm_created_id ON farm_posts (farm_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_farm_profiles_public_created_id ON farm_profiles (is_public, created_at, id);
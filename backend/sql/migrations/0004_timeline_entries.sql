@@ -0,0 +1,26 @@
+-- Materialized home timeline (fan-out on write) for /api/farm-network/feed
+-- Applied by the versioned runner: python migrate.py
+CREATE TABLE IF NOT EXISTS timeline_entries (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    post_id INTEGER NOT NULL REFERENCES farm_posts(id) ON DELETE CASCADE,
+    author_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, post_id)
+);
+CREATE INDEX IF NOT EXISTS ix_timeline_entries_user_created_post ON timeline_entries (user_id, created_at, post_id);
+CREATE INDEX IF NOT EXISTS ix_timeline_entries_author_id ON timeline_entries (author_id);
+
+CREATE TABLE IF NOT EXISTS celebrity_authors (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    follower_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Backfill existing follow edges so current feeds are not empty after deploy
+INSERT INTO timeline_entries (user_id, post_id, author_id, created_at)
+SELECT DISTINCT uf.follower_id, p.id, f.user_id, p.created_at
+FROM user_following uf
+JOIN farms f ON f.user_id = uf.following_id
+JOIN farm_posts p ON p.farm_id = f.id
+WHERE p.created_at IS NOT NULL
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,16 @@
+-- Indexes for the hot lookups (feed, follows, activity timelines, crops per farm, market prices)
+
+-- farm_posts(farm_id, created_at) is covered by ix_farm_posts_farm_created_id (0003)
+
+-- Remove duplicate follow edges before enforcing uniqueness (keep the oldest row)
+DELETE FROM user_following a
+USING user_following b
+WHERE a.follower_id = b.follower_id
+  AND a.following_id = b.following_id
+  AND a.id > b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_user_following_follower_following ON user_following (follower_id, following_id);
+CREATE INDEX IF NOT EXISTS ix_user_following_following_id ON user_following (following_id);
+
+CREATE INDEX IF NOT EXISTS ix_activities_farm_activity_date ON activities (farm_id, activity_date);
+CREATE INDEX IF NOT EXISTS ix_crops_farm_id ON crops (farm_id);
+CREATE INDEX IF NOT EXISTS ix_market_prices_product_region_date ON market_prices (product_name, region, price_date);
@@ -0,0 +1,60 @@
+-- Full-text + trigram search for public farm profiles (/api/farm-network/profiles/search)
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() is only STABLE; an IMMUTABLE wrapper is required to use it in index expressions
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+ALTER TABLE farm_profiles ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+-- Weighted document: farm name (A), specialties and location (B), description (C)
+CREATE OR REPLACE FUNCTION farm_profile_search_vector(p_farm_id integer, p_description text, p_specialties text)
+RETURNS tsvector
+LANGUAGE sql STABLE
+AS $$
+    SELECT setweight(to_tsvector('french', f_unaccent(coalesce(f.name, ''))), 'A')
+        || setweight(to_tsvector('french', f_unaccent(replace(coalesce(p_specialties, ''), ',', ' '))), 'B')
+        || setweight(to_tsvector('french', f_unaccent(coalesce(f.location, ''))), 'B')
+        || setweight(to_tsvector('french', f_unaccent(coalesce(p_description, ''))), 'C')
+    FROM farms f
+    WHERE f.id = p_farm_id
+$$;
+
+CREATE OR REPLACE FUNCTION farm_profiles_search_vector_trigger() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.search_vector := farm_profile_search_vector(NEW.farm_id, NEW.description, NEW.specialties);
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_farm_profiles_search_vector ON farm_profiles;
+CREATE TRIGGER trg_farm_profiles_search_vector
+    BEFORE INSERT OR UPDATE OF farm_id, description, specialties ON farm_profiles
+    FOR EACH ROW EXECUTE FUNCTION farm_profiles_search_vector_trigger();
+
+-- Renaming or moving a farm refreshes its profile document
+CREATE OR REPLACE FUNCTION farms_search_vector_trigger() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE farm_profiles
+    SET search_vector = farm_profile_search_vector(farm_id, description, specialties)
+    WHERE farm_id = NEW.id;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_farms_search_vector ON farms;
+CREATE TRIGGER trg_farms_search_vector
+    AFTER UPDATE OF name, location ON farms
+    FOR EACH ROW EXECUTE FUNCTION farms_search_vector_trigger();
+
+UPDATE farm_profiles SET search_vector = farm_profile_search_vector(farm_id, description, specialties);
+
+CREATE INDEX IF NOT EXISTS ix_farm_profiles_search_vector ON farm_profiles USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS ix_farms_name_trgm ON farms USING GIN (f_unaccent(lower(name)) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_farms_location_trgm ON farms USING GIN (f_unaccent(lower(location)) gin_trgm_ops);
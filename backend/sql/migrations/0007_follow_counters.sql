@@ -0,0 +1,12 @@
+-- Maintained follower / following counters (kept up to date by follow/unfollow)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS followers_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS following_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE users u SET
+    followers_count = (SELECT COUNT(*) FROM user_following uf WHERE uf.following_id = u.id),
+    following_count = (SELECT COUNT(*) FROM user_following uf WHERE uf.follower_id = u.id);
+
+-- Farm profiles show their owner's follower count
+UPDATE farm_profiles p SET total_followers = u.followers_count
+FROM users u
+WHERE u.id = p.user_id;
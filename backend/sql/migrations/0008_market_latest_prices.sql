@@ -0,0 +1,51 @@
+-- Latest price per (product, region) for the default market screen
+CREATE TABLE IF NOT EXISTS market_latest_prices (
+    product_name VARCHAR(100) NOT NULL,
+    region VARCHAR(100) NOT NULL,
+    price_id INTEGER NOT NULL,
+    price_per_kg DOUBLE PRECISION,
+    currency VARCHAR(10) DEFAULT 'CFA',
+    price_date TIMESTAMP NOT NULL,
+    source VARCHAR(100),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (product_name, region)
+);
+
+-- Keep it current on every insert/update of market_prices (older readings never overwrite newer ones)
+CREATE OR REPLACE FUNCTION market_prices_latest_trigger() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.price_date IS NULL THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO market_latest_prices (product_name, region, price_id, price_per_kg, currency, price_date, source, updated_at)
+    VALUES (NEW.product_name, NEW.region, NEW.id, NEW.price_per_kg, NEW.currency, NEW.price_date, NEW.source, now())
+    ON CONFLICT (product_name, region) DO UPDATE SET
+        price_id = EXCLUDED.price_id,
+        price_per_kg = EXCLUDED.price_per_kg,
+        currency = EXCLUDED.currency,
+        price_date = EXCLUDED.price_date,
+        source = EXCLUDED.source,
+        updated_at = EXCLUDED.updated_at
+    WHERE (market_latest_prices.price_date, market_latest_prices.price_id) <= (EXCLUDED.price_date, EXCLUDED.price_id);
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_market_prices_latest ON market_prices;
+CREATE TRIGGER trg_market_prices_latest
+    AFTER INSERT OR UPDATE ON market_prices
+    FOR EACH ROW EXECUTE FUNCTION market_prices_latest_trigger();
+
+-- Backfill from existing history
+INSERT INTO market_latest_prices (product_name, region, price_id, price_per_kg, currency, price_date, source, updated_at)
+SELECT DISTINCT ON (product_name, region)
+    product_name, region, id, price_per_kg, currency, price_date, source, now()
+FROM market_prices
+WHERE price_date IS NOT NULL
+ORDER BY product_name, region, price_date DESC, id DESC
+ON CONFLICT (product_name, region) DO NOTHING;
+
+-- Region-only history queries (/prices/history?region=...)
+CREATE INDEX IF NOT EXISTS ix_market_prices_region_date ON market_prices (region, price_date);
@@ -0,0 +1,23 @@
+-- Per-resource version counters backing ETag / If-None-Match responses
+CREATE TABLE IF NOT EXISTS resource_versions (
+    key VARCHAR(100) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Market prices are written outside the API (imports, SQL): bump their version from the database
+CREATE OR REPLACE FUNCTION market_prices_version_trigger() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO resource_versions (key, version, updated_at)
+    VALUES ('market_prices', 1, now())
+    ON CONFLICT (key) DO UPDATE SET version = resource_versions.version + 1, updated_at = now();
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_market_prices_version ON market_prices;
+CREATE TRIGGER trg_market_prices_version
+    AFTER INSERT OR UPDATE OR DELETE ON market_prices
+    FOR EACH STATEMENT EXECUTE FUNCTION market_prices_version_trigger();
@@ -0,0 +1,79 @@
+-- Farm deletion: ON DELETE CASCADE on every foreign key below farms, indexes on the
+-- referencing columns (each cascade step is an index lookup, not a scan) and the job table.
+
+CREATE TABLE IF NOT EXISTS farm_deletion_jobs (
+    id SERIAL PRIMARY KEY,
+    farm_id INTEGER NOT NULL,
+    user_id INTEGER,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    deleted JSON,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS ix_farm_deletion_jobs_farm_status ON farm_deletion_jobs (farm_id, status);
+
+-- Replace the foreign key on (table.column) -> ref(id) by one with the given ON DELETE action.
+-- Added NOT VALID then validated: existing orphans (if any) are reported instead of failing the migration.
+CREATE OR REPLACE FUNCTION pg_temp.set_fk_on_delete(p_table text, p_column text, p_ref text, p_action text)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    con record;
+    fk_name text := p_table || '_' || p_column || '_fkey';
+BEGIN
+    FOR con IN
+        SELECT c.conname
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        WHERE c.contype = 'f'
+          AND c.conrelid = p_table::regclass
+          AND c.confrelid = p_ref::regclass
+          AND array_length(c.conkey, 1) = 1
+          AND a.attname = p_column
+    LOOP
+        EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', p_table, con.conname);
+    END LOOP;
+    EXECUTE format(
+        'ALTER TABLE %I ADD CONSTRAINT %I FOREIGN KEY (%I) REFERENCES %I (id) ON DELETE %s NOT VALID',
+        p_table, fk_name, p_column, p_ref, p_action
+    );
+    BEGIN
+        EXECUTE format('ALTER TABLE %I VALIDATE CONSTRAINT %I', p_table, fk_name);
+    EXCEPTION WHEN foreign_key_violation THEN
+        RAISE NOTICE '% has orphan rows: % left NOT VALID', p_table, fk_name;
+    END;
+END
+$$;
+
+SELECT pg_temp.set_fk_on_delete('crops', 'farm_id', 'farms', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('farm_photos', 'farm_id', 'farms', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('activities', 'farm_id', 'farms', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('activities', 'crop_id', 'crops', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('activity_photos', 'activity_id', 'activities', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('crop_problems', 'farm_id', 'farms', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('crop_problems', 'crop_id', 'crops', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('harvests', 'farm_id', 'farms', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('harvests', 'crop_id', 'crops', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('sales', 'harvest_id', 'harvests', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('farm_profiles', 'farm_id', 'farms', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('farm_posts', 'farm_id', 'farms', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('farm_posts', 'crop_id', 'crops', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('farm_following', 'farm_id', 'farms', 'CASCADE');
+SELECT pg_temp.set_fk_on_delete('timeline_entries', 'post_id', 'farm_posts', 'CASCADE');
+
+-- Referencing columns without an index (farm_posts.farm_id, activities.farm_id and crops.farm_id
+-- are covered by 0003/0005; farm_profiles.farm_id is unique)
+CREATE INDEX IF NOT EXISTS ix_farm_photos_farm_id ON farm_photos (farm_id);
+CREATE INDEX IF NOT EXISTS ix_activities_crop_id ON activities (crop_id);
+CREATE INDEX IF NOT EXISTS ix_activity_photos_activity_id ON activity_photos (activity_id);
+CREATE INDEX IF NOT EXISTS ix_crop_problems_farm_id ON crop_problems (farm_id);
+CREATE INDEX IF NOT EXISTS ix_crop_problems_crop_id ON crop_problems (crop_id);
+CREATE INDEX IF NOT EXISTS ix_harvests_farm_id ON harvests (farm_id);
+CREATE INDEX IF NOT EXISTS ix_harvests_crop_id ON harvests (crop_id);
+CREATE INDEX IF NOT EXISTS ix_sales_harvest_id ON sales (harvest_id);
+CREATE INDEX IF NOT EXISTS ix_farm_posts_crop_id ON farm_posts (crop_id);
+CREATE INDEX IF NOT EXISTS ix_farm_following_farm_id ON farm_following (farm_id);
+CREATE INDEX IF NOT EXISTS ix_timeline_entries_post_id ON timeline_entries (post_id);
@@ -0,0 +1,37 @@
+-- Grid-cell spatial index for /api/farm-network/nearby (see app/services/geo_service.py).
+-- Cells are GRID_DEG = 0.1 degree squares numbered row * 3600 + column, so one latitude row of a
+-- bounding box is one contiguous range of geo_cell values (a plain B-tree range scan).
+
+ALTER TABLE farms ADD COLUMN IF NOT EXISTS geo_cell BIGINT;
+
+-- Must match geo_service.grid_cell()
+CREATE OR REPLACE FUNCTION farms_geo_cell(p_lat double precision, p_lon double precision)
+RETURNS bigint
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT CASE
+        WHEN p_lat IS NULL OR p_lon IS NULL THEN NULL
+        ELSE floor((p_lat + 90.0::double precision) / 0.1::double precision)::bigint * 3600
+           + floor((p_lon + 180.0::double precision) / 0.1::double precision)::bigint
+    END
+$$;
+
+CREATE OR REPLACE FUNCTION farms_geo_cell_trigger() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.geo_cell := farms_geo_cell(NEW.latitude, NEW.longitude);
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_farms_geo_cell ON farms;
+CREATE TRIGGER trg_farms_geo_cell
+    BEFORE INSERT OR UPDATE OF latitude, longitude ON farms
+    FOR EACH ROW EXECUTE FUNCTION farms_geo_cell_trigger();
+
+UPDATE farms
+SET geo_cell = farms_geo_cell(latitude, longitude)
+WHERE geo_cell IS DISTINCT FROM farms_geo_cell(latitude, longitude);
+
+CREATE INDEX IF NOT EXISTS ix_farms_geo_cell ON farms (geo_cell) WHERE geo_cell IS NOT NULL;
@@ -0,0 +1,3 @@
+-- Cursor pagination of /api/users/{id}/posts on farm_posts.user_id (the farm owner, set at creation),
+-- in the (created_at, id) descending order of the page, without joining farms first
+CREATE INDEX IF NOT EXISTS ix_farm_posts_user_created_id ON farm_posts (user_id, created_at DESC, id DESC);
@@ -0,0 +1,41 @@
+-- market_latest_prices: also follow deletes, and updates that move or back-date the current latest reading.
+-- When the reading being removed (or changed) is the latest of its (product, region), the next one is
+-- looked up in market_prices; then, as before, the new row replaces the latest if it is not older.
+CREATE OR REPLACE FUNCTION market_prices_latest_trigger() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM market_latest_prices
+        WHERE product_name = OLD.product_name AND region = OLD.region AND price_id = OLD.id;
+        IF FOUND THEN
+            INSERT INTO market_latest_prices (product_name, region, price_id, price_per_kg, currency, price_date, source, updated_at)
+            SELECT product_name, region, id, price_per_kg, currency, price_date, source, now()
+            FROM market_prices
+            WHERE product_name = OLD.product_name AND region = OLD.region AND price_date IS NOT NULL
+            ORDER BY price_date DESC, id DESC
+            LIMIT 1
+            ON CONFLICT (product_name, region) DO NOTHING;
+        END IF;
+    END IF;
+    IF TG_OP = 'DELETE' OR NEW.price_date IS NULL THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO market_latest_prices (product_name, region, price_id, price_per_kg, currency, price_date, source, updated_at)
+    VALUES (NEW.product_name, NEW.region, NEW.id, NEW.price_per_kg, NEW.currency, NEW.price_date, NEW.source, now())
+    ON CONFLICT (product_name, region) DO UPDATE SET
+        price_id = EXCLUDED.price_id,
+        price_per_kg = EXCLUDED.price_per_kg,
+        currency = EXCLUDED.currency,
+        price_date = EXCLUDED.price_date,
+        source = EXCLUDED.source,
+        updated_at = EXCLUDED.updated_at
+    WHERE (market_latest_prices.price_date, market_latest_prices.price_id) <= (EXCLUDED.price_date, EXCLUDED.price_id);
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_market_prices_latest ON market_prices;
+CREATE TRIGGER trg_market_prices_latest
+    AFTER INSERT OR UPDATE OR DELETE ON market_prices
+    FOR EACH ROW EXECUTE FUNCTION market_prices_latest_trigger();
@@ -0,0 +1,101 @@
+"""
+Local stand-in for the Google News RSS endpoint used by news_service.
+
+Serves a small RSS document for any query on a local port, counts the
+requests it receives and can be switched to fail (HTTP 503), to answer an
+empty feed or to answer slowly. Point the app at it with NEWS_FEED_BASE_URL:
+
+    python -m tests.news_stub_server --port 8765
+    NEWS_FEED_BASE_URL=http://127.0.0.1:8765/rss uvicorn app.main:app
+"""
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+RSS_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Stub news</title>{items}</channel></rss>"""
+ITEM_TEMPLATE = """<item><title>{title}</title><link>http://stub.local/{n}</link>
+<description>&lt;b&gt;Article {n}&lt;/b&gt; pour {query}</description>
+<pubDate>Mon, 06 Jan 2025 08:00:00 GMT</pubDate></item>"""
+
+
+class NewsStubServer:
+    """RSS stub on 127.0.0.1; `mode` is "ok", "fail" (503) or "empty" (feed without items)."""
+
+    def __init__(self, port: int = 0, items: int = 5):
+        self.mode = "ok"
+        self.delay = 0.0  # seconds before each answer
+        self.items = items
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/rss"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                if stub.mode == "fail":
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+                count = 0 if stub.mode == "empty" else stub.items
+                items = "".join(
+                    ITEM_TEMPLATE.format(title=escape(f"{query} #{n}"), n=n, query=escape(query))
+                    for n in range(1, count + 1)
+                )
+                body = RSS_TEMPLATE.format(items=items).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "NewsStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "NewsStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve stub RSS news feeds")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mode", choices=["ok", "fail", "empty"], default="ok")
+    args = parser.parse_args()
+    server = NewsStubServer(args.port)
+    server.mode = args.mode
+    print(f"Stub news feeds on {server.base_url} ({args.mode})")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
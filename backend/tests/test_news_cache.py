@@ -0,0 +1,103 @@
+"""NewsCache reads (fresh, stale, cold) against the local stub feed server."""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services import news_service
+from app.services.news_service import FEEDS, ITEMS_PER_FEED, NewsCache
+from tests.news_stub_server import NewsStubServer
+
+ALL_ARTICLES = len(FEEDS) * ITEMS_PER_FEED
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with NewsStubServer() as server:
+        monkeypatch.setattr(settings, "NEWS_FEED_BASE_URL", server.base_url)
+        monkeypatch.setattr(settings, "NEWS_FETCH_TIMEOUT", 2.0)
+        monkeypatch.setattr(settings, "NEWS_CACHE_TTL", 900)
+        monkeypatch.setattr(settings, "NEWS_STALE_TTL", 21600)
+        monkeypatch.setattr(settings, "NEWS_FAILURE_TTL", 60)
+        yield server
+
+
+def _make_stale(cache: NewsCache) -> None:
+    cache.fetched_at -= settings.NEWS_CACHE_TTL + 1
+
+
+def test_cold_read_fetches_every_feed(stub):
+    cache = NewsCache()
+    articles = asyncio.run(cache.get())
+
+    assert len(articles) == ALL_ARTICLES
+    assert {a["category"] for a in articles} == {f["category"] for f in FEEDS}
+    assert stub.requests == len(FEEDS)
+
+
+def test_fresh_read_is_served_from_memory(stub):
+    async def scenario():
+        cache = NewsCache()
+        first = await cache.get()
+        second = await cache.get()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert second == first
+    assert stub.requests == len(FEEDS)
+
+
+def test_stale_read_returns_cached_articles_and_revalidates_in_background(stub):
+    async def scenario():
+        cache = NewsCache()
+        await cache.get()
+        _make_stale(cache)
+        stub.delay = 0.2
+
+        stale = await cache.get()
+        requests_when_served = stub.requests
+        await cache._refresh_task
+        return cache, stale, requests_when_served
+
+    cache, stale, requests_when_served = asyncio.run(scenario())
+    assert len(stale) == ALL_ARTICLES
+    assert requests_when_served == len(FEEDS)  # served without waiting for the feeds
+    assert stub.requests == 2 * len(FEEDS)
+    assert cache.age() < settings.NEWS_CACHE_TTL
+
+
+def test_concurrent_cold_reads_share_one_fetch(stub):
+    stub.delay = 0.2
+
+    async def scenario():
+        cache = NewsCache()
+        return await asyncio.gather(*(cache.get() for _ in range(10)))
+
+    results = asyncio.run(scenario())
+    assert all(len(articles) == ALL_ARTICLES for articles in results)
+    assert stub.requests == len(FEEDS)
+
+
+def test_failed_cold_fetch_is_cached_briefly(stub, monkeypatch):
+    stub.mode = "fail"
+
+    async def scenario():
+        cache = NewsCache()
+        results = await asyncio.gather(*(cache.get() for _ in range(10)))
+        await cache.get()
+        return cache, results
+
+    cache, results = asyncio.run(scenario())
+    assert all(articles == [] for articles in results)
+    assert stub.requests == len(FEEDS)  # one attempt for all waiting callers, none right after
+    assert cache.recently_failed()
+
+    stub.mode = "ok"
+    monkeypatch.setattr(settings, "NEWS_FAILURE_TTL", 0)
+    articles = asyncio.run(cache.get())
+    assert len(articles) == ALL_ARTICLES
+    assert stub.requests == 2 * len(FEEDS)
+
+
+def test_feed_urls_use_the_configured_base_url(stub):
+    assert news_service.feed_url(FEEDS[0]).startswith(stub.base_url + "?")
@@ -108,6 +108,19 @@ class ApiService {
 
   /// Logout user and clear all session data + cache
   static Future<void> logout() async {
+    // Révoquer les jetons côté serveur (best effort : la session locale est effacée quoi qu'il arrive)
+    try {
+      final headers = await _getAuthHeaders();
+      if (headers.containsKey('Authorization')) {
+        await http.post(
+          Uri.parse('$baseUrl/auth/logout'),
+          headers: headers,
+          body: jsonEncode({'refresh_token': await TokenStorage.getRefreshToken()}),
+        );
+      }
+    } catch (e) {
+      debugPrint('⚠️ Server logout failed: $e');
+    }
     await AuthService.logout();
     clearCache();
     debugPrint('🚪 Full logout completed: session and cache cleared');
@@ -177,6 +190,17 @@ class ApiService {
   }
 
 
+  /// Helper: Send an authenticated request; on 401 refresh the token once and retry.
+  static Future<http.Response> _authorized(
+    Future<http.Response> Function(Map<String, String>) requestFn,
+  ) async {
+    final response = await requestFn(await _getAuthHeaders());
+    if (response.statusCode == 401) {
+      return _handleUnauthorized(requestFn);
+    }
+    return response;
+  }
+
   static Future<Map<String, dynamic>> register({
     required String name,
     required String email,
@@ -247,19 +271,19 @@ class ApiService {
     double? longitude,
   }) async {
     try {
-      final response = await http.post(
-        Uri.parse('$baseUrl/farms/?user_id=$userId'),
-        headers: {'Content-Type': 'application/json'},
-        body: jsonEncode({
-          'name': name,
-          'location': location,
-          'size_hectares': sizeHectares,
-          'soil_type': soilType,
-          'image_url': imageUrl,
-          'latitude': latitude,
-          'longitude': longitude,
-        }),
-      );
+      final response = await _authorized((headers) => http.post(
+            Uri.parse('$baseUrl/farms/?user_id=$userId'),
+            headers: headers,
+            body: jsonEncode({
+              'name': name,
+              'location': location,
+              'size_hectares': sizeHectares,
+              'soil_type': soilType,
+              'image_url': imageUrl,
+              'latitude': latitude,
+              'longitude': longitude,
+            }),
+          ));
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
@@ -276,11 +300,11 @@ class ApiService {
     required String imageUrl,
   }) async {
     try {
-      final response = await http.post(
-        Uri.parse('$baseUrl/farms/$farmId/photos'),
-        headers: {'Content-Type': 'application/json'},
-        body: jsonEncode({'image_url': imageUrl}),
-      );
+      final response = await _authorized((headers) => http.post(
+            Uri.parse('$baseUrl/farms/$farmId/photos'),
+            headers: headers,
+            body: jsonEncode({'image_url': imageUrl}),
+          ));
       if (response.statusCode != 200) {
         throw Exception('Failed to add farm photo: ${response.body}');
       }
@@ -325,7 +349,7 @@ class ApiService {
     required int photoId,
   }) async {
     try {
-      final response = await http.delete(Uri.parse('$baseUrl/farms/$farmId/photos/$photoId'));
+      final response = await _authorized((headers) => http.delete(Uri.parse('$baseUrl/farms/$farmId/photos/$photoId'), headers: headers));
       if (response.statusCode != 200) {
         throw Exception('Failed to delete farm photo: ${response.body}');
       }
@@ -338,7 +362,7 @@ class ApiService {
     required int farmId,
   }) async {
     try {
-      final response = await http.delete(Uri.parse('$baseUrl/farms/$farmId/profile'));
+      final response = await _authorized((headers) => http.delete(Uri.parse('$baseUrl/farms/$farmId/profile'), headers: headers));
       if (response.statusCode != 200) {
         throw Exception('Failed to delete farm profile photo: ${response.body}');
       }
@@ -358,19 +382,19 @@ class ApiService {
     double? longitude,
   }) async {
     try {
-      final response = await http.put(
-        Uri.parse('$baseUrl/farms/$farmId'),
-        headers: {'Content-Type': 'application/json'},
-        body: jsonEncode({
-          'name': name,
-          'location': location,
-          'size_hectares': sizeHectares,
-          'soil_type': soilType,
-          'image_url': imageUrl,
-          'latitude': latitude,
-          'longitude': longitude,
-        }),
-      );
+      final response = await _authorized((headers) => http.put(
+            Uri.parse('$baseUrl/farms/$farmId'),
+            headers: headers,
+            body: jsonEncode({
+              'name': name,
+              'location': location,
+              'size_hectares': sizeHectares,
+              'soil_type': soilType,
+              'image_url': imageUrl,
+              'latitude': latitude,
+              'longitude': longitude,
+            }),
+          ));
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
       } else {
@@ -383,8 +407,9 @@ class ApiService {
 
   static Future<void> deleteFarm(int farmId) async {
     try {
-      final response = await http.delete(Uri.parse('$baseUrl/farms/$farmId'));
-      if (response.statusCode != 200) {
+      final response = await _authorized((headers) => http.delete(Uri.parse('$baseUrl/farms/$farmId'), headers: headers));
+      // 202 : suppression acceptée, elle se termine en arrière-plan
+      if (response.statusCode != 200 && response.statusCode != 202) {
         throw Exception('Failed to delete farm: ${response.body}');
       }
     } catch (e) {
@@ -440,19 +465,19 @@ class ApiService {
     String? notes,
   }) async {
     try {
-      final response = await http.post(
-        Uri.parse('$baseUrl/farms/$farmId/crops'),
-        headers: {'Content-Type': 'application/json'},
-        body: jsonEncode({
-          'crop_name': cropName,
-          'planted_date': plantedDate?.toIso8601String(),
-          'expected_harvest_date': expectedHarvestDate?.toIso8601String(),
-          'quantity_planted': quantityPlanted,
-          'expected_yield': expectedYield,
-          'status': status,
-          'notes': notes,
-        }),
-      );
+      final response = await _authorized((headers) => http.post(
+            Uri.parse('$baseUrl/farms/$farmId/crops'),
+            headers: headers,
+            body: jsonEncode({
+              'crop_name': cropName,
+              'planted_date': plantedDate?.toIso8601String(),
+              'expected_harvest_date': expectedHarvestDate?.toIso8601String(),
+              'quantity_planted': quantityPlanted,
+              'expected_yield': expectedYield,
+              'status': status,
+              'notes': notes,
+            }),
+          ));
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
@@ -998,18 +1023,17 @@ class ApiService {
     bool isPublic = true,
   }) async {
     try {
-      final headers = await _getAuthHeaders();
-      final response = await http.post(
-        Uri.parse('$baseUrl/farm-network/profiles/$farmId'),
-        headers: headers,
-        body: jsonEncode({
-          'farm_id': farmId,
-          'user_id': userId,
-          'description': description,
-          'specialties': specialties,
-          'is_public': isPublic,
-        }),
-      );
+      final response = await _authorized((headers) => http.post(
+            Uri.parse('$baseUrl/farm-network/profiles/$farmId'),
+            headers: headers,
+            body: jsonEncode({
+              'farm_id': farmId,
+              'user_id': userId,
+              'description': description,
+              'specialties': specialties,
+              'is_public': isPublic,
+            }),
+          ));
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
@@ -1079,20 +1103,19 @@ class ApiService {
     int? cropId,
   }) async {
     try {
-      final headers = await _getAuthHeaders();
-      final response = await http.post(
-        Uri.parse('$baseUrl/farm-network/posts'),
-        headers: headers,
-        body: jsonEncode({
-          'farm_id': farmId,
-          'user_id': userId,
-          'title': title,
-          'description': description,
-          'photo_url': photoUrl,
-          'post_type': postType,
-          'crop_id': cropId,
-        }),
-      );
+      final response = await _authorized((headers) => http.post(
+            Uri.parse('$baseUrl/farm-network/posts'),
+            headers: headers,
+            body: jsonEncode({
+              'farm_id': farmId,
+              'user_id': userId,
+              'title': title,
+              'description': description,
+              'photo_url': photoUrl,
+              'post_type': postType,
+              'crop_id': cropId,
+            }),
+          ));
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
@@ -1127,10 +1150,10 @@ class ApiService {
   static Future<List<dynamic>> getFarmFeed(int userId) async {
     try {
       return await _withRetry(() async {
-        final response = await http.get(
-          Uri.parse('$baseUrl/farm-network/feed?user_id=$userId'),
-          headers: {'Content-Type': 'application/json'},
-        );
+        final response = await _authorized((headers) => http.get(
+              Uri.parse('$baseUrl/farm-network/feed?user_id=$userId'),
+              headers: headers,
+            ));
 
         if (response.statusCode == 200) {
           final data = jsonDecode(response.body);
@@ -1146,11 +1169,10 @@ class ApiService {
 
   static Future<void> followUser({required int userIdToFollow, required int userId}) async {
     try {
-      final headers = await _getAuthHeaders();
-      final response = await http.post(
-        Uri.parse('$baseUrl/farm-network/follow-user/$userIdToFollow?user_id=$userId'),
-        headers: headers,
-      );
+      final response = await _authorized((headers) => http.post(
+            Uri.parse('$baseUrl/farm-network/follow-user/$userIdToFollow?user_id=$userId'),
+            headers: headers,
+          ));
 
       if (response.statusCode != 200) {
         throw Exception('Failed to follow user');
@@ -1162,11 +1184,10 @@ class ApiService {
 
   static Future<void> unfollowUser({required int userIdToUnfollow, required int userId}) async {
     try {
-      final headers = await _getAuthHeaders();
-      final response = await http.delete(
-        Uri.parse('$baseUrl/farm-network/follow-user/$userIdToUnfollow?user_id=$userId'),
-        headers: headers,
-      );
+      final response = await _authorized((headers) => http.delete(
+            Uri.parse('$baseUrl/farm-network/follow-user/$userIdToUnfollow?user_id=$userId'),
+            headers: headers,
+          ));
 
       if (response.statusCode != 200) {
         throw Exception('Failed to unfollow user');
@@ -1280,10 +1301,10 @@ class ApiService {
     required bool isPublic,
   }) async {
     try {
-      final response = await http.put(
-        Uri.parse('$baseUrl/users/$userId/farms/$farmId/visibility?is_public=$isPublic'),
-        headers: {'Content-Type': 'application/json'},
-      );
+      final response = await _authorized((headers) => http.put(
+            Uri.parse('$baseUrl/users/$userId/farms/$farmId/visibility?is_public=$isPublic'),
+            headers: headers,
+          ));
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);
@@ -1327,12 +1348,12 @@ class ApiService {
       if (email != null && email.isNotEmpty) params['email'] = email;
       if (profileImage != null && profileImage.isNotEmpty) params['profile_image'] = profileImage;
 
-      final response = await http.put(
-        Uri.parse('$baseUrl/users/$userId/profile').replace(
-          queryParameters: params.isNotEmpty ? params : null,
-        ),
-        headers: {'Content-Type': 'application/json'},
-      );
+      final response = await _authorized((headers) => http.put(
+            Uri.parse('$baseUrl/users/$userId/profile').replace(
+              queryParameters: params.isNotEmpty ? params : null,
+            ),
+            headers: headers,
+          ));
 
       if (response.statusCode == 200) {
         return jsonDecode(response.body);